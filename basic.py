@@ -2,14 +2,30 @@
 # IMPORTS
 #######################################
 
+import re
+import time
+from bisect import bisect_right
+from itertools import groupby
+
 from strings_with_arrows import *
 from verbose_output import VerboseInterpreterMixin, print_verbose_execution
 from gemini_controller import get_gemini_controller
+from operator_lexicon import lookup_operator
 
 #######################################
 # CONSTANTS & TOKENS
 #######################################
 
+# Bump whenever tokens or AST nodes change shape: compiled-program
+# caches (program_cache.py) from other versions are then ignored
+INTERPRETER_VERSION = '1.6'
+
+# Calls deeper than this report an error instead of exhausting memory
+# (LinguaFlow has no conditionals, so such recursion can never end)
+MAX_CALL_DEPTH = 5000
+# Identical traceback lines shown in a row before the rest are counted
+TRACEBACK_REPEATS = 3
+
 DIGITS = '0123456789'
 LETTERS = 'abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ'
 
@@ -61,45 +77,110 @@ class RTError(Error):
 		return result
 
 	def generate_traceback(self):
-		result = ''
+		lines = []
 		pos = self.pos_start
 		ctx = self.context
 
 		while ctx:
-			result = f'  File {pos.fn}, line {str(pos.ln + 1)}, in {ctx.display_name}\n' + result
+			lines.append(f'  File {pos.fn}, line {str(pos.ln + 1)}, in {ctx.display_name}\n')
 			pos = ctx.parent_entry_pos
 			ctx = ctx.parent
 
-		return 'Traceback (most recent call last):\n' + result
+		# Like Python, runs of the same frame are cut to TRACEBACK_REPEATS lines
+		result = []
+		for line, run in groupby(reversed(lines)):
+			count = len(list(run))
+			result.extend([line] * min(count, TRACEBACK_REPEATS))
+			if count > TRACEBACK_REPEATS:
+				result.append(f'  [Previous line repeated {count - TRACEBACK_REPEATS} more times]\n')
+
+		return 'Traceback (most recent call last):\n' + ''.join(result)
 
 #######################################
 # POSITION
 # Tracks exact location in source code
 #######################################
 
+class Source:
+	"""
+	File name and full text of a program, shared by all of its tokens and
+	nodes. Lines are only indexed once a line or column is asked for.
+	"""
+	def __init__(self, fn, text):
+		self.fn = fn
+		self.text = text
+		self.line_starts = None # index of the first character of every line
+
+	def line_col(self, idx):
+		if self.line_starts is None:
+			self.line_starts = [0] + [match.end() for match in re.finditer('\n', self.text)]
+		ln = bisect_right(self.line_starts, idx) - 1
+		return ln, idx - self.line_starts[ln]
+
 class Position:
-	def __init__(self, idx, ln, col, fn, ftxt):
+	# - A character index into a Source; line and column are derived on demand
+	# - An end position (is_end) belongs to the character before it, so a
+	#   range ending with '\n' ends on that line rather than the next one
+	__slots__ = ('idx', 'source', 'is_end')
+
+	def __init__(self, idx, source, is_end=False):
 		self.idx = idx #character index in the text
-		self.ln = ln #line number
-		self.col = col #column number
-		self.fn = fn #filename
-		self.ftxt = ftxt #full text of the file
-
-	def advance(self, current_char=None): #(current_char)
-	# -	Moves to the next character
-  # - Increments index and column
-  # - If it encounters \n, increments line number and resets column to 0
-		self.idx += 1
-		self.col += 1
+		self.source = source
+		self.is_end = is_end
+
+	@property
+	def fn(self): #filename
+		return self.source.fn
+
+	@property
+	def ftxt(self): #full text of the file
+		return self.source.text
+
+	@property
+	def ln(self): #line number
+		return self.line_col()[0]
 
-		if current_char == '\n':
-			self.ln += 1
-			self.col = 0
+	@property
+	def col(self): #column number
+		return self.line_col()[1]
 
+	def line_col(self):
+		if self.is_end and self.idx > 0:
+			ln, col = self.source.line_col(self.idx - 1)
+			return ln, col + 1
+		return self.source.line_col(self.idx)
+
+	def advance(self, current_char=None):
+		# Moves to the next character
+		self.idx += 1
 		return self
 
 	def copy(self):
-		return Position(self.idx, self.ln, self.col, self.fn, self.ftxt)
+		return Position(self.idx, self.source, self.is_end)
+
+class Span:
+	"""
+	Mixin for tokens and nodes. The source range is stored as integer
+	offsets (source, start, end); pos_start and pos_end are only built, and
+	then kept, when an error message or a runtime value needs them.
+	"""
+	__slots__ = ('source', 'start', 'end', 'pos_start', 'pos_end')
+
+	def __getattr__(self, name):
+		# Only reached while a position slot is still empty
+		if name == 'pos_start':
+			self.pos_start = Position(self.start, self.source) if self.start is not None else None
+			return self.pos_start
+		if name == 'pos_end':
+			self.pos_end = Position(self.end, self.source, True) if self.end is not None else None
+			return self.pos_end
+		raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'")
+
+	def set_span(self, first, last):
+		# Range from the start of first to the end of last
+		self.source = first.source
+		self.start = first.start
+		self.end = last.end
 
 #######################################
 # TOKENS
@@ -125,18 +206,18 @@ TT_KEYWORD    = 'KEYWORD'
 TT_EQ         = 'EQ'       # for 'as' logic
 TT_NEWLINE    = 'NEWLINE'  # To separate lines
 
-class Token:
+class Token(Span):
+	__slots__ = ('type', 'value')
+
 	def __init__(self, type_, value=None, pos_start=None, pos_end=None):
 		self.type = type_
 		self.value = value
+		self.source = self.start = self.end = None
 
 		if pos_start:
-			self.pos_start = pos_start.copy()
-			self.pos_end = pos_start.copy()
-			self.pos_end.advance()
-
-		if pos_end:
-			self.pos_end = pos_end
+			self.source = pos_start.source
+			self.start = pos_start.idx
+			self.end = pos_end.idx if pos_end else pos_start.idx + 1
 	
 	def __repr__(self):
 		if self.value: return f'{self.type}:{self.value}'
@@ -154,12 +235,12 @@ class Lexer:
     def __init__(self, fn, text):
         self.fn = fn
         self.text = text
-        self.pos = Position(-1, 0, -1, fn, text)
+        self.pos = Position(-1, Source(fn, text))
         self.current_char = None
         self.advance()
 
     def advance(self):
-        self.pos.advance(self.current_char)
+        self.pos.advance()
         self.current_char = self.text[self.pos.idx] if self.pos.idx < len(self.text) else None
 
     def make_tokens(self):
@@ -230,9 +311,9 @@ class Lexer:
             self.advance()
 
         if dot_count == 0:
-            return Token(TT_INT, int(num_str), pos_start, self.pos)
+            return Token(TT_INT, int(num_str), pos_start, self.pos.copy())
         else:
-            return Token(TT_FLOAT, float(num_str), pos_start, self.pos)
+            return Token(TT_FLOAT, float(num_str), pos_start, self.pos.copy())
 
     def make_word(self):
         word_str = ''
@@ -245,106 +326,134 @@ class Lexer:
         word_lower = word_str.lower() # Case insensitive keywords?
 
         if word_lower in KEYWORDS:
-            return Token(TT_KEYWORD, word_lower, pos_start, self.pos)
+            return Token(TT_KEYWORD, word_lower, pos_start, self.pos.copy())
         else:
             # If not a keyword, it is an Identifier (Variable name)
-            return Token(TT_IDENTIFIER, word_str, pos_start, self.pos)
+            return Token(TT_IDENTIFIER, word_str, pos_start, self.pos.copy())
 
 #######################################
 # NODES
 #######################################
 
-class ListNode:
+class ListNode(Span):
+    # Weak references let function bodies key the per-body caches (native_compiler.py, scope_resolver.py)
+    __slots__ = ('element_nodes', 'memo', '__weakref__')
+
     def __init__(self, element_nodes):
         self.element_nodes = element_nodes
-        self.pos_start = self.element_nodes[0].pos_start if element_nodes else None
-        self.pos_end = self.element_nodes[-1].pos_end if element_nodes else None
+        self.memo = None  # results of a function body, set by its first call (function_memo.py)
+        self.source = self.start = self.end = None
+        if element_nodes: self.set_span(element_nodes[0], element_nodes[-1])
 
-class NumberNode:
+class NumberNode(Span):
 	# - Leaf node containing a single number token
   # - Example: 5 becomes NumberNode(Token(INT, 5))
+	__slots__ = ('tok',)
+
 	def __init__(self, tok):
 		self.tok = tok
 
-		self.pos_start = self.tok.pos_start
-		self.pos_end = self.tok.pos_end
+		self.set_span(tok, tok)
 
 	def __repr__(self):
 		return f'{self.tok}'
 
-class BinOpNode:
+class BinOpNode(Span):
 	#   - Binary operation with left operand, operator, right operand
   # - Example: 5 + 3 becomes BinOpNode(NumberNode(5), Token(PLUS),NumberNode(3))
+	__slots__ = ('left_node', 'op_tok', 'right_node')
+
 	def __init__(self, left_node, op_tok, right_node):
 		self.left_node = left_node
 		self.op_tok = op_tok
 		self.right_node = right_node
 
-		self.pos_start = self.left_node.pos_start
-		self.pos_end = self.right_node.pos_end
+		self.set_span(left_node, right_node)
 
 	def __repr__(self):
 		return f'({self.left_node}, {self.op_tok}, {self.right_node})'
 
-class UnaryOpNode:
+class UnaryOpNode(Span):
 	# - Unary operation (like negation)
   # - Example: -5 becomes UnaryOpNode(Token(MINUS), NumberNode(5))
+	__slots__ = ('op_tok', 'node')
+
 	def __init__(self, op_tok, node):
 		self.op_tok = op_tok
 		self.node = node
 
-		self.pos_start = self.op_tok.pos_start
-		self.pos_end = node.pos_end
+		self.set_span(op_tok, node)
 
 	def __repr__(self):
 		return f'({self.op_tok}, {self.node})'
 
-class ListOpNode:
+class ListOpNode(Span):
 	"""
 	List operation node for Rule 3: "sum these numbers: [5, 3, 7]"
 	Applies operation to all numbers in list left-to-right
 	"""
+	__slots__ = ('op_tok', 'number_nodes', 'prepared')
+
 	def __init__(self, op_tok, number_nodes):
 		self.op_tok = op_tok  # The resolved operation token (PLUS, MINUS, MUL, DIV)
 		self.number_nodes = number_nodes  # List of NumberNode objects
+		self.prepared = None  # values and array of a long list, set by its first fold (list_fold.py)
 
-		self.pos_start = self.op_tok.pos_start
-		self.pos_end = number_nodes[-1].pos_end if number_nodes else op_tok.pos_end
+		self.set_span(op_tok, number_nodes[-1] if number_nodes else op_tok)
 
 	def __repr__(self):
 		return f'ListOp({self.op_tok}, {self.number_nodes})'
       
-class VarAccessNode:
+class VarAccessNode(Span):
+    # slot: index of the name in its function's frame (scope_resolver.py), or None
+    __slots__ = ('var_name_tok', 'slot')
+
     def __init__(self, var_name_tok):
         self.var_name_tok = var_name_tok
-        self.pos_start = self.var_name_tok.pos_start
-        self.pos_end = self.var_name_tok.pos_end
+        self.slot = None
+        self.set_span(var_name_tok, var_name_tok)
+
+class VarAssignNode(Span):
+    __slots__ = ('var_name_tok', 'value_node', 'slot')
 
-class VarAssignNode:
     def __init__(self, var_name_tok, value_node):
         self.var_name_tok = var_name_tok
         self.value_node = value_node
-        self.pos_start = self.var_name_tok.pos_start
-        self.pos_end = self.value_node.pos_end
+        self.slot = None
+        self.set_span(var_name_tok, value_node)
+
+class FuncDefNode(Span):
+    __slots__ = ('var_name_tok', 'arg_name_toks', 'body_node')
 
-class FuncDefNode:
     def __init__(self, var_name_tok, arg_name_toks, body_node):
         self.var_name_tok = var_name_tok
         self.arg_name_toks = arg_name_toks
         self.body_node = body_node
-        self.pos_start = self.var_name_tok.pos_start
-        self.pos_end = self.body_node.pos_end
+        self.set_span(var_name_tok, body_node)
+
+class CallNode(Span):
+    __slots__ = ('node_to_call', 'arg_nodes')
 
-class CallNode:
     def __init__(self, node_to_call, arg_nodes):
         self.node_to_call = node_to_call
         self.arg_nodes = arg_nodes
-        self.pos_start = self.node_to_call.pos_start
         
         if len(self.arg_nodes) > 0:
-            self.pos_end = self.arg_nodes[-1].pos_end
+            self.set_span(node_to_call, self.arg_nodes[-1])
         else:
-            self.pos_end = self.node_to_call.pos_end
+            self.set_span(node_to_call, node_to_call)
+
+class TreeBuilder:
+    """Node constructors the Parser builds the object AST with"""
+    ListNode = ListNode
+    NumberNode = NumberNode
+    BinOpNode = BinOpNode
+    UnaryOpNode = UnaryOpNode
+    ListOpNode = ListOpNode
+    VarAccessNode = VarAccessNode
+    VarAssignNode = VarAssignNode
+    FuncDefNode = FuncDefNode
+    CallNode = CallNode
 
 #######################################
 # PARSE RESULT
@@ -386,11 +495,45 @@ class Parser:
     1. Statements: create x as 5, find func x
     2. Symbolic Math: 5 + 3
     3. Natural Phrasing: sum of 5 and 3
+
+    If a symbol table is given, identifiers already bound in it (or bound
+    earlier in the program by 'create') are treated as names and never
+    sent to the LLM for operator resolution. Remaining words are looked
+    up in the built-in operator lexicon (typos included), and only what
+    it cannot classify is resolved with a single batched LLM request.
+
+    With flat=True the result is a FlatAST (flat_ast.py), written into
+    arrays as the program is parsed, instead of a tree of node objects.
+
+    LLM resolutions of a program share resolution_budget seconds (None:
+    no limit). A word still unresolved when it runs out fails the parse
+    with an InvalidSyntaxError.
+
+    A WordPrefetcher (word_prefetch.py) may already have started resolving
+    the program's words in the background: the parser then sends the rest
+    the same way and only waits for an answer when it needs one.
+    compile_program starts one before lexing when speculative_prefetch is set.
     """
-    def __init__(self, tokens, use_llm=True):
+    resolution_budget = 60.0
+    speculative_prefetch = True
+
+    def __init__(self, tokens, use_llm=True, symbol_table=None, flat=False, prefetcher=None, quiet=False):
         self.tokens = tokens
+        self.quiet = quiet  # do not print resolutions (quiet output mode)
+        if flat:
+            from flat_ast import FlatAST
+            self.nodes = FlatAST(tokens[0].source)
+        else:
+            self.nodes = TreeBuilder
         self.tok_idx = -1
         self.use_llm = use_llm
+        self.symbol_table = symbol_table
+        self.bindings = self.collect_bindings(tokens)
+        self.resolved_words = {}  # lowercase word -> (symbol, error)
+        self.local_words = set()  # words answered by the lexicon, not the LLM
+        self.resolution_deadline = None  # set by the first LLM request
+        self.prefetcher = prefetcher
+        self.budget_error = None
         self.advance()
 
     def advance(self):
@@ -408,12 +551,20 @@ class Parser:
 
     def parse(self):
         # Entry point: Parse a list of statements
+        self.prefetch_word_ops()
         res = self.statements()
+        if self.budget_error is not None:
+            # Whatever the parse made of the unresolved word, report why it is unresolved
+            return res.failure(self.budget_error)
         if not res.error and self.current_tok.type != TT_EOF:
             return res.failure(InvalidSyntaxError(
                 self.current_tok.pos_start, self.current_tok.pos_end,
                 "Unexpected token"
             ))
+        if not res.error and self.nodes is not TreeBuilder:
+            # Flat output: the program is the FlatAST, rooted at the top-level list
+            self.nodes.root = res.node
+            res.node = self.nodes
         return res
 
     ###################################
@@ -442,10 +593,10 @@ class Parser:
             if newline_count == 0: break
             
             statement = res.register(self.statement())
-            if not statement: break
+            if statement is None: break
             statements.append(statement)
 
-        return res.success(ListNode(statements))
+        return res.success(self.nodes.ListNode(statements))
 
     def statement(self):
         # Check for keywords first
@@ -476,7 +627,7 @@ class Parser:
             res.register(self.advance())
             expr = res.register(self.expr())
             if res.error: return res
-            return res.success(VarAssignNode(var_name, expr))
+            return res.success(self.nodes.VarAssignNode(var_name, expr))
         
         elif self.current_tok.type == TT_KEYWORD and self.current_tok.value == 'taking':
             # Function Definition: create func taking a b do ... end
@@ -499,7 +650,7 @@ class Parser:
                 return res.failure(InvalidSyntaxError(self.current_tok.pos_start, self.current_tok.pos_end, "Expected 'end'"))
             
             res.register(self.advance())
-            return res.success(FuncDefNode(var_name, arg_name_toks, body))
+            return res.success(self.nodes.FuncDefNode(var_name, arg_name_toks, body))
 
         return res.failure(InvalidSyntaxError(self.current_tok.pos_start, self.current_tok.pos_end, "Expected 'as' or 'taking'"))
 
@@ -511,7 +662,7 @@ class Parser:
         if self.current_tok.type != TT_IDENTIFIER:
             return res.failure(InvalidSyntaxError(self.current_tok.pos_start, self.current_tok.pos_end, "Expected Function Name"))
         
-        node_to_call = VarAccessNode(self.current_tok)
+        node_to_call = self.nodes.VarAccessNode(self.current_tok)
         res.register(self.advance())
 
         arg_nodes = []
@@ -521,113 +672,143 @@ class Parser:
             if res.error: break
             arg_nodes.append(arg)
         
-        return res.success(CallNode(node_to_call, arg_nodes))
+        return res.success(self.nodes.CallNode(node_to_call, arg_nodes))
 
     ###################################
     # Expression Parsing (Level 1)
     ###################################
 
     def expr(self):
-        res = ParseResult()
-
-        # Check for Natural Language Rules first
-        # TT_IDENTIFIER can be an operation word (e.g., "sum") that LLM will resolve
-        if self.current_tok.type in (TT_WORD_OP, TT_IDENTIFIER):
-            if self.peek() and self.peek().type == TT_KEYWORD and self.peek().value == 'these':
-                return self.functional_expr()
-            elif self.peek() and self.peek().type == TT_KEYWORD and self.peek().value == 'of':
-                return self.natural_phrasing_expr()
-
-        # Fallback to Symbolic/Infix
-        return self.symbolic_expr()
-
-    def symbolic_expr(self):
-        return self.bin_op(self.term, (TT_PLUS, TT_MINUS, TT_WORD_OP))
-
-    def term(self):
-        return self.bin_op(self.factor, (TT_MUL, TT_DIV, TT_WORD_OP))
+        return self.expression(True)
 
     def factor(self):
-        res = ParseResult()
-        tok = self.current_tok
+        return self.expression(False)
 
-        # 1. Unary Operation (+5, -5)
-        if tok.type in (TT_PLUS, TT_MINUS):
-            res.register(self.advance())
-            factor = res.register(self.factor())
-            if res.error: return res
-            return res.success(UnaryOpNode(tok, factor))
+    def expression(self, whole):
+        """
+        Parse an expr (whole=True) or a single factor (whole=False):
 
-        # 2. Numbers
-        elif tok.type in (TT_INT, TT_FLOAT):
-            res.register(self.advance())
-            return res.success(NumberNode(tok))
+            expr   : natural rule | term ((PLUS|MINUS|word) term)*
+            term   : factor ((MUL|DIV|word) factor)*
+            factor : (PLUS|MINUS)* atom
+            atom   : INT | FLOAT | IDENTIFIER | LPAREN expr RPAREN | natural rule
 
-        # 3. Variables (Identifiers)
-        elif tok.type == TT_IDENTIFIER:
-            res.register(self.advance())
-            return res.success(VarAccessNode(tok))
+        Open parentheses are kept on an explicit stack instead of the Python
+        one, so nesting and unary chains are only limited by memory.
+        """
+        res = ParseResult()
+        # One level per open parenthesis, the first being the requested expr or
+        # factor: [unary tokens before the operand, sum, its operator, product, its operator]
+        levels = [[[], None, None, None, None]]
+        at_start = whole   # an expr may start with a natural rule (identifier or word op)
+        node = None        # the operand just read, or the value of a finished level
+        finished = False   # node is the value of the whole level
 
-        # 4. Parentheses
-        elif tok.type == TT_LPAREN:
-            res.register(self.advance())
-            expr = res.register(self.expr())
-            if res.error: return res
-            if self.current_tok.type == TT_RPAREN:
-                res.register(self.advance())
-                return res.success(expr)
-            else:
+        while True:
+            level = levels[-1]
+
+            if node is None:
+                tok = self.current_tok
+                natural = tok.type in (TT_WORD_OP, TT_IDENTIFIER) and self.natural_rule_ahead()
+
+                if at_start and natural:
+                    # An expr starting with a natural rule is that rule alone
+                    node = res.register(self.natural_expr())
+                    if res.error: return res
+                    finished = True
+
+                # 1. Unary Operation (+5, -5)
+                elif tok.type in (TT_PLUS, TT_MINUS):
+                    level[0].append(tok)
+                    res.register(self.advance())
+                    at_start = False
+                    continue
+
+                # 2. Numbers
+                elif tok.type in (TT_INT, TT_FLOAT):
+                    res.register(self.advance())
+                    node = self.nodes.NumberNode(tok)
+
+                # 3. Variables (Identifiers)
+                elif tok.type == TT_IDENTIFIER:
+                    res.register(self.advance())
+                    node = self.nodes.VarAccessNode(tok)
+
+                # 4. Parentheses: a new level, closed below
+                elif tok.type == TT_LPAREN:
+                    res.register(self.advance())
+                    levels.append([[], None, None, None, None])
+                    at_start = True
+                    continue
+
+                # 5. Nested Natural Language Rules
+                elif tok.type == TT_WORD_OP and natural:
+                    node = res.register(self.natural_expr())
+                    if res.error: return res
+
+                else:
+                    return res.failure(InvalidSyntaxError(tok.pos_start, tok.pos_end, "Expected int, float, identifier, or '('"))
+                at_start = False
+
+            if not finished:
+                for op_tok in reversed(level[0]):
+                    node = self.nodes.UnaryOpNode(op_tok, node)
+                level[0] = []
+                if not whole and len(levels) == 1:
+                    return res.success(node)
+
+                level[3] = node if level[3] is None else self.nodes.BinOpNode(level[3], level[4], node)
+                node = None
+                op_tok = self.binary_operator((TT_MUL, TT_DIV, TT_WORD_OP))
+                if op_tok is not None:
+                    level[4] = op_tok
+                    res.register(self.advance())
+                    continue
+
+                level[1] = level[3] if level[1] is None else self.nodes.BinOpNode(level[1], level[2], level[3])
+                level[3] = None
+                op_tok = self.binary_operator((TT_PLUS, TT_MINUS, TT_WORD_OP))
+                if op_tok is not None:
+                    level[2] = op_tok
+                    res.register(self.advance())
+                    continue
+                node = level[1]
+            finished = False
+
+            # The level is complete; a parenthesized one becomes an operand of the enclosing level
+            levels.pop()
+            if not levels:
+                return res.success(node)
+            if self.current_tok.type != TT_RPAREN:
                 return res.failure(InvalidSyntaxError(self.current_tok.pos_start, self.current_tok.pos_end, "Expected ')'"))
+            res.register(self.advance())
 
-        # 5. Nested Natural Language Rules (Recursive)
-        elif tok.type == TT_WORD_OP:
-            if self.peek() and self.peek().type == TT_KEYWORD and self.peek().value == 'these':
-                return self.functional_expr()
-            elif self.peek() and self.peek().type == TT_KEYWORD and self.peek().value == 'of':
-                return self.natural_phrasing_expr()
-            else:
-                return res.failure(InvalidSyntaxError(tok.pos_start, tok.pos_end, "Expected int, float, identifier, or '('"))
+    def natural_rule_ahead(self):
+        """Whether the current word starts 'WORD these numbers: [...]' or 'WORD of X and Y'"""
+        next_tok = self.peek()
+        return next_tok is not None and next_tok.type == TT_KEYWORD and next_tok.value in ('these', 'of')
 
-        return res.failure(InvalidSyntaxError(tok.pos_start, tok.pos_end, "Expected int, float, identifier, or '('"))
+    def natural_expr(self):
+        if self.peek().value == 'these':
+            return self.functional_expr()
+        return self.natural_phrasing_expr()
 
-    def bin_op(self, func, ops):
-        res = ParseResult()
-        left = res.register(func())
-        if res.error: return res
-
-        # Loop while token is an operator OR a potential identifier (word)
-        # Using parentheses () allows multi-line checks without backslashes
-        while (self.current_tok.type in ops or 
-               self.current_tok.type == TT_IDENTIFIER):
-            
-            op_tok = self.current_tok
-
-            # 1. AI Logic: If it is a word, ask Gemini
-            if op_tok.type == TT_IDENTIFIER:
-                resolved_op, error = self.resolve_word_op(op_tok)
-                
-                if error:
-                    # AI says it's not a math word. 
-                    # It might be the start of a new variable (e.g. "x").
-                    # Break the loop so the parser can handle it elsewhere.
-                    break
-                
-                # If valid, switch the token to the resolved symbol (e.g., PLUS)
-                op_tok = resolved_op
-
-                # CRITICAL PRECEDENCE CHECK:
-                # If we found '+' but this function is only looking for '*' (term),
-                # we must stop here.
-                if op_tok.type not in ops:
-                    break
-
-            # 2. Standard Logic: Consume the operator and parse the right side
-            res.register(self.advance())
-            right = res.register(func())
-            if res.error: return res
-            left = BinOpNode(left, op_tok, right)
+    def binary_operator(self, ops):
+        """
+        The operator token at the current position if it is one of ops, or
+        None. An identifier is resolved to an operator (lexicon or LLM)
+        unless it is a bound name; a word that is not an operator, or one
+        of lower precedence, ends the current term or expr.
+        """
+        op_tok = self.current_tok
+        if op_tok.type in ops: return op_tok
+        # Variables and functions can never be operators - no need to ask
+        if op_tok.type != TT_IDENTIFIER or self.is_bound_name(op_tok.value): return None
 
-        return res.success(left)
+        # It might be the start of a new variable (e.g. "x") rather than a math word
+        resolved_op, error = self.resolve_word_op(op_tok)
+        if error or resolved_op.type not in ops: return None
+        return resolved_op
 
     ###################################
     # Specific Grammar Rules
@@ -648,7 +829,7 @@ class Parser:
 
         number_nodes = []
         while self.current_tok.type in (TT_INT, TT_FLOAT):
-            number_nodes.append(NumberNode(self.current_tok))
+            number_nodes.append(self.nodes.NumberNode(self.current_tok))
             res.register(self.advance())
             if self.current_tok.type == TT_COMMA:
                 res.register(self.advance())
@@ -657,7 +838,7 @@ class Parser:
             return res.failure(InvalidSyntaxError(self.current_tok.pos_start, self.current_tok.pos_end, "Expected ']'"))
         res.register(self.advance())
 
-        return res.success(ListOpNode(resolved_op, number_nodes))
+        return res.success(self.nodes.ListOpNode(resolved_op, number_nodes))
 
     def natural_phrasing_expr(self):
         # Pattern: WORD_OP of X and Y
@@ -671,9 +852,9 @@ class Parser:
 
         # Accept number or variable
         if self.current_tok.type in (TT_INT, TT_FLOAT):
-            left_node = NumberNode(self.current_tok)
+            left_node = self.nodes.NumberNode(self.current_tok)
         elif self.current_tok.type == TT_IDENTIFIER:
-            left_node = VarAccessNode(self.current_tok)
+            left_node = self.nodes.VarAccessNode(self.current_tok)
         else:
             return res.failure(InvalidSyntaxError(self.current_tok.pos_start, self.current_tok.pos_end, "Expected number or variable"))
         res.register(self.advance())
@@ -682,36 +863,172 @@ class Parser:
 
         # Accept number or variable
         if self.current_tok.type in (TT_INT, TT_FLOAT):
-            right_node = NumberNode(self.current_tok)
+            right_node = self.nodes.NumberNode(self.current_tok)
         elif self.current_tok.type == TT_IDENTIFIER:
-            right_node = VarAccessNode(self.current_tok)
+            right_node = self.nodes.VarAccessNode(self.current_tok)
         else:
             return res.failure(InvalidSyntaxError(self.current_tok.pos_start, self.current_tok.pos_end, "Expected number or variable"))
         res.register(self.advance())
 
-        return res.success(BinOpNode(left_node, resolved_op, right_node))
+        return res.success(self.nodes.BinOpNode(left_node, resolved_op, right_node))
+
+    ###################################
+    # Name Binding
+    ###################################
+
+    def collect_bindings(self, tokens):
+        """
+        Pre-pass over the token stream recording where names get bound.
+
+        Returns {name: [(start_idx, end_idx), ...]}: 'create NAME' binds NAME
+        from that point to the end of the program, and function parameters
+        are bound between 'taking' and the matching 'end'.
+        """
+        bindings = {}
+        open_params = []  # parameter tokens of each function body being scanned
+        idx = 0
+
+        while idx < len(tokens):
+            tok = tokens[idx]
+            if tok.type == TT_KEYWORD and tok.value == 'create':
+                if idx + 1 < len(tokens) and tokens[idx + 1].type == TT_IDENTIFIER:
+                    bindings.setdefault(tokens[idx + 1].value, []).append((idx + 1, len(tokens)))
+            elif tok.type == TT_KEYWORD and tok.value == 'taking':
+                params = []
+                while idx + 1 < len(tokens) and tokens[idx + 1].type == TT_IDENTIFIER:
+                    idx += 1
+                    params.append((tokens[idx].value, idx))
+                open_params.append(params)
+            elif tok.type == TT_KEYWORD and tok.value == 'end' and open_params:
+                for name, start in open_params.pop():
+                    bindings.setdefault(name, []).append((start, idx))
+            idx += 1
+
+        # Unterminated bodies: parameters stay bound to the end
+        for params in open_params:
+            for name, start in params:
+                bindings.setdefault(name, []).append((start, len(tokens)))
+
+        return bindings
+
+    def is_bound_name(self, name):
+        """True if name is a known variable/function at the current token."""
+        for start, end in self.bindings.get(name, ()):
+            if start < self.tok_idx < end:
+                return True
+        return self.symbol_table is not None and self.symbol_table.get(name) is not None
+
+    ###################################
+    # LLM Resolution
+    ###################################
+
+    def candidate_words(self):
+        """Distinct identifiers that might be operation words."""
+        words = {}
+        for idx, tok in enumerate(self.tokens):
+            if tok.type != TT_IDENTIFIER: continue
+            if tok.value in self.bindings or tok.value.lower() in self.resolved_words: continue
+            if self.symbol_table is not None and self.symbol_table.get(tok.value) is not None: continue
+
+            prev_tok = self.tokens[idx - 1] if idx > 0 else None
+            if prev_tok and prev_tok.type == TT_KEYWORD and prev_tok.value == 'find': continue
+
+            words.setdefault(tok.value.lower(), tok.value)
+        return list(words.values())
+
+    def resolve_locally(self, word):
+        """Try the offline lexicon; records and returns True on success."""
+        symbol = lookup_operator(word)
+        if symbol is None: return False
+        self.resolved_words[word.lower()] = (symbol, None)
+        self.local_words.add(word.lower())
+        return True
+
+    def prefetch_word_ops(self):
+        """
+        Resolve every candidate word up front: first with the offline
+        lexicon, then the rest with one batched LLM request, so
+        resolve_word_op() answers from memory instead of one call per word.
+        """
+        words = [word for word in self.candidate_words() if not self.resolve_locally(word)]
+        if not self.use_llm or not words: return
+        if self.prefetcher is not None:
+            # Answers are collected when needed; only words it cannot send are asked for here
+            words = self.prefetcher.finish(words)
+            if not words: return
 
-    def resolve_word_op(self, word_tok):
-        if not self.use_llm:
-            return None, f"Cannot resolve operation word '{word_tok.value}' without LLM"
         try:
             gemini = get_gemini_controller()
-            symbol, error = gemini.resolve_operation_word(word_tok.value)
-            if error: return None, error
-
-            symbol_to_type = {'+': TT_PLUS, '-': TT_MINUS, '*': TT_MUL, '/': TT_DIV}
-            if symbol not in symbol_to_type: return None, f"Invalid symbol '{symbol}' returned by LLM"
+            resolve_many = getattr(gemini, 'resolve_operation_words', None)
+            if resolve_many is None: return
+            for word, result in resolve_many(words, timeout=self.resolution_time_left()).items():
+                self.resolved_words[word.lower()] = result
+        except (TimeoutError, ValueError):
+            # Out of time, or no usable controller (e.g. no API key): anything
+            # left unresolved is asked for individually later. Failed requests
+            # are already left out of the batch answer.
+            pass
+
+    def resolution_time_left(self):
+        """Seconds left of the resolution budget (None: unlimited), starting it on first use"""
+        if self.resolution_budget is None: return None
+        if self.resolution_deadline is None:
+            self.resolution_deadline = time.monotonic() + self.resolution_budget
+        return self.resolution_deadline - time.monotonic()
+
+    def collect_prefetched(self, key):
+        """Wait (within the budget) for the prefetch batch asking for key and take in its answers"""
+        future = self.prefetcher.futures.get(key)
+        if future is None: return
+        try:
+            results = future.result(timeout=self.resolution_time_left())
+        except Exception:
+            # Timed out or failed: key is then asked for on its own
+            return
+        for word, result in results.items():
+            self.resolved_words.setdefault(word.lower(), result)
 
-            print(f"\n[LLM Resolution] '{word_tok.value}' -> '{symbol}'")
-            return Token(symbol_to_type[symbol], symbol, word_tok.pos_start, word_tok.pos_end), None
-        except Exception as e:
-            return None, f"LLM error: {str(e)}"
+    def resolve_word_op(self, word_tok):
+        key = word_tok.value.lower()
+        if key not in self.resolved_words and not self.resolve_locally(word_tok.value):
+            if not self.use_llm:
+                return None, f"Cannot resolve operation word '{word_tok.value}' without LLM"
+            if self.prefetcher is not None:
+                self.collect_prefetched(key)
+        if key not in self.resolved_words:
+            time_left = self.resolution_time_left()
+            try:
+                if time_left is not None and time_left <= 0: raise TimeoutError
+                gemini = get_gemini_controller()
+                self.resolved_words[key] = gemini.resolve_operation_word(word_tok.value, timeout=time_left)
+            except TimeoutError:
+                error = f"Could not resolve '{word_tok.value}' within the {self.resolution_budget:g}s resolution budget"
+                if self.budget_error is None:
+                    self.budget_error = InvalidSyntaxError(word_tok.pos_start, word_tok.pos_end, error)
+                return None, error
+            except Exception as e:
+                return None, f"LLM error: {str(e)}"
+
+        symbol, error = self.resolved_words[key]
+        if error: return None, error
+
+        symbol_to_type = {'+': TT_PLUS, '-': TT_MINUS, '*': TT_MUL, '/': TT_DIV}
+        if symbol not in symbol_to_type: return None, f"Invalid symbol '{symbol}' returned by LLM"
+
+        if not self.quiet:
+            source = 'Lexicon' if key in self.local_words else 'LLM'
+            print(f"\n[{source} Resolution] '{word_tok.value}' -> '{symbol}'")
+        tok = Token(symbol_to_type[symbol], symbol)
+        tok.set_span(word_tok, word_tok)
+        return tok, None
 
 #######################################
 # RUNTIME RESULT
 #######################################
 
 class RTResult:
+	__slots__ = ('value', 'error')
+
 	def __init__(self):
 		self.value = None
 		self.error = None
@@ -733,6 +1050,8 @@ class RTResult:
 #######################################
 
 class Number:
+    __slots__ = ('value', 'pos_start', 'pos_end', 'context')
+
     def __init__(self, value):
         self.value = value
         self.set_pos()
@@ -798,10 +1117,29 @@ class SymbolTable:
         self.parent = parent # Parent scope (for functions)
 
     def get(self, name):
-        value = self.symbols.get(name, None)
-        if value == None and self.parent:
-            return self.parent.get(name)
-        return value
+        # Walk the scope chain with a loop: deep call chains would overflow recursion
+        table = self
+        while True:
+            if type(table) is FrameTable:
+                slot = table.layout.get(name)
+                value = None if slot is None else table.values[slot]
+            else:
+                value = table.symbols.get(name)
+            if value is not None or table.parent is None: return value
+            table = table.parent
+
+    def own(self, name):
+        """The value bound in this table itself (not its parents), or None"""
+        return self.symbols.get(name)
+
+    def names(self):
+        """Every name bound in this table or its parents"""
+        names = set()
+        table = self
+        while table is not None:
+            names.update(name for name, value in table.symbols.items() if value is not None)
+            table = table.parent
+        return names
 
     def set(self, name, value):
         self.symbols[name] = value
@@ -809,11 +1147,50 @@ class SymbolTable:
     def remove(self, name):
         del self.symbols[name]
 
+class FrameTable(SymbolTable):
+    """
+    Symbol table of one function call. The names its body binds have
+    fixed slots (scope_resolver.py), so their values live in a list and
+    resolved reads index it directly; lookups by name go through the
+    layout, then on to the parent scopes as in any SymbolTable.
+    """
+    __slots__ = ('layout', 'values', 'parent')
+
+    def __init__(self, layout, parent=None):
+        self.layout = layout
+        self.values = [None] * len(layout)
+        self.parent = parent
+
+    @property
+    def symbols(self):
+        return {name: self.values[slot] for name, slot in self.layout.items() if self.values[slot] is not None}
+
+    def own(self, name):
+        slot = self.layout.get(name)
+        return None if slot is None else self.values[slot]
+
+    def set(self, name, value):
+        self.values[self.layout[name]] = value
+
+    def remove(self, name):
+        self.values[self.layout[name]] = None
+
 #######################################
 # INTERPRETER & VALUE
 #######################################
 
-class Interpreter(VerboseInterpreterMixin):
+class Interpreter:
+    """
+    Tree-walking interpreter. Prints nothing; TracingInterpreter sets
+    tracing, which makes the visits call its trace_* hooks, so quiet runs
+    pay no formatting or I/O cost.
+    """
+    # Quiet runs of the tree engine use fast_interpreter.py, which computes
+    # on raw numbers (False: walk with this class)
+    fast_path = True
+    # Walks every node and prints it, so function bodies must not take shortcuts
+    tracing = False
+
     def visit(self, node, context):
         method_name = f'visit_{type(node).__name__}'
         method = getattr(self, method_name, self.no_visit_method)
@@ -827,33 +1204,19 @@ class Interpreter(VerboseInterpreterMixin):
     ###################################
 
     def visit_NumberNode(self, node, context):
-        self.print_step(f"Visit NumberNode: {node.tok.value}")
+        if self.tracing: self.trace_number(node)
         return RTResult().success(
             Number(node.tok.value).set_context(context).set_pos(node.pos_start, node.pos_end)
         )
 
     def visit_BinOpNode(self, node, context):
         res = RTResult()
-
-        # Get operation name and symbol
-        op_name, op_symbol = self.get_operation_info(node.op_tok.type)
-
-        self.print_step(f"{op_name} operation ({op_symbol}):")
-
-        # Visit left node
-        self.indent_level += 1
-        self.print_step("Evaluate left operand:")
-        self.indent_level += 1
+        if self.tracing: self.trace_bin_op(node)
         left = res.register(self.visit(node.left_node, context))
         if res.error: return res
-        self.indent_level -= 1
-
-        # Visit right node
-        self.print_step("Evaluate right operand:")
-        self.indent_level += 1
+        if self.tracing: self.trace_right_operand()
         right = res.register(self.visit(node.right_node, context))
         if res.error: return res
-        self.indent_level -= 1
 
         # Perform operation
         if node.op_tok.type == TT_PLUS:
@@ -867,43 +1230,32 @@ class Interpreter(VerboseInterpreterMixin):
 
         if error:
             return res.failure(error)
-        else:
-            self.print_step(f"Result: {left.value} {op_symbol} {right.value} = {result.value}")
-            self.indent_level -= 1
-            return res.success(result.set_pos(node.pos_start, node.pos_end))
+        if self.tracing: self.trace_bin_op_result(node, left, right, result)
+        return res.success(result.set_pos(node.pos_start, node.pos_end))
 
     def visit_UnaryOpNode(self, node, context):
         res = RTResult()
-
-        self.print_step(f"Unary operation ({node.op_tok.type}):")
-        self.indent_level += 1
-
+        if self.tracing: self.trace_unary_op(node)
         number = res.register(self.visit(node.node, context))
         if res.error: return res
 
         error = None
-
         if node.op_tok.type == TT_MINUS:
             number, error = number.multed_by(Number(-1))
-            self.print_step(f"Negate: -{number.value}")
-
-        self.indent_level -= 1
+        if self.tracing: self.trace_unary_op_result(node, number)
 
         if error:
             return res.failure(error)
-        else:
-            return res.success(number.set_pos(node.pos_start, node.pos_end))
+        return res.success(number.set_pos(node.pos_start, node.pos_end))
 
     def visit_ListOpNode(self, node, context):
         """
         Handle list operations: sum these numbers: [5, 3, 7]
-        Apply operation left-to-right: 5 + 3 + 7
+        Apply operation left-to-right: 5 + 3 + 7 (folded in one step by list_fold)
         """
+        from list_fold import fold_list
         res = RTResult()
-
-        op_name, op_symbol = self.get_operation_info(node.op_tok.type)
-        self.print_step(f"List {op_name} operation:")
-        self.indent_level += 1
+        if self.tracing: self.trace_list_op(node)
 
         if len(node.number_nodes) == 0:
             return res.failure(RTError(
@@ -912,31 +1264,13 @@ class Interpreter(VerboseInterpreterMixin):
                 context
             ))
 
-        # Start with first number
-        result = res.register(self.visit(node.number_nodes[0], context))
-        if res.error: return res
-
-        # Apply operation to remaining numbers
-        for i in range(1, len(node.number_nodes)):
-            next_num = res.register(self.visit(node.number_nodes[i], context))
-            if res.error: return res
-
-            # Perform operation
-            if node.op_tok.type == TT_PLUS:
-                result, error = result.added_to(next_num)
-            elif node.op_tok.type == TT_MINUS:
-                result, error = result.subbed_by(next_num)
-            elif node.op_tok.type == TT_MUL:
-                result, error = result.multed_by(next_num)
-            elif node.op_tok.type == TT_DIV:
-                result, error = result.dived_by(next_num)
+        value, zero_index = fold_list(node, node.op_tok.type, lambda: [number_node.tok.value for number_node in node.number_nodes])
+        if self.tracing: self.trace_list_op_result(node, value, zero_index)
+        if zero_index is not None:
+            zero_node = node.number_nodes[zero_index]
+            return res.failure(RTError(zero_node.pos_start, zero_node.pos_end, 'Division by zero', context))
 
-            if error:
-                return res.failure(error)
-
-        self.print_step(f"Final result: {result.value}")
-        self.indent_level -= 1
-        return res.success(result.set_pos(node.pos_start, node.pos_end))
+        return res.success(Number(value).set_context(context).set_pos(node.pos_start, node.pos_end))
 
     ###################################
     # New Statement & Function Visits
@@ -960,13 +1294,18 @@ class Interpreter(VerboseInterpreterMixin):
     def visit_VarAccessNode(self, node, context):
         res = RTResult()
         var_name = node.var_name_tok.value
-        value = context.symbol_table.get(var_name)
+        if node.slot is not None:
+            value = context.symbol_table.values[node.slot]
+        else:
+            value = context.symbol_table.get(var_name)
 
-        if not value:
+        if value is None:
             return res.failure(RTError(node.pos_start, node.pos_end, f"'{var_name}' is not defined", context))
         
-        value = value.copy().set_pos(node.pos_start, node.pos_end).set_context(context)
-        return res.success(value)
+        # Reads never share the stored Number: operations take the position and
+        # context of their errors from their operands
+        value = Number(value.value) if type(value) is Number else value.copy()
+        return res.success(value.set_pos(node.pos_start, node.pos_end).set_context(context))
 
     def visit_VarAssignNode(self, node, context):
         res = RTResult()
@@ -974,7 +1313,10 @@ class Interpreter(VerboseInterpreterMixin):
         value = res.register(self.visit(node.value_node, context))
         if res.error: return res
 
-        context.symbol_table.set(var_name, value)
+        if node.slot is not None:
+            context.symbol_table.values[node.slot] = value
+        else:
+            context.symbol_table.set(var_name, value)
         return res.success(value)
 
     def visit_FuncDefNode(self, node, context):
@@ -1001,11 +1343,64 @@ class Interpreter(VerboseInterpreterMixin):
 
         # Ensure value_to_call is actually a function before executing
         if isinstance(value_to_call, BaseFunction):
-            call_res = value_to_call.execute(args)
-            return res.success(call_res.value)
+            # Function bodies are walked by the same kind of interpreter (traced or not)
+            return_value = res.register(value_to_call.execute(args, interpreter_class=type(self)))
+            if res.error: return res
+            return res.success(return_value)
         
         return res.failure(RTError(node.pos_start, node.pos_end, "Identifier is not a function", context))
-    	
+
+class TracingInterpreter(VerboseInterpreterMixin, Interpreter):
+    """
+    Interpreter that prints every evaluation step (full trace mode). The walk
+    is Interpreter's; these hooks only print.
+    """
+    tracing = True
+
+    def trace_number(self, node):
+        self.print_step(f"Visit NumberNode: {node.tok.value}")
+
+    def trace_bin_op(self, node):
+        op_name, op_symbol = self.get_operation_info(node.op_tok.type)
+        self.print_step(f"{op_name} operation ({op_symbol}):")
+        self.indent_level += 1
+        self.print_step("Evaluate left operand:")
+        self.indent_level += 1
+
+    def trace_right_operand(self):
+        self.indent_level -= 1
+        self.print_step("Evaluate right operand:")
+        self.indent_level += 1
+
+    def trace_bin_op_result(self, node, left, right, result):
+        _, op_symbol = self.get_operation_info(node.op_tok.type)
+        self.indent_level -= 1
+        self.print_step(f"Result: {left.value} {op_symbol} {right.value} = {result.value}")
+        self.indent_level -= 1
+
+    def trace_unary_op(self, node):
+        self.print_step(f"Unary operation ({node.op_tok.type}):")
+        self.indent_level += 1
+
+    def trace_unary_op_result(self, node, number):
+        if node.op_tok.type == TT_MINUS:
+            self.print_step(f"Negate: -{number.value}")
+        self.indent_level -= 1
+
+    def trace_list_op(self, node):
+        op_name, _ = self.get_operation_info(node.op_tok.type)
+        self.print_step(f"List {op_name} operation:")
+        self.indent_level += 1
+
+    def trace_list_op_result(self, node, value, zero_index):
+        # The numbers are folded at once; show them as the values read, up to a zero divisor
+        read = node.number_nodes if zero_index is None else node.number_nodes[:zero_index + 1]
+        for number_node in read:
+            self.trace_number(number_node)
+        if zero_index is None:
+            self.print_step(f"Final result: {value}")
+            self.indent_level -= 1
+
 class BaseFunction(Number):
     def __init__(self, name):
         super().__init__(0)
@@ -1033,7 +1428,17 @@ class BaseFunction(Number):
             arg_value.set_context(exec_ctx)
             exec_ctx.symbol_table.set(arg_name.value, arg_value)
 
+    def call_depth_error(self):
+        # Walking the AST uses Python frames for every call, which run out
+        # long before MAX_CALL_DEPTH (the vm and iterative engines count calls)
+        return RTResult().failure(RTError(self.pos_start, self.pos_end, "Maximum call depth exceeded", self.context))
+
 class Function(BaseFunction):
+    # Run bodies through native_compiler when possible (False: always walk the AST)
+    use_native = True
+    # Remember results by argument values (function_memo.py) when the body allows it
+    memoize = True
+
     def __init__(self, name, body_node, arg_names):
         super().__init__(name)
         self.body_node = body_node
@@ -1047,13 +1452,54 @@ class Function(BaseFunction):
         return copy
     # -----------------------
 
-    def execute(self, args):
+    def generate_new_context(self):
+        # The body's names get list slots (scope_resolver.py) instead of a dict
+        from scope_resolver import scope_layout
+        new_context = Context(self.name, self.context, self.pos_start)
+        new_context.symbol_table = FrameTable(scope_layout(self.body_node, self.arg_names), self.context.symbol_table)
+        return new_context
+
+    def execute(self, args, interpreter_class=None):
         res = RTResult()
-        interpreter = Interpreter()
-        exec_ctx = self.generate_new_context()
 
         res.register(self.check_args(self.arg_names, args))
         if res.error: return res
+        plain_args = not any(isinstance(arg, BaseFunction) for arg in args)
+
+        # Calls made before with the same values return the remembered result (function_memo.py)
+        # (not when tracing: a remembered result would skip the body's steps)
+        memo = key = None
+        if self.memoize and plain_args and not getattr(interpreter_class, 'tracing', False):
+            from function_memo import function_memo
+            memo = function_memo(self.body_node, self.arg_names)
+            if memo is not None:
+                key = memo.key(self, args)
+                if key is not None:
+                    value = memo.lookup(self, key)
+                    if value is not None: return res.success(value)
+
+        try:
+            value = res.register(self.run_body(args, interpreter_class, plain_args))
+        except RecursionError:
+            return self.call_depth_error()
+        if res.error: return res
+        if key is not None: memo.store(key, value)
+        return res.success(value)
+
+    def run_body(self, args, interpreter_class, plain_args):
+        res = RTResult()
+
+        # Fast path: run the body as a compiled Python function (native_compiler.py)
+        if self.use_native and plain_args and not getattr(interpreter_class, 'tracing', False):
+            from native_compiler import native_body
+            native = native_body(self.body_node, self.arg_names)
+            if native is not None:
+                value, error = native.call(self, args)
+                if error: return res.failure(error)
+                if value is not None: return res.success(value)
+
+        interpreter = (interpreter_class or Interpreter)()
+        exec_ctx = self.generate_new_context()
 
         self.populate_args(self.arg_names, args, exec_ctx)
 
@@ -1061,11 +1507,107 @@ class Function(BaseFunction):
         if res.error: return res
         return res.success(value)
 
+    def cache_info(self):
+        """Hits, misses and size of the body's memo (function_memo.py), or None"""
+        from function_memo import function_memo
+        memo = function_memo(self.body_node, self.arg_names)
+        return memo.info() if memo is not None else None
+
 #######################################
 # RUN
 #######################################
 
-def run(fn, text, symbol_table):
+def execute(node, context, engine='tree', trace=False):
+    """
+    Evaluate an AST with the chosen execution engine.
+
+    Engines:
+        tree:      walk the AST: quietly on raw numbers (FastInterpreter,
+                   fast_interpreter.py; the Interpreter if Interpreter.fast_path
+                   is False), or with TracingInterpreter, printing each
+                   evaluation step, if trace is set
+        vm:        compile to bytecode and run it on the stack VM (bytecode_vm.py)
+        iterative: walk the AST with an explicit stack, for programs too deep
+                   for Python recursion (iterative_interpreter.py)
+
+    Only the tree engine can trace; the others always run quietly. A FlatAST
+    (Parser(flat=True)) runs on the tree engine only, through the
+    FlatInterpreter, and is not traced either.
+    """
+    from flat_ast import FlatAST, run_flat
+    if isinstance(node, FlatAST):
+        if engine != 'tree':
+            raise ValueError(f"Engine '{engine}' cannot run a flat AST")
+        return run_flat(node, context)
+    elif engine == 'tree':
+        if trace:
+            return TracingInterpreter().visit(node, context)
+        if Interpreter.fast_path:
+            from fast_interpreter import run_fast
+            return run_fast(node, context)
+        return Interpreter().visit(node, context)
+    elif engine == 'vm':
+        from bytecode_vm import run_bytecode
+        return run_bytecode(node, context)
+    elif engine == 'iterative':
+        from iterative_interpreter import run_iterative
+        return run_iterative(node, context)
+    raise ValueError(f"Unknown engine '{engine}'")
+
+def compile_program(fn, text, symbol_table, optimize=False, cache=None, flat=False, quiet=False):
+    """
+    Lex and parse a program (steps 1 and 2 of run), resolving operator
+    words against the names bound in symbol_table. Resolutions are printed
+    unless quiet is set.
+
+    Returns (tokens, node, error); the other arguments are those of run.
+    """
+    compiled = None
+    if cache is not None:
+        cache_key = cache.key(fn, text, symbol_table, optimize, flat)
+        compiled = cache.load(cache_key)
+    if compiled is not None:
+        return compiled[0], compiled[1], None
+
+    # 1. Generate Tokens (fast_lexer.py produces the same tokens as Lexer)
+    from fast_lexer import FastLexer
+    prefetcher = None
+    if Parser.speculative_prefetch:
+        # Operation words go to the LLM now, to be answered while we lex and parse
+        from word_prefetch import WordPrefetcher
+        prefetcher = WordPrefetcher(symbol_table)
+        prefetcher.start(text)
+    lexer = FastLexer(fn, text)
+    tokens, error = lexer.make_tokens()
+    if error: return None, None, error
+
+    # 2. Generate AST
+    try:
+        ast = Parser(tokens, symbol_table=symbol_table, flat=flat, prefetcher=prefetcher, quiet=quiet).parse()
+    except RecursionError:
+        # Expressions are parsed without recursion, but nested function definitions are not
+        return None, None, InvalidSyntaxError(tokens[0].pos_start, tokens[-1].pos_end, "Program nested too deeply")
+    if ast.error: return None, None, ast.error
+    node = ast.node
+
+    if optimize:
+        from optimizer import fold_constants
+        try:
+            node = fold_constants(node)
+        except RecursionError:
+            pass  # too deep to fold: run the program as parsed
+
+    if cache is not None:
+        cache.store(cache_key, tokens, node)
+    return tokens, node, None
+
+# Output modes of run():
+#   quiet:   print nothing
+#   summary: print operator resolutions, the tokens and the AST, then run quietly
+#   full:    also print every evaluation step
+OUTPUT_MODES = ('quiet', 'summary', 'full')
+
+def run(fn, text, symbol_table, engine='tree', optimize=False, cache=None, mode='quiet', flat=False):
     """
     Execute the interpreter pipeline.
     
@@ -1073,26 +1615,32 @@ def run(fn, text, symbol_table):
         fn: Filename (usually '<stdin>')
         text: Input text to process
         symbol_table: The global memory for variables
+        engine: Execution engine, 'tree', 'vm' or 'iterative' (see execute)
+        optimize: Fold constant subtrees before execution (optimizer.py)
+        cache: A ProgramCache (program_cache.py); a previously compiled
+            program is loaded from it instead of being lexed and parsed again
+        mode: Output mode, one of OUTPUT_MODES (default 'quiet')
+        flat: Parse into a FlatAST (flat_ast.py) instead of node objects, for
+            very large programs; runs on the tree engine, without optimize
     """
-    # 1. Generate Tokens
-    lexer = Lexer(fn, text)
-    tokens, error = lexer.make_tokens()
-    if error: return None, error
+    if mode not in OUTPUT_MODES:
+        raise ValueError(f"Unknown output mode '{mode}'")
+    if flat and optimize:
+        raise ValueError("Constant folding needs the object AST (flat=False)")
 
-    # 2. Generate AST
-    parser = Parser(tokens)
-    ast = parser.parse()
-    if ast.error: return None, ast.error
+    tokens, node, error = compile_program(fn, text, symbol_table, optimize, cache, flat, quiet=mode == 'quiet')
+    if error: return None, error
 
     # Print verbose output showing tokens and AST
-    print_verbose_execution(fn, text, tokens, ast.node, None, None)
+    if mode != 'quiet':
+        print_verbose_execution(fn, text, tokens, node, None, None, trace=mode == 'full')
+    tokens = None  # not needed to execute; frees large programs' tokens
 
     # 3. Run Interpreter
-    interpreter = Interpreter()
     context = Context('<program>')
     context.symbol_table = symbol_table  # Set the persistent memory
     
-    result = interpreter.visit(ast.node, context)
+    result = execute(node, context, engine, trace=mode == 'full')
 
     # 4. Return Result
     if result.error:
@@ -0,0 +1,323 @@
+#######################################
+# BATCH EVALUATION
+# Compile a program once, then evaluate it
+# for every row of a set of input columns
+#######################################
+
+from basic import (
+    ListNode, VarAccessNode, VarAssignNode, FuncDefNode, CallNode,
+    BinOpNode, UnaryOpNode, Number, Context, SymbolTable, RTError,
+    compile_program, execute,
+    TT_PLUS, TT_MINUS, TT_MUL, TT_DIV,
+)
+from list_fold import fold_list, EXACT_INT
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional: rows are then run one by one
+    np = None
+
+# int64 columns hold results below this; beyond it Python ints are used
+INT64_LIMIT = 2 ** 63
+
+
+def compile_batch(text, input_names, symbol_table=None, fn='<batch>', optimize=False, cache=None):
+    """
+    Compile a program to evaluate over columns of inputs.
+
+    Args:
+        text: The program, e.g. "create total as price * qty add tax"
+        input_names: Variables that get a value per row
+        symbol_table: Names shared by every row (constants, functions)
+        fn, optimize, cache: As for basic.run
+
+    Returns (BatchProgram, error).
+    """
+    names = SymbolTable(symbol_table)
+    for name in input_names:
+        names.set(name, Number(0))  # bound: never resolved as operator words
+
+    _, node, error = compile_program(fn, text, names, optimize, cache)
+    if error: return None, error
+    return BatchProgram(node, list(input_names), symbol_table), None
+
+
+class BatchProgram:
+    """
+    A compiled program and the names of its inputs. evaluate() runs it
+    once per row, with the same values and errors as basic.run would give
+    for each row on its own.
+
+    Programs made of arithmetic, list operations and variables run column
+    at a time with NumPy; programs that define or call functions (or any
+    program, without NumPy) run row by row on the tree interpreter.
+    """
+    def __init__(self, node, input_names, symbol_table=None):
+        self.node = node
+        self.input_names = input_names
+        self.symbol_table = symbol_table
+        self.vectorized = np is not None and can_vectorize(node, symbol_table)
+
+    def evaluate(self, columns):
+        """
+        columns maps every input name to its values (a list or array, one
+        value per row).
+
+        Returns (values, errors): the program's result for each row (an
+        ndarray, or a list without NumPy), and a dict from the index of
+        each failed row to its error. Failed rows hold nan in float arrays
+        and None otherwise.
+        """
+        for name in self.input_names:
+            if name not in columns:
+                raise ValueError(f"No column for input '{name}'")
+        sizes = {len(columns[name]) for name in self.input_names}
+        if len(sizes) > 1:
+            raise ValueError("Input columns have different lengths")
+        size = sizes.pop() if sizes else 1
+
+        if self.vectorized:
+            return ColumnInterpreter(size, self.symbol_table).run(self, columns)
+        return self.evaluate_rows(columns, size)
+
+    def evaluate_rows(self, columns, size):
+        values = []
+        errors = {}
+        for row in range(size):
+            context = Context('<program>')
+            context.symbol_table = SymbolTable(self.symbol_table)
+            for name in self.input_names:
+                context.symbol_table.set(name, Number(python_number(columns[name][row])))
+
+            result = execute(self.node, context)
+            if result.error:
+                errors[row] = result.error
+                values.append(0)
+            else:
+                values.append(result.value.value)
+
+        if np is None:
+            for row in errors: values[row] = None
+            return values, errors
+
+        failed = np.zeros(size, dtype=bool)
+        failed[list(errors)] = True
+        return mark_failed(np.array(values), failed), errors
+
+
+def can_vectorize(node, symbol_table):
+    """True if the program only does arithmetic on numbers"""
+    nodes = [node]
+    while nodes:
+        node = nodes.pop()
+        if isinstance(node, (FuncDefNode, CallNode)):
+            return False
+        if isinstance(node, ListNode):
+            nodes.extend(node.element_nodes)
+        elif isinstance(node, BinOpNode):
+            nodes.extend((node.left_node, node.right_node))
+        elif isinstance(node, UnaryOpNode):
+            nodes.append(node.node)
+        elif isinstance(node, VarAssignNode):
+            nodes.append(node.value_node)
+        elif isinstance(node, VarAccessNode) and symbol_table is not None:
+            value = symbol_table.get(node.var_name_tok.value)
+            if value is not None and type(value) is not Number:
+                return False
+    return True
+
+
+def python_number(value):
+    return value.item() if np is not None and isinstance(value, np.generic) else value
+
+
+#######################################
+# COLUMN INTERPRETER
+#######################################
+
+class ColumnInterpreter:
+    """
+    Walks the AST once for all rows. A value is either a column (ndarray,
+    one entry per row) or a Python number shared by every row.
+
+    Arithmetic follows Python's rules, not NumPy's: integer columns stay
+    int64 only while a result cannot overflow, and become arrays of Python
+    ints when it could. A row that fails keeps its first error and its
+    later results are ignored, as if its run had stopped there.
+    """
+    def __init__(self, size, symbol_table=None):
+        self.size = size
+        self.failed = np.zeros(size, dtype=bool)
+        self.errors = {}
+        self.context = Context('<program>')
+        self.context.symbol_table = SymbolTable(symbol_table)
+        self.variables = {}
+
+    def run(self, program, columns):
+        for name in program.input_names:
+            self.variables[name] = input_column(name, columns[name])
+
+        value = column_of(self.visit(program.node), self.size)
+        return mark_failed(value, self.failed), self.errors
+
+    def fail(self, error, rows=None):
+        """Record error for rows (a mask; None for all) that have not failed yet"""
+        new = ~self.failed if rows is None else rows & ~self.failed
+        for row in np.flatnonzero(new):
+            self.errors[int(row)] = error
+        self.failed |= new
+
+    def visit(self, node):
+        method_name = f'visit_{type(node).__name__}'
+        method = getattr(self, method_name)
+        return method(node)
+
+    def visit_ListNode(self, node):
+        value = 0
+        for element_node in node.element_nodes:
+            value = self.visit(element_node)
+        return value
+
+    def visit_NumberNode(self, node):
+        return node.tok.value
+
+    def visit_BinOpNode(self, node):
+        left = self.visit(node.left_node)
+        right = self.visit(node.right_node)
+        return self.apply(node.op_tok.type, left, right, node.right_node)
+
+    def visit_UnaryOpNode(self, node):
+        value = self.visit(node.node)
+        if node.op_tok.type == TT_MINUS:
+            value = self.apply(TT_MUL, value, -1, None)
+        return value
+
+    def visit_ListOpNode(self, node):
+        if len(node.number_nodes) == 0:
+            self.fail(RTError(node.pos_start, node.pos_end, "Cannot perform operation on empty list", self.context))
+            return 0
+
+        value, zero_index = fold_list(node, node.op_tok.type, lambda: [number_node.tok.value for number_node in node.number_nodes])
+        if zero_index is not None:
+            zero_node = node.number_nodes[zero_index]
+            self.fail(RTError(zero_node.pos_start, zero_node.pos_end, 'Division by zero', self.context))
+            return 0
+        return value
+
+    def visit_VarAccessNode(self, node):
+        var_name = node.var_name_tok.value
+        if var_name in self.variables:
+            return self.variables[var_name]
+
+        value = self.context.symbol_table.get(var_name)
+        if value is None:
+            self.fail(RTError(node.pos_start, node.pos_end, f"'{var_name}' is not defined", self.context))
+            return 0
+        return value.value
+
+    def visit_VarAssignNode(self, node):
+        value = self.visit(node.value_node)
+        self.variables[node.var_name_tok.value] = value
+        return value
+
+    def apply(self, op_type, left, right, right_node):
+        if op_type == TT_DIV:
+            zero = right == 0
+            if isinstance(zero, np.ndarray):
+                zero = zero.astype(bool)
+                if zero.any():
+                    self.fail(RTError(right_node.pos_start, right_node.pos_end, 'Division by zero', self.context), zero)
+                    right = np.where(zero, 1, right)
+            elif zero:
+                self.fail(RTError(right_node.pos_start, right_node.pos_end, 'Division by zero', self.context))
+                right = 1
+
+        left, right = exact_operands(op_type, left, right)
+        with np.errstate(all='ignore'):   # float overflow gives inf, as in Python
+            if op_type == TT_PLUS: return left + right
+            if op_type == TT_MINUS: return left - right
+            if op_type == TT_MUL: return left * right
+            return left / right
+
+
+def exact_operands(op_type, left, right):
+    """
+    The operands converted so that NumPy computes op_type with Python's
+    results: arrays of Python numbers when int64 could overflow or an
+    int-by-int division could round differently, floats for huge ints.
+    """
+    if not isinstance(left, np.ndarray) and not isinstance(right, np.ndarray):
+        return left, right   # plain Python numbers
+    if is_object(left) or is_object(right):
+        return as_object(left), as_object(right)
+
+    if is_int(left) and is_int(right):
+        left_size, right_size = magnitude(left), magnitude(right)
+        if op_type == TT_DIV:
+            exact = left_size <= EXACT_INT and right_size <= EXACT_INT
+        elif op_type == TT_MUL:
+            exact = left_size * right_size < INT64_LIMIT
+        else:
+            exact = left_size + right_size < INT64_LIMIT
+        if not exact:
+            return as_object(left), as_object(right)
+    elif isinstance(left, int) and magnitude(left) >= INT64_LIMIT:
+        left = float(left)    # OverflowError beyond float range, like Python
+    elif isinstance(right, int) and magnitude(right) >= INT64_LIMIT:
+        right = float(right)
+    return left, right
+
+
+def is_int(value):
+    if isinstance(value, np.ndarray): return value.dtype.kind == 'i'
+    return isinstance(value, int)
+
+
+def is_object(value):
+    return isinstance(value, np.ndarray) and value.dtype.kind == 'O'
+
+
+def as_object(value):
+    return value.astype(object) if isinstance(value, np.ndarray) else value
+
+
+def magnitude(value):
+    """Largest absolute value, as a Python int"""
+    if not isinstance(value, np.ndarray): return abs(value)
+    if value.size == 0: return 0
+    return max(-int(value.min()), int(value.max()))
+
+
+def input_column(name, values):
+    """An input as a float64, int64 or object (Python numbers) column"""
+    column = np.asarray(values)
+    kind = column.dtype.kind
+    if kind == 'f':
+        return column.astype(np.float64, copy=False)
+    if kind in 'iub':
+        if kind == 'u' and column.size and column.max() >= INT64_LIMIT:
+            return column.astype(object)
+        return column.astype(np.int64, copy=False)
+    if kind == 'O':
+        return column
+    raise ValueError(f"Column '{name}' is not numeric")
+
+
+def column_of(value, size):
+    """A result as a column of size rows"""
+    if isinstance(value, np.ndarray): return value
+    if isinstance(value, float): return np.full(size, value, dtype=np.float64)
+    if -INT64_LIMIT <= value < INT64_LIMIT: return np.full(size, value, dtype=np.int64)
+    return np.full(size, value, dtype=object)
+
+
+def mark_failed(values, failed):
+    """Put nan (None unless the values are floats) in the failed rows"""
+    if not failed.any(): return values
+    if values.dtype.kind == 'f':
+        values = values.copy()
+        values[failed] = np.nan
+    else:
+        values = values.astype(object)
+        values[failed] = None
+    return values
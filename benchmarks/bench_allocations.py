@@ -0,0 +1,121 @@
+"""
+Interpreter allocation benchmark.
+
+Runs two generated programs, one of variable arithmetic and one of
+function calls, on the quiet tree engine: with the Interpreter, which
+returns a Number in an RTResult from every node, and with the
+FastInterpreter (fast_interpreter.py), which computes on raw numbers.
+Reports the Number and RTResult objects created per evaluated node, and
+the time. Function bodies are walked (no native code, no memo) so that
+every node is interpreted.
+
+Usage:
+    python benchmarks/bench_allocations.py [statements] [repeats]
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import basic
+from bench_engines import parse
+
+
+def variables_program(statements):
+    lines = ["create a as 3", "create b as 4.5", "create c as 1"]
+    for i in range(statements):
+        lines.append(f"create c as (a * {i % 7 + 1} + b) / (c + 2) - -a")
+    return '\n'.join(lines)
+
+
+def calls_program(statements):
+    lines = [
+        "create base as 3",
+        "create f taking x y do",
+        "create t as x * y + base",
+        "t / y - x * 2",
+        "end",
+    ]
+    lines += [f"find f {i % 97 + 1} {i % 13 + 1}" for i in range(statements)]
+    return '\n'.join(lines)
+
+
+class Counter:
+    """Counts calls of a class's __init__ while installed"""
+    def __init__(self, cls):
+        self.cls = cls
+        self.count = 0
+        self.original = cls.__init__
+
+    def __enter__(self):
+        original = self.original
+        def counting_init(obj, *args, **kwargs):
+            self.count += 1
+            original(obj, *args, **kwargs)
+        self.cls.__init__ = counting_init
+        return self
+
+    def __exit__(self, *exc):
+        self.cls.__init__ = self.original
+
+
+def run(node, fast):
+    basic.Interpreter.fast_path = fast
+    context = basic.Context('<program>')
+    context.symbol_table = basic.SymbolTable()
+    result = basic.execute(node, context)
+    if result.error: raise SystemExit(result.error.as_string())
+    return result.value
+
+
+def count_nodes(node):
+    """Nodes the Interpreter evaluates for this program (its visit calls)"""
+    basic.Interpreter.fast_path = False
+    visit = basic.Interpreter.visit
+    visits = [0]
+    def counting_visit(self, node, context):
+        visits[0] += 1
+        return visit(self, node, context)
+    basic.Interpreter.visit = counting_visit
+    try:
+        run(node, False)
+    finally:
+        basic.Interpreter.visit = visit
+    return visits[0]
+
+
+def measure(label, node, nodes, fast, repeats):
+    with Counter(basic.Number) as numbers, Counter(basic.RTResult) as results:
+        value = run(node, fast)
+
+    best = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        run(node, fast)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    print(f"  {label:<12} {numbers.count / nodes:5.2f} Numbers/node   {results.count / nodes:5.2f} RTResults/node"
+          f"   {best * 1000:8.1f} ms   result={value}")
+    return best
+
+
+def main():
+    statements = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    basic.Function.use_native = False
+    basic.Function.memoize = False
+
+    for name, make_program in (('variables', variables_program), ('calls', calls_program)):
+        node = parse(make_program(statements))
+        nodes = count_nodes(node)
+        print(f"{name}: {statements} statements, {nodes} nodes evaluated, best of {repeats}")
+        slow = measure('Interpreter', node, nodes, False, repeats)
+        fast = measure('fast path', node, nodes, True, repeats)
+        print(f"  speedup x{slow / fast:.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+"""
+Batch evaluation benchmark.
+
+Evaluates one formula over generated input columns with batch.py, column
+at a time (NumPy) and row by row, and estimates what calling basic.run
+once per row would cost. Operation words are resolved with the offline
+lexicon only.
+
+Usage:
+    python benchmarks/bench_batch.py [rows]
+"""
+
+import io
+import os
+import sys
+import time
+from contextlib import redirect_stdout
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import numpy as np
+
+import basic
+from basic import SymbolTable, Number
+from batch import compile_batch
+
+PROGRAM = "create total as price * qty add tax\ntotal / qty"
+
+# Rows actually run by the slower methods; their time is scaled up
+SAMPLE = 2000
+
+
+def make_columns(rows):
+    rng = np.random.default_rng(0)
+    return {
+        'price': rng.uniform(1, 100, rows),
+        'qty': rng.integers(0, 10, rows),   # zeros make some rows fail
+        'tax': rng.uniform(0, 5, rows),
+    }
+
+
+def run_per_row(columns, rows):
+    for row in range(rows):
+        symbol_table = SymbolTable()
+        for name, column in columns.items():
+            symbol_table.set(name, Number(column[row].item()))
+        basic.run('<bench>', PROGRAM, symbol_table)
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    columns = make_columns(rows)
+    sample = {name: column[:SAMPLE] for name, column in columns.items()}
+
+    with redirect_stdout(io.StringIO()):
+        program, error = compile_batch(PROGRAM, list(columns))
+    if error: raise SystemExit(error.as_string())
+
+    print(f"{rows} rows: {PROGRAM!r}")
+
+    start = time.perf_counter()
+    values, errors = program.evaluate(columns)
+    columns_time = time.perf_counter() - start
+    print(f"  columns    {columns_time * 1000:10.1f} ms   {len(errors)} failed rows")
+
+    program.vectorized = False
+    start = time.perf_counter()
+    row_values, row_errors = program.evaluate(sample)
+    rows_time = (time.perf_counter() - start) * rows / SAMPLE
+    print(f"  rows       {rows_time * 1000:10.1f} ms   (estimated from {SAMPLE} rows)   x{rows_time / columns_time:7.1f}")
+
+    with redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        run_per_row(sample, SAMPLE)
+        run_time = (time.perf_counter() - start) * rows / SAMPLE
+    print(f"  basic.run  {run_time * 1000:10.1f} ms   (estimated from {SAMPLE} rows)   x{run_time / columns_time:7.1f}")
+
+    if not np.array_equal(values[:SAMPLE], row_values, equal_nan=True) or \
+            set(row_errors) != {row for row in errors if row < SAMPLE}:
+        raise SystemExit("Column and row results differ")
+
+
+if __name__ == '__main__':
+    main()
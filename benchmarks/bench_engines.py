@@ -0,0 +1,93 @@
+"""
+Execution engine benchmark.
+
+Parses a function-heavy LinguaFlow program once, then times each execution
+engine on the same AST. The tree engine is timed four times: printing every
+step (--trace; the output is discarded), walking function bodies quietly,
+running them as compiled Python (native_compiler.py), and also remembering
+results of repeated calls (function_memo.py; both are the default). The
+other engines are timed without the memo.
+
+The calls cycle through `distinct` different argument pairs (by default
+every call has its own, up to 1261 pairs).
+
+Usage:
+    python benchmarks/bench_engines.py [calls] [repeats] [distinct]
+"""
+
+import io
+import os
+import sys
+import time
+from contextlib import redirect_stdout
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import basic
+from function_memo import clear_memos
+
+# (label, engine, Function.use_native, Function.memoize, trace)
+ENGINES = [
+    ('tree-trace', 'tree', False, False, True),
+    ('tree-walk', 'tree', False, False, False),
+    ('tree', 'tree', True, False, False),
+    ('tree-memo', 'tree', True, True, False),
+    ('vm', 'vm', True, False, False),
+    ('iterative', 'iterative', True, False, False),
+]
+
+
+def make_program(calls, distinct=None):
+    lines = [
+        "create base as 3",
+        "create f taking a b do",
+        "create t as a * b + base",
+        "t / b - a * 2 + (a - b) * (a + b)",
+        "end",
+    ]
+    pairs = [(i % 97 + 1, i % 13 + 1) for i in range(distinct or calls)]
+    lines += ["find f %d %d" % pairs[i % len(pairs)] for i in range(calls)]
+    return '\n'.join(lines)
+
+
+def parse(text):
+    tokens, error = basic.Lexer('<bench>', text).make_tokens()
+    if error: raise SystemExit(error.as_string())
+    ast = basic.Parser(tokens, use_llm=False).parse()
+    if ast.error: raise SystemExit(ast.error.as_string())
+    return ast.node
+
+
+def time_engine(node, engine, use_native, memoize, trace, repeats):
+    basic.Function.use_native = use_native
+    basic.Function.memoize = memoize
+    best = None
+    for _ in range(repeats):
+        clear_memos(node)
+        context = basic.Context('<program>')
+        context.symbol_table = basic.SymbolTable()
+        start = time.perf_counter()
+        with redirect_stdout(io.StringIO()):
+            result = basic.execute(node, context, engine, trace=trace)
+        elapsed = time.perf_counter() - start
+        if result.error: raise SystemExit(result.error.as_string())
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result.value
+
+
+def main():
+    calls = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    distinct = int(sys.argv[3]) if len(sys.argv) > 3 else None
+    node = parse(make_program(calls, distinct))
+
+    print(f"{calls} function calls ({distinct or 'all'} distinct), best of {repeats}")
+    baseline = None
+    for label, engine, use_native, memoize, trace in ENGINES:
+        elapsed, value = time_engine(node, engine, use_native, memoize, trace, repeats)
+        baseline = baseline or elapsed
+        print(f"  {label:<10} {elapsed * 1000:9.1f} ms   x{baseline / elapsed:6.1f}   result={value}")
+
+
+if __name__ == '__main__':
+    main()
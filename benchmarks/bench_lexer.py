@@ -0,0 +1,85 @@
+"""
+Lexer throughput benchmark.
+
+Generates a LinguaFlow program of the requested size (or reads a .lf file)
+and times the character-by-character Lexer against the regex-based
+FastLexer (fast_lexer.py). Reports megabytes of source per second and
+checks that both produce the same tokens.
+
+Usage:
+    python benchmarks/bench_lexer.py [megabytes] [repeats]
+    python benchmarks/bench_lexer.py path/to/script.lf [repeats]
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import basic
+from fast_lexer import FastLexer
+
+# (label, lexer class)
+LEXERS = [
+    ('Lexer', basic.Lexer),
+    ('FastLexer', FastLexer),
+]
+
+
+def make_program(megabytes):
+    block = '\n'.join([
+        "create base as 3",
+        "create f taking a b do",
+        "create t as a * b + base",
+        "t / b - a * 2 + (a - b) * (a + b)",
+        "end",
+        "sum these numbers: [1, 2.5, 3, 4.25]",
+        "product of 4 and 2.5",
+        "10 add 5 times 2; find f 12 7",
+        "",
+    ])
+    return block * max(1, int(megabytes * 1024 * 1024 / len(block)))
+
+
+def time_lexer(lexer_class, text, repeats):
+    best = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        tokens, error = lexer_class('<bench>', text).make_tokens()
+        elapsed = time.perf_counter() - start
+        if error: raise SystemExit(error.as_string())
+        best = elapsed if best is None else min(best, elapsed)
+    return best, tokens
+
+
+def main():
+    source = sys.argv[1] if len(sys.argv) > 1 else '2'
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+
+    if source.endswith('.lf'):
+        with open(source, 'r', encoding='utf-8') as f:
+            text = f.read()
+    else:
+        text = make_program(float(source))
+
+    megabytes = len(text.encode('utf-8')) / (1024 * 1024)
+    print(f"{megabytes:.2f} MB of source, best of {repeats}")
+
+    baseline = None
+    reference = None
+    for label, lexer_class in LEXERS:
+        elapsed, tokens = time_lexer(lexer_class, text, repeats)
+        baseline = baseline or elapsed
+        print(f"  {label:<10} {elapsed * 1000:9.1f} ms   {megabytes / elapsed:7.2f} MB/s"
+              f"   x{baseline / elapsed:5.1f}   {len(tokens)} tokens")
+
+        summary = [(tok.type, tok.value, tok.start, tok.end) for tok in tokens]
+        if reference is None:
+            reference = summary
+        elif summary != reference:
+            raise SystemExit(f"{label} produced different tokens")
+
+
+if __name__ == '__main__':
+    main()
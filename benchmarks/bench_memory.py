@@ -0,0 +1,82 @@
+"""
+Memory benchmark.
+
+Lexes, parses and runs a generated LinguaFlow program (or a .lf file) under
+tracemalloc and reports, for each stage, the peak traced memory and the
+number of live allocations per token. Parsing and running are measured for
+both the object AST and the flat AST (flat_ast.py). Operation words are
+resolved with the offline lexicon only.
+
+Usage:
+    python benchmarks/bench_memory.py [megabytes]
+    python benchmarks/bench_memory.py path/to/script.lf
+"""
+
+import io
+import os
+import sys
+import tracemalloc
+from contextlib import redirect_stdout
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import basic
+from fast_lexer import FastLexer
+from bench_lexer import make_program
+
+
+def measure(label, step, token_count=None):
+    """Run step() under tracemalloc; returns its result"""
+    tracemalloc.start()
+    try:
+        result = step()
+        current, peak = tracemalloc.get_traced_memory()
+        blocks = sum(stat.count for stat in tracemalloc.take_snapshot().statistics('filename'))
+    finally:
+        tracemalloc.stop()
+
+    count = token_count or len(result)
+    print(f"  {label:<10} peak {peak / 2 ** 20:8.1f} MB   kept {current / 2 ** 20:8.1f} MB"
+          f"   {current / count:6.1f} B/token   {blocks / count:5.2f} objects/token")
+    return result
+
+
+def main():
+    source = sys.argv[1] if len(sys.argv) > 1 else '1'
+    if source.endswith('.lf'):
+        with open(source, 'r', encoding='utf-8') as f:
+            text = f.read()
+    else:
+        text = make_program(float(source))
+
+    print(f"{len(text.encode('utf-8')) / 2 ** 20:.2f} MB of source")
+
+    def lex():
+        tokens, error = FastLexer('<bench>', text).make_tokens()
+        if error: raise SystemExit(error.as_string())
+        return tokens
+
+    tokens = measure('lex', lex)
+
+    for label, flat in (('', False), (' flat', True)):
+        def parse():
+            with redirect_stdout(io.StringIO()):
+                ast = basic.Parser(tokens, use_llm=False, flat=flat).parse()
+            if ast.error: raise SystemExit(ast.error.as_string())
+            return ast.node
+
+        node = measure('parse' + label, parse, len(tokens))
+
+        def run():
+            context = basic.Context('<program>')
+            context.symbol_table = basic.SymbolTable()
+            result = basic.execute(node, context, 'tree')
+            if result.error: raise SystemExit(result.error.as_string())
+            return result
+
+        measure('run' + label, run, len(tokens))
+        node = None
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+"""
+Speculative word prefetch benchmark.
+
+Runs generated scripts whose operation words (unknown to the lexicon) are
+spread through the file, against the local stand-in LLM server
+(local_llm_server.py) with a fixed latency. Compares the wall time of
+basic.run when the parser asks for the words itself, after lexing, with
+the time when a WordPrefetcher (word_prefetch.py) sends them before lexing
+starts. Each run uses a fresh controller, so nothing is answered from
+memory.
+
+Usage:
+    python benchmarks/bench_prefetch.py [latency] [repeats]
+"""
+
+import io
+import os
+import sys
+import time
+from contextlib import redirect_stdout
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import basic
+import gemini_controller
+from local_llm_server import start_server
+from resolver_backends import HttpBackend, TableBackend
+
+WORDS = ['zqadd', 'zqsub', 'zqmul', 'zqdiv']
+SIZES = [10, 1000, 5000]
+
+
+def make_program(lines):
+    """lines statements; the words appear at 20%, 40%, 60% and 80% of the file"""
+    program = ["create v0 as 1"]
+    marks = {lines * (k + 1) // 5: word for k, word in enumerate(WORDS)}
+    for i in range(1, lines):
+        if i in marks:
+            program.append(f"create v{i} as v{i - 1} {marks[i]} 2")
+        else:
+            program.append(f"create v{i} as (v{i - 1} * 3 + {i}) / 2 - {i % 7}")
+    return '\n'.join(program)
+
+
+def timed_run(url, text, prefetch):
+    basic.Parser.speculative_prefetch = prefetch
+    controller = gemini_controller.GeminiController(backend=HttpBackend(url))
+    with patch.object(gemini_controller, '_gemini_instance', controller), redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        result, error = basic.run('<bench>', text, basic.SymbolTable())
+        elapsed = time.perf_counter() - start
+    if error: raise SystemExit(error.as_string())
+    return elapsed, controller.metrics()['requests']
+
+
+def main():
+    latency = float(sys.argv[1]) if len(sys.argv) > 1 else 0.3
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    server = start_server(latency=latency, jitter=0, backend=TableBackend(dict(zip(WORDS, '+-*/'))))
+    print(f"resolver latency {latency * 1000:.0f} ms, best of {repeats}")
+
+    try:
+        for lines in SIZES:
+            text = make_program(lines)
+            times = {}
+            for prefetch in (False, True):
+                runs = [timed_run(server.url, text, prefetch) for _ in range(repeats)]
+                times[prefetch] = min(elapsed for elapsed, _ in runs)
+                requests = runs[0][1]
+            print(f"  {lines:>5} lines   after lexing {times[False] * 1000:7.1f} ms"
+                  f"   prefetched {times[True] * 1000:7.1f} ms   ({requests} request)"
+                  f"   saved {(times[False] - times[True]) * 1000:6.1f} ms")
+    finally:
+        basic.Parser.speculative_prefetch = True
+        server.shutdown()
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
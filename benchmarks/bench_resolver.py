@@ -0,0 +1,91 @@
+"""
+End-to-end throughput under resolver latency, offline.
+
+Starts the local stand-in LLM server (local_llm_server.py) with a given
+latency, then runs programs that each use an operation word unknown to the
+lexicon, from several threads at once, through basic.run and the blocking
+GeminiController (with an HttpBackend and no caches). Reports programs per
+second and the requests the server received, for each thread count.
+
+Usage:
+    python benchmarks/bench_resolver.py [programs] [latency] [max_concurrency]
+"""
+
+import io
+import os
+import sys
+import threading
+import time
+from contextlib import redirect_stdout
+from unittest.mock import patch
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+import basic
+import gemini_controller
+from local_llm_server import start_server
+from resolver_backends import HttpBackend, TableBackend
+
+THREADS = [1, 4, 16]
+
+
+def word(i):
+    """A distinct operation word the lexicon does not know"""
+    letters = ''
+    i += 26 * 26
+    while i:
+        i, rest = divmod(i, 26)
+        letters += chr(ord('a') + rest)
+    return 'zq' + letters
+
+
+def run_programs(controller, programs, threads):
+    errors = []
+    queue = list(programs)
+    lock = threading.Lock()
+
+    def worker():
+        while True:
+            with lock:
+                if not queue: return
+                text = queue.pop()
+            result, error = basic.run('<bench>', text, basic.SymbolTable())
+            if error:
+                with lock:
+                    errors.append(error.as_string())
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    start = time.perf_counter()
+    with patch.object(gemini_controller, '_gemini_instance', controller), redirect_stdout(io.StringIO()):
+        for thread in workers: thread.start()
+        for thread in workers: thread.join()
+    return time.perf_counter() - start, errors
+
+
+def main():
+    programs = int(sys.argv[1]) if len(sys.argv) > 1 else 64
+    latency = float(sys.argv[2]) if len(sys.argv) > 2 else 0.2
+    max_concurrency = int(sys.argv[3]) if len(sys.argv) > 3 else None
+
+    operators = '+-*/'
+    extra = {word(i): operators[i % 4] for i in range(programs * len(THREADS))}
+    server = start_server(latency=latency, jitter=latency / 4, backend=TableBackend(extra))
+    print(f"{programs} programs per run, resolver latency {latency * 1000:.0f} ms at {server.url}")
+
+    try:
+        for n, threads in enumerate(THREADS):
+            controller = gemini_controller.GeminiController(
+                backend=HttpBackend(server.url), max_concurrency=max_concurrency)
+            # Fresh words every run, so nothing is answered from memory
+            texts = [f"{i % 9 + 1} {word(n * programs + i)} 3" for i in range(programs)]
+            before = server.requests
+            elapsed, errors = run_programs(controller, texts, threads)
+            print(f"  {threads:>2} threads   {programs / elapsed:7.1f} programs/s"
+                  f"   {server.requests - before:4d} requests   {len(errors)} errors")
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,404 @@
+#######################################
+# BYTECODE COMPILER & VM
+# Compiles the AST into compact bytecode
+# and runs it on a stack machine
+#######################################
+
+from array import array
+
+from basic import (
+    RTResult, RTError, Number, BaseFunction, Function, Context,
+    TT_PLUS, TT_MINUS, TT_MUL, TT_DIV, MAX_CALL_DEPTH,
+)
+
+#######################################
+# OPCODES
+#######################################
+
+# Every instruction is three words: opcode, argument, span index.
+# The span index points into CodeObject.spans and is only read when the
+# instruction raises a runtime error.
+LOAD_CONST    = 0   # push consts[arg]
+LOAD_NAME     = 1   # push value of names[arg] (functions as objects)
+STORE_NAME    = 2   # bind names[arg] to top of stack (value stays on stack)
+BINARY_ADD    = 3
+BINARY_SUB    = 4
+BINARY_MUL    = 5
+BINARY_DIV    = 6   # span: divisor, for 'Division by zero'
+NEGATE        = 7
+POP           = 8
+MAKE_FUNCTION = 9   # consts[arg] is a FuncDefNode; binds and pushes a Function
+CALL          = 10  # arg: argument count; span: call site
+EMPTY_LIST    = 11  # list operation on []: always an error
+RETURN        = 12
+
+INSTRUCTION_SIZE = 3
+
+BINARY_OPS = {
+    TT_PLUS: BINARY_ADD,
+    TT_MINUS: BINARY_SUB,
+    TT_MUL: BINARY_MUL,
+    TT_DIV: BINARY_DIV,
+}
+
+#######################################
+# CODE OBJECT
+#######################################
+
+class CodeObject:
+    """Instructions and pools for one program or function body."""
+
+    def __init__(self, name, params=()):
+        self.name = name
+        self.params = list(params)  # parameter names (function bodies only)
+        self.code = []              # becomes an array('l') once compiled
+        self.consts = []
+        self.names = []
+        self.spans = []             # nodes whose span an error would report
+        self.const_index = {}
+        self.name_index = {}
+
+    def emit(self, op, arg=0, span=-1):
+        self.code += (op, arg, span)
+
+    def finish(self):
+        self.code = array('l', self.code)
+        return self
+
+    def add_const(self, value):
+        # Key on the type too: 1 and 1.0 are equal but must stay distinct
+        key = (type(value), value) if isinstance(value, (int, float)) else id(value)
+        if key not in self.const_index:
+            self.const_index[key] = len(self.consts)
+            self.consts.append(value)
+        return self.const_index[key]
+
+    def add_name(self, name):
+        if name not in self.name_index:
+            self.name_index[name] = len(self.names)
+            self.names.append(name)
+        return self.name_index[name]
+
+    def add_span(self, node):
+        self.spans.append(node)
+        return len(self.spans) - 1
+
+#######################################
+# COMPILER
+#######################################
+
+class Compiler:
+    """
+    Translates AST nodes into a CodeObject (one pass, post-order).
+
+    Nodes are compiled from an explicit work stack rather than by
+    recursion, so long chains such as 1 + 1 + ... + 1 compile at any
+    length. Each compile_* method emits what comes first and returns the
+    rest in order: child nodes to compile, and (op, arg, span)
+    instructions to emit once the nodes before them are done.
+    """
+
+    def __init__(self):
+        self.dispatch = {}
+
+    def compile(self, node, name='<program>', params=()):
+        code = CodeObject(name, params)
+        stack = [node]
+        while stack:
+            item = stack.pop()
+            if type(item) is tuple:
+                code.emit(*item)
+            else:
+                stack.extend(reversed(self.visit(item, code)))
+        code.emit(RETURN)
+        return code.finish()
+
+    def visit(self, node, code):
+        method = self.dispatch.get(type(node))
+        if method is None:
+            method = getattr(self, f'compile_{type(node).__name__}', None)
+            if method is None:
+                raise Exception(f'No compile_{type(node).__name__} method defined')
+            self.dispatch[type(node)] = method
+        return method(node, code)
+
+    def compile_ListNode(self, node, code):
+        if not node.element_nodes:
+            code.emit(LOAD_CONST, code.add_const(0))
+            return ()
+
+        items = [node.element_nodes[0]]
+        for element_node in node.element_nodes[1:]:
+            items += ((POP, 0, -1), element_node)
+        return items
+
+    def compile_NumberNode(self, node, code):
+        code.emit(LOAD_CONST, code.add_const(node.tok.value))
+        return ()
+
+    def compile_BinOpNode(self, node, code):
+        return (node.left_node, node.right_node,
+                (BINARY_OPS[node.op_tok.type], 0, code.add_span(node.right_node)))
+
+    def compile_UnaryOpNode(self, node, code):
+        if node.op_tok.type == TT_MINUS:
+            return (node.node, (NEGATE, 0, -1))
+        return (node.node,)
+
+    def compile_ListOpNode(self, node, code):
+        if not node.number_nodes:
+            code.emit(EMPTY_LIST, 0, code.add_span(node))
+            return ()
+
+        # Left-to-right fold: ((n0 op n1) op n2) ...
+        op = BINARY_OPS[node.op_tok.type]
+        items = [node.number_nodes[0]]
+        for number_node in node.number_nodes[1:]:
+            items += (number_node, (op, 0, code.add_span(number_node)))
+        return items
+
+    def compile_VarAccessNode(self, node, code):
+        code.emit(LOAD_NAME, code.add_name(node.var_name_tok.value), code.add_span(node))
+        return ()
+
+    def compile_VarAssignNode(self, node, code):
+        return (node.value_node,
+                (STORE_NAME, code.add_name(node.var_name_tok.value), code.add_span(node.value_node)))
+
+    def compile_FuncDefNode(self, node, code):
+        # Bodies are compiled lazily, on their first call
+        code.emit(MAKE_FUNCTION, code.add_const(node), code.add_span(node))
+        return ()
+
+    def compile_CallNode(self, node, code):
+        return (node.node_to_call, *node.arg_nodes, (CALL, len(node.arg_nodes), code.add_span(node)))
+
+#######################################
+# FRAMES
+#######################################
+
+class Frame:
+    """
+    Variables of one function call, holding raw numbers.
+
+    Like the tree-walking interpreter, scoping is dynamic: a lookup that
+    misses falls through to the caller's frame and finally to the global
+    SymbolTable (where values are stored as Number objects).
+    """
+    __slots__ = ('names', 'parent', 'symbol_table', 'name', 'entry_pos', 'context')
+
+    def __init__(self, names, parent=None, symbol_table=None, name=None, entry_pos=None, context=None):
+        self.names = names
+        self.parent = parent
+        self.symbol_table = symbol_table
+        self.name = name
+        self.entry_pos = entry_pos
+        self.context = context
+
+    def lookup(self, name):
+        frame = self
+        while frame.symbol_table is None:
+            value = frame.names.get(name)
+            if value is not None: return value
+            frame = frame.parent
+
+        value = frame.symbol_table.get(name)
+        if value is None or isinstance(value, BaseFunction): return value
+        return value.value
+
+    def get_context(self):
+        # Contexts are only needed for tracebacks, so build them on demand
+        # (outermost first, without recursing through deep call chains)
+        pending = []
+        frame = self
+        while frame.context is None:
+            pending.append(frame)
+            frame = frame.parent
+        for frame in reversed(pending):
+            frame.context = Context(frame.name, frame.parent.context, frame.entry_pos)
+        return self.context
+
+#######################################
+# VIRTUAL MACHINE
+#######################################
+
+def numeric(value):
+    # Functions are Numbers with value 0 in the tree-walking interpreter
+    return value.value if isinstance(value, Number) else value
+
+
+class VM:
+    def __init__(self):
+        self.compiler = Compiler()
+        self.function_codes = {}  # id(body_node) -> (body_node, CodeObject)
+
+    def function_code(self, func):
+        entry = self.function_codes.get(id(func.body_node))
+        if entry is None:
+            params = [tok.value for tok in func.arg_names]
+            code = self.compiler.compile(func.body_node, func.name, params)
+            entry = self.function_codes[id(func.body_node)] = (func.body_node, code)
+        return entry[1]
+
+    def run(self, node, context):
+        """Compile and execute an AST, returning an RTResult like Interpreter.visit."""
+        res = RTResult()
+        code = self.compiler.compile(node)
+        root = Frame(None, symbol_table=context.symbol_table, context=context)
+
+        value, error = self.execute(code, root)
+        if error: return res.failure(error)
+
+        if not isinstance(value, BaseFunction):
+            value = Number(value).set_context(context).set_pos(node.pos_start, node.pos_end)
+        return res.success(value)
+
+    def store(self, frame, name, value, span):
+        if frame.symbol_table is None:
+            frame.names[name] = value
+        else:
+            if not isinstance(value, BaseFunction):
+                value = Number(value).set_context(frame.get_context()).set_pos(span.pos_start, span.pos_end)
+            frame.symbol_table.set(name, value)
+
+    def call_foreign(self, func, args, span, frame):
+        """Call a function the VM has no bytecode for; returns (value, error)"""
+        context = frame.get_context()
+        func = func.copy().set_pos(span.pos_start, span.pos_end)
+        args = [arg if isinstance(arg, BaseFunction) else Number(arg).set_context(context) for arg in args]
+        res = func.execute(args)
+        if res.error: return None, res.error
+        return res.value if isinstance(res.value, BaseFunction) else res.value.value, None
+
+    def error(self, code, span_idx, details, frame):
+        node = code.spans[span_idx]
+        return RTError(node.pos_start, node.pos_end, details, frame.get_context())
+
+    def execute(self, code, frame):
+        """Run code in frame; returns (value, error)."""
+        stack = []
+        push, pop = stack.append, stack.pop
+        calls = []  # (code, pc, frame) of suspended callers
+        ops, consts, names = code.code, code.consts, code.names
+        local_names = frame.names
+        pc = 0
+
+        # Opcodes are tested roughly in order of frequency
+        while True:
+            op = ops[pc]
+            arg = ops[pc + 1]
+            pc += INSTRUCTION_SIZE
+
+            if op == LOAD_NAME:
+                # Fast path: the current call's own variables
+                value = local_names.get(names[arg]) if local_names is not None else None
+                if value is None:
+                    value = frame.lookup(names[arg])
+                    if value is None:
+                        return None, self.error(code, ops[pc - 1], f"'{names[arg]}' is not defined", frame)
+                push(value)
+
+            elif op == LOAD_CONST:
+                push(consts[arg])
+
+            elif op == BINARY_MUL:
+                right = pop()
+                try:
+                    stack[-1] *= right
+                except TypeError:
+                    stack[-1] = numeric(stack[-1]) * numeric(right)
+
+            elif op == BINARY_ADD:
+                right = pop()
+                try:
+                    stack[-1] += right
+                except TypeError:
+                    stack[-1] = numeric(stack[-1]) + numeric(right)
+
+            elif op == BINARY_SUB:
+                right = pop()
+                try:
+                    stack[-1] -= right
+                except TypeError:
+                    stack[-1] = numeric(stack[-1]) - numeric(right)
+
+            elif op == BINARY_DIV:
+                right = numeric(pop())
+                if right == 0:
+                    return None, self.error(code, ops[pc - 1], 'Division by zero', frame)
+                try:
+                    stack[-1] /= right
+                except TypeError:
+                    stack[-1] = numeric(stack[-1]) / right
+
+            elif op == CALL:
+                span_idx = ops[pc - 1]
+                if arg:
+                    args = stack[-arg:]
+                    del stack[-arg:]
+                else:
+                    args = []
+                func = pop()
+
+                if not isinstance(func, BaseFunction):
+                    return None, self.error(code, span_idx, "Identifier is not a function", frame)
+                if not isinstance(func, Function):
+                    # Functions of other engines (FlatFunction) run through their own execute
+                    value, error = self.call_foreign(func, args, code.spans[span_idx], frame)
+                    if error: return None, error
+                    push(value)
+                    continue
+                if len(args) != len(func.arg_names):
+                    return None, self.error(
+                        code, span_idx, f"{len(args)} args passed, {len(func.arg_names)} expected", frame
+                    )
+
+                if len(calls) >= MAX_CALL_DEPTH:
+                    return None, self.error(code, span_idx, "Maximum call depth exceeded", frame)
+
+                body = self.function_code(func)
+                local_names = dict(zip(body.params, args))
+                callee = Frame(local_names, frame, None, func.name, code.spans[span_idx].pos_start)
+                calls.append((code, pc, frame))
+                code, frame, pc = body, callee, 0
+                ops, consts, names = code.code, code.consts, code.names
+
+            elif op == RETURN:
+                if not calls: return pop(), None
+                code, pc, frame = calls.pop()
+                ops, consts, names = code.code, code.consts, code.names
+                local_names = frame.names
+
+            elif op == POP:
+                pop()
+
+            elif op == STORE_NAME:
+                if local_names is not None:
+                    local_names[names[arg]] = stack[-1]
+                else:
+                    self.store(frame, names[arg], stack[-1], code.spans[ops[pc - 1]])
+
+            elif op == NEGATE:
+                try:
+                    stack[-1] *= -1
+                except TypeError:
+                    stack[-1] = numeric(stack[-1]) * -1
+
+            elif op == MAKE_FUNCTION:
+                node = consts[arg]
+                func_name = node.var_name_tok.value
+                func = Function(func_name, node.body_node, node.arg_name_toks)
+                func.set_context(frame.get_context()).set_pos(node.pos_start, node.pos_end)
+                self.store(frame, func_name, func, None)
+                push(func)
+
+            elif op == EMPTY_LIST:
+                return None, self.error(code, ops[pc - 1], "Cannot perform operation on empty list", frame)
+
+            else:
+                raise Exception(f'Unknown opcode {op}')
+
+
+def run_bytecode(node, context):
+    """Execute an AST on the bytecode VM (returns an RTResult)."""
+    return VM().run(node, context)
@@ -0,0 +1,101 @@
+#######################################
+# CALC TEMPLATES
+# Remembers natural language conversions
+# ("calc what is 5 plus 3") with their
+# numbers abstracted away
+#######################################
+
+import re
+
+from resolver_cache import PersistentCache, caching_disabled, env_number, DEFAULT_TTL, DEFAULT_MAX_ENTRIES
+
+# Numbers standing on their own: the 2 of "x2" or "log2" is part of a word
+NUMBER = re.compile(r'(?<![\w.])\d+(?:\.\d+)?(?![\w.])')
+PLACEHOLDER = re.compile(r'\{(\d+)\}')
+NUMBER_MARK = '#'
+
+
+def abstract_numbers(sentence):
+    """
+    The cache key of a sentence (lowercased, whitespace collapsed, every
+    number replaced by NUMBER_MARK) and its numbers as written.
+
+    >>> abstract_numbers("What is  5 plus 3.5")
+    ('what is # plus #', ['5', '3.5'])
+    """
+    numbers = NUMBER.findall(sentence)
+    key = NUMBER.sub(NUMBER_MARK, ' '.join(sentence.lower().split()))
+    return key, numbers
+
+
+def make_template(expression, numbers):
+    """
+    The expression with each of the sentence's numbers replaced by its
+    placeholder ({0}, {1}, ...), or None if the numbers cannot be told
+    apart: a number that occurs twice in the sentence, or that the
+    expression does not use exactly once, might stand for something else
+    in another sentence.
+
+    An expression with numbers of its own makes no template either: the
+    model may have derived them from the sentence's numbers ("5 factorial"
+    -> "5 * 4 * 3 * 2 * 1"), and they would be wrong for other numbers.
+    """
+    if len(set(numbers)) != len(numbers): return None
+
+    index = {number: i for i, number in enumerate(numbers)}
+    used = []
+    for match in NUMBER.finditer(expression):
+        if match.group() not in index: return None
+        used.append(match.group())
+    if sorted(used) != sorted(numbers): return None
+
+    return NUMBER.sub(lambda match: '{%d}' % index[match.group()], expression)
+
+
+def fill_template(template, numbers):
+    """Put a sentence's numbers into a template"""
+    return PLACEHOLDER.sub(lambda match: numbers[int(match.group(1))], template)
+
+
+class ConversionTemplates:
+    """
+    Symbolic templates of converted sentences, keyed by the sentence with
+    its numbers abstracted: once "what is 5 plus 3" has been converted to
+    "5 + 3", "what is 12 plus 9" gives "12 + 9" without asking the LLM.
+
+    Entries are kept in a PersistentCache (persistent, least recently used
+    evicted first).
+    """
+    def __init__(self, cache):
+        self.cache = cache
+
+    def lookup(self, sentence):
+        """The symbolic expression for sentence, or None on a miss"""
+        key, numbers = abstract_numbers(sentence)
+        template = self.cache.get(key)
+        if template is None: return None
+        return fill_template(template, numbers)
+
+    def store(self, sentence, expression):
+        """Remember the conversion of sentence, if it makes a safe template"""
+        key, numbers = abstract_numbers(sentence)
+        template = make_template(expression, numbers)
+        if template is not None:
+            self.cache.put(key, template)
+
+
+def open_template_cache():
+    """
+    Open the shared conversion template cache (in the resolver cache file).
+
+    Returns None when caching is turned off with LINGUAFLOW_CACHE=off.
+    LINGUAFLOW_CACHE_TTL and LINGUAFLOW_CACHE_MAX_ENTRIES apply as for the
+    operation word cache.
+    """
+    if caching_disabled(): return None
+
+    return ConversionTemplates(PersistentCache(
+        table='calc_templates',
+        ttl=env_number('LINGUAFLOW_CACHE_TTL', DEFAULT_TTL),
+        max_entries=env_number('LINGUAFLOW_CACHE_MAX_ENTRIES', DEFAULT_MAX_ENTRIES, int),
+    ))
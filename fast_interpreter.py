@@ -0,0 +1,216 @@
+#######################################
+# FAST INTERPRETER
+# Tree walk over raw Python numbers,
+# with runtime errors raised as exceptions
+#######################################
+
+from basic import (
+    ListNode, NumberNode, BinOpNode, UnaryOpNode, ListOpNode,
+    VarAccessNode, VarAssignNode, FuncDefNode, CallNode,
+    RTResult, RTError, Number, BaseFunction, Function,
+    TT_PLUS, TT_MINUS, TT_MUL,
+)
+from list_fold import fold_list
+
+
+class Fault(Exception):
+    """A runtime error, carried up to the visit() that started the walk"""
+    def __init__(self, error):
+        super().__init__(error.details)
+        self.error = error
+
+
+class FastInterpreter:
+    """
+    The quiet tree-walking interpreter without the per-node objects.
+
+    Expressions evaluate to plain ints and floats, not Number objects,
+    and nothing is wrapped in an RTResult: a runtime error raises a Fault
+    holding its RTError. Functions remain Function objects, since calling
+    one needs its context and position. Numbers are only built where a
+    value leaves the walk: when it is stored in a symbol table, passed to
+    a function, or returned as the result of a statement list.
+
+    visit() has the signature of Interpreter.visit and returns the same
+    RTResult, so run() and Function.execute use it in place of the
+    Interpreter.
+    """
+    def visit(self, node, context):
+        try:
+            return RTResult().success(self.result(node, context))
+        except Fault as fault:
+            return RTResult().failure(fault.error)
+
+    def result(self, node, context):
+        """The value of node (a Number or a function), as Interpreter.visit gives it"""
+        if type(node) is not ListNode:
+            return self.statement(node, context)
+        if not node.element_nodes:
+            return Number(0)
+
+        statements = node.element_nodes
+        for statement in statements[:-1]:
+            if type(statement) in STATEMENTS:
+                STATEMENTS[type(statement)](self, statement, context)
+            else:
+                EVALUATE[type(statement)](self, statement, context)
+        return self.statement(statements[-1], context)
+
+    def statement(self, node, context):
+        node_type = type(node)
+        if node_type in STATEMENTS:
+            return STATEMENTS[node_type](self, node, context)
+
+        value = EVALUATE[node_type](self, node, context)
+        if isinstance(value, BaseFunction): return value
+        return Number(value).set_context(context).set_pos(node.pos_start, node.pos_end)
+
+    def no_visit_method(self, node, context):
+        raise Exception(f'No visit_{type(node).__name__} method defined')
+
+    ###################################
+    # Expressions (raw numbers)
+    ###################################
+
+    def number(self, node, context):
+        return node.tok.value
+
+    def bin_op(self, node, context):
+        left = EVALUATE[type(node.left_node)](self, node.left_node, context)
+        right = EVALUATE[type(node.right_node)](self, node.right_node, context)
+        op_type = node.op_tok.type
+        try:
+            if op_type == TT_PLUS: return left + right
+            if op_type == TT_MINUS: return left - right
+            if op_type == TT_MUL: return left * right
+            return left / right
+        except ZeroDivisionError:
+            raise Fault(RTError(node.right_node.pos_start, node.right_node.pos_end, 'Division by zero', context))
+        except TypeError:
+            # A function used as a number: its value is 0, as for the Interpreter
+            return self.bin_op_values(node, number_value(left), number_value(right), context)
+
+    def bin_op_values(self, node, left, right, context):
+        op_type = node.op_tok.type
+        if op_type == TT_PLUS: return left + right
+        if op_type == TT_MINUS: return left - right
+        if op_type == TT_MUL: return left * right
+        if right == 0:
+            raise Fault(RTError(node.right_node.pos_start, node.right_node.pos_end, 'Division by zero', context))
+        return left / right
+
+    def unary_op(self, node, context):
+        value = EVALUATE[type(node.node)](self, node.node, context)
+        if node.op_tok.type != TT_MINUS: return value
+        return number_value(value) * -1
+
+    def list_op(self, node, context):
+        if len(node.number_nodes) == 0:
+            raise Fault(RTError(node.pos_start, node.pos_end, "Cannot perform operation on empty list", context))
+
+        value, zero_index = fold_list(node, node.op_tok.type, lambda: [number_node.tok.value for number_node in node.number_nodes])
+        if zero_index is not None:
+            zero_node = node.number_nodes[zero_index]
+            raise Fault(RTError(zero_node.pos_start, zero_node.pos_end, 'Division by zero', context))
+        return value
+
+    def var_access(self, node, context):
+        if node.slot is not None:
+            value = context.symbol_table.values[node.slot]
+        else:
+            value = context.symbol_table.get(node.var_name_tok.value)
+
+        if type(value) is Number: return value.value
+        if value is None:
+            raise Fault(RTError(node.pos_start, node.pos_end, f"'{node.var_name_tok.value}' is not defined", context))
+        # Functions run in the scope they are read from (dynamic scoping)
+        return value.copy().set_pos(node.pos_start, node.pos_end).set_context(context)
+
+    def statement_value(self, node, context):
+        # Statements and lists only appear in statement lists; kept for ASTs built by hand
+        value = self.result(node, context)
+        return value.value if type(value) is Number else value
+
+    ###################################
+    # Statements (Numbers and functions)
+    ###################################
+
+    def var_assign(self, node, context):
+        value_node = node.value_node
+        value = EVALUATE[type(value_node)](self, value_node, context)
+        if not isinstance(value, BaseFunction):
+            value = Number(value).set_context(context).set_pos(value_node.pos_start, value_node.pos_end)
+
+        if node.slot is not None:
+            context.symbol_table.values[node.slot] = value
+        else:
+            context.symbol_table.set(node.var_name_tok.value, value)
+        return value
+
+    def func_def(self, node, context):
+        func_value = Function(node.var_name_tok.value, node.body_node, node.arg_name_toks)
+        func_value.set_context(context).set_pos(node.pos_start, node.pos_end)
+        context.symbol_table.set(node.var_name_tok.value, func_value)
+        return func_value
+
+    def call(self, node, context):
+        node_to_call = node.node_to_call
+        if type(node_to_call) is VarAccessNode:
+            # Read without var_access's copy: the function is copied once, below
+            if node_to_call.slot is not None:
+                value_to_call = context.symbol_table.values[node_to_call.slot]
+            else:
+                value_to_call = context.symbol_table.get(node_to_call.var_name_tok.value)
+            if value_to_call is None:
+                raise Fault(RTError(node_to_call.pos_start, node_to_call.pos_end, f"'{node_to_call.var_name_tok.value}' is not defined", context))
+        else:
+            value_to_call = EVALUATE[type(node_to_call)](self, node_to_call, context)
+
+        args = []
+        for arg_node in node.arg_nodes:
+            value = EVALUATE[type(arg_node)](self, arg_node, context)
+            args.append(value if isinstance(value, BaseFunction) else Number(value).set_context(context))
+
+        if not isinstance(value_to_call, BaseFunction):
+            raise Fault(RTError(node.pos_start, node.pos_end, "Identifier is not a function", context))
+
+        value_to_call = value_to_call.copy().set_pos(node.pos_start, node.pos_end).set_context(context)
+        res = value_to_call.execute(args, interpreter_class=FastInterpreter)
+        if res.error: raise Fault(res.error)
+        return res.value
+
+
+def number_value(value):
+    return value.value if isinstance(value, BaseFunction) else value
+
+
+class _Dispatch(dict):
+    # Nodes without a method fail like Interpreter.no_visit_method
+    def __missing__(self, node_type):
+        return lambda interpreter, node, context: interpreter.no_visit_method(node, context)
+
+
+# Node type -> method giving a raw number (or a function)
+EVALUATE = _Dispatch({
+    NumberNode: FastInterpreter.number,
+    BinOpNode: FastInterpreter.bin_op,
+    UnaryOpNode: FastInterpreter.unary_op,
+    ListOpNode: FastInterpreter.list_op,
+    VarAccessNode: FastInterpreter.var_access,
+    VarAssignNode: FastInterpreter.statement_value,
+    FuncDefNode: FastInterpreter.statement_value,
+    CallNode: FastInterpreter.statement_value,
+    ListNode: FastInterpreter.statement_value,
+})
+
+# Statement node type -> method giving the Number (or function) it results in
+STATEMENTS = {
+    VarAssignNode: FastInterpreter.var_assign,
+    FuncDefNode: FastInterpreter.func_def,
+    CallNode: FastInterpreter.call,
+}
+
+
+def run_fast(node, context):
+    """Execute an AST with the FastInterpreter (returns an RTResult)."""
+    return FastInterpreter().visit(node, context)
@@ -0,0 +1,98 @@
+#######################################
+# FAST LEXER
+# Tokenizes with one compiled regular
+# expression instead of character by character
+#######################################
+
+import re
+
+from basic import (
+    Token, Position, Source, IllegalCharError,
+    TT_INT, TT_FLOAT, TT_PLUS, TT_MINUS, TT_MUL, TT_DIV,
+    TT_LPAREN, TT_RPAREN, TT_LBRACKET, TT_RBRACKET, TT_COMMA, TT_COLON,
+    TT_IDENTIFIER, TT_KEYWORD, TT_NEWLINE, TT_EOF, KEYWORDS,
+)
+
+# Each match is one token and the blanks before it, with one alternative per
+# token class; a character that matches none of them is illegal. Character
+# classes are spelled out (not \d, \w) so that only the ASCII DIGITS and
+# LETTERS of basic.py are accepted.
+TOKEN_RE = re.compile(r'''
+    [ \t]*
+    (?:
+        (?P<number>[0-9]+(?P<fraction>\.[0-9]*)?)
+      | (?P<word>[A-Za-z][A-Za-z0-9_]*)
+      | (?P<newline>[;\n])
+      | (?P<symbol>[-+*/()\[\],:])
+    )
+''', re.VERBOSE)
+BLANKS_RE = re.compile(r'[ \t]*')
+
+SYMBOL_TYPES = {
+    '+': TT_PLUS, '-': TT_MINUS, '*': TT_MUL, '/': TT_DIV,
+    '(': TT_LPAREN, ')': TT_RPAREN, '[': TT_LBRACKET, ']': TT_RBRACKET,
+    ',': TT_COMMA, ':': TT_COLON,
+}
+
+
+class FastLexer:
+    """
+    Drop-in replacement for Lexer: the same tokens, values, positions and
+    errors, but produced from the matches of TOKEN_RE. Tokens only record
+    their offsets; line numbers are worked out from the Source when needed.
+    """
+    def __init__(self, fn, text):
+        self.fn = fn
+        self.text = text
+
+    def make_tokens(self):
+        text = self.text
+        source = self.source = Source(self.fn, text)
+        tokens = []
+        append = tokens.append
+        expected = 0    # where the next match has to start
+
+        for match in TOKEN_RE.finditer(text):
+            if match.start() != expected:
+                return [], self.illegal_char(BLANKS_RE.match(text, expected).end())
+            kind = match.lastgroup
+            start, end = match.span(kind)
+            expected = end
+
+            if kind == 'number':
+                if match.group('fraction') is None:
+                    tok = Token(TT_INT, int(match.group(kind)))
+                else:
+                    tok = Token(TT_FLOAT, float(match.group(kind)))
+            elif kind == 'word':
+                word_str = match.group(kind)
+                word_lower = word_str.lower()
+                if word_lower in KEYWORDS:
+                    tok = Token(TT_KEYWORD, word_lower)
+                else:
+                    tok = Token(TT_IDENTIFIER, word_str)
+            elif kind == 'newline':
+                tok = Token(TT_NEWLINE)
+            else:
+                tok = Token(SYMBOL_TYPES[match.group(kind)])
+
+            tok.source = source
+            tok.start = start
+            tok.end = end
+            append(tok)
+
+        expected = BLANKS_RE.match(text, expected).end()
+        if expected != len(text):
+            return [], self.illegal_char(expected)
+
+        tok = Token(TT_EOF)
+        tok.source = source
+        tok.start = len(text)
+        tok.end = len(text) + 1
+        append(tok)
+        return tokens, None
+
+    def illegal_char(self, idx):
+        pos_start = Position(idx, self.source)
+        pos_end = Position(idx + 1, self.source, True)
+        return IllegalCharError(pos_start, pos_end, "'" + self.text[idx] + "'")
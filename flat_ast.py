@@ -0,0 +1,402 @@
+#######################################
+# FLAT AST
+# Parser output stored in parallel arrays
+# (one row per node) instead of node objects
+#######################################
+
+from array import array
+
+from basic import (
+    Position, RTResult, RTError, Number, BaseFunction,
+    TT_PLUS, TT_MINUS, TT_MUL, TT_DIV,
+)
+from list_fold import fold_list
+
+# Node kinds, one per node class of the object AST
+LIST        = 0   # a: offset of [count, element...] in extra
+NUMBER      = 1   # a: index into consts
+BINOP       = 2   # op; a: left, b: right
+UNARY       = 3   # op; a: operand
+LISTOP      = 4   # op; a: offset of [count, number...] in extra
+VAR_ACCESS  = 5   # a: index into names
+VAR_ASSIGN  = 6   # a: index into names, b: value
+FUNC_DEF    = 7   # a: index into names, b: offset of [body, count, arg name...] in extra
+CALL        = 8   # a: callee, b: offset of [count, arg...] in extra
+
+KIND_NAMES = ('ListNode', 'NumberNode', 'BinOpNode', 'UnaryOpNode', 'ListOpNode',
+              'VarAccessNode', 'VarAssignNode', 'FuncDefNode', 'CallNode')
+
+# Operator codes stored in the op column
+OP_TYPES = (None, TT_PLUS, TT_MINUS, TT_MUL, TT_DIV)
+OP_CODES = {op_type: code for code, op_type in enumerate(OP_TYPES) if op_type}
+
+
+class FlatAST:
+    """
+    A parsed program as struct-of-arrays: node i is described by kind[i],
+    op[i], a[i], b[i] and its source span start[i]..end[i] (-1 when it has
+    none). Numbers and names live once in consts and names; variable-length
+    child lists live in extra.
+
+    The node-building methods take the same arguments as the node classes,
+    so Parser(flat=True) writes straight into the arrays, and each returns
+    the new node's index. Everything else, FlatInterpreter included, reads
+    the program through the view methods (kind_of, left, elements, ...),
+    never the columns.
+    """
+    def __init__(self, source):
+        self.source = source
+        self.kind = array('B')
+        self.op = array('B')
+        self.a = array('i')
+        self.b = array('i')
+        self.start = array('i')
+        self.end = array('i')
+        self.extra = array('i')
+        self.consts = []
+        self.names = []
+        self.root = None
+        self.const_ids = {}  # (type, value) -> index into consts
+        self.name_ids = {}   # name -> index into names
+        self.fold_states = {}  # ListOp node -> FoldState, filled while running
+
+    def __len__(self):
+        return len(self.kind)
+
+    def __getstate__(self):
+        # The lookup tables are only needed while building, fold states while running
+        state = dict(self.__dict__)
+        state['const_ids'] = state['name_ids'] = None
+        state['fold_states'] = {}
+        return state
+
+    ###################################
+    # Building (called by Parser)
+    ###################################
+
+    def add(self, kind, op, a, b, start, end):
+        self.kind.append(kind)
+        self.op.append(op)
+        self.a.append(a)
+        self.b.append(b)
+        self.start.append(start)
+        self.end.append(end)
+        return len(self.kind) - 1
+
+    def add_list(self, items):
+        offset = len(self.extra)
+        self.extra.append(len(items))
+        self.extra.extend(items)
+        return offset
+
+    def const(self, value):
+        key = (type(value), value)
+        idx = self.const_ids.get(key)
+        if idx is None:
+            idx = self.const_ids[key] = len(self.consts)
+            self.consts.append(value)
+        return idx
+
+    def name(self, value):
+        idx = self.name_ids.get(value)
+        if idx is None:
+            idx = self.name_ids[value] = len(self.names)
+            self.names.append(value)
+        return idx
+
+    def ListNode(self, element_nodes):
+        if not element_nodes:
+            return self.add(LIST, 0, self.add_list(()), 0, -1, -1)
+        return self.add(LIST, 0, self.add_list(element_nodes), 0,
+                        self.start[element_nodes[0]], self.end[element_nodes[-1]])
+
+    def NumberNode(self, tok):
+        return self.add(NUMBER, 0, self.const(tok.value), 0, tok.start, tok.end)
+
+    def BinOpNode(self, left_node, op_tok, right_node):
+        return self.add(BINOP, OP_CODES[op_tok.type], left_node, right_node,
+                        self.start[left_node], self.end[right_node])
+
+    def UnaryOpNode(self, op_tok, node):
+        return self.add(UNARY, OP_CODES[op_tok.type], node, 0, op_tok.start, self.end[node])
+
+    def ListOpNode(self, op_tok, number_nodes):
+        end = self.end[number_nodes[-1]] if number_nodes else op_tok.end
+        return self.add(LISTOP, OP_CODES[op_tok.type], self.add_list(number_nodes), 0, op_tok.start, end)
+
+    def VarAccessNode(self, var_name_tok):
+        return self.add(VAR_ACCESS, 0, self.name(var_name_tok.value), 0, var_name_tok.start, var_name_tok.end)
+
+    def VarAssignNode(self, var_name_tok, value_node):
+        return self.add(VAR_ASSIGN, 0, self.name(var_name_tok.value), value_node,
+                        var_name_tok.start, self.end[value_node])
+
+    def FuncDefNode(self, var_name_tok, arg_name_toks, body_node):
+        offset = len(self.extra)
+        self.extra.append(body_node)
+        self.add_list([self.name(tok.value) for tok in arg_name_toks])
+        return self.add(FUNC_DEF, 0, self.name(var_name_tok.value), offset,
+                        var_name_tok.start, self.end[body_node])
+
+    def CallNode(self, node_to_call, arg_nodes):
+        end = self.end[arg_nodes[-1]] if arg_nodes else self.end[node_to_call]
+        return self.add(CALL, 0, node_to_call, self.add_list(arg_nodes), self.start[node_to_call], end)
+
+    ###################################
+    # View API
+    ###################################
+
+    def items(self, offset):
+        return self.extra[offset + 1:offset + 1 + self.extra[offset]]
+
+    def kind_of(self, i):
+        """Kind code of node i (LIST, NUMBER, ...)"""
+        return self.kind[i]
+
+    def kind_name(self, i):
+        """Name of the node class node i stands for, e.g. 'BinOpNode'"""
+        return KIND_NAMES[self.kind[i]]
+
+    def op_type(self, i):
+        """Operator token type (TT_PLUS, ...) of a BinOp, UnaryOp or ListOp node"""
+        return OP_TYPES[self.op[i]]
+
+    def value(self, i):
+        return self.consts[self.a[i]]
+
+    def name_of(self, i):
+        """Variable or function name of a VarAccess, VarAssign or FuncDef node"""
+        return self.names[self.a[i]]
+
+    def arg_names(self, i):
+        return [self.names[idx] for idx in self.items(self.b[i] + 1)]
+
+    def body(self, i):
+        return self.extra[self.b[i]]
+
+    def left(self, i):
+        """Left operand of a BinOp node, operand of a UnaryOp node, callee of a Call node"""
+        return self.a[i]
+
+    def right(self, i):
+        """Right operand of a BinOp node, assigned value of a VarAssign node"""
+        return self.b[i]
+
+    def elements(self, i):
+        """Statements of a List node, numbers of a ListOp node"""
+        return self.items(self.a[i])
+
+    def call_args(self, i):
+        return self.items(self.b[i])
+
+    def children(self, i):
+        """Child node indices, in the order the interpreter evaluates them"""
+        kind = self.kind[i]
+        if kind == BINOP: return [self.left(i), self.right(i)]
+        if kind == UNARY: return [self.left(i)]
+        if kind == LIST or kind == LISTOP: return list(self.elements(i))
+        if kind == VAR_ASSIGN: return [self.right(i)]
+        if kind == FUNC_DEF: return [self.body(i)]
+        if kind == CALL: return [self.left(i)] + list(self.call_args(i))
+        return []
+
+    def fold_state(self, i):
+        """Where list_fold keeps the prepared list of ListOp node i (like ListOpNode.prepared)"""
+        state = self.fold_states.get(i)
+        if state is None:
+            state = self.fold_states[i] = FoldState()
+        return state
+
+    def pos_start(self, i):
+        start = self.start[i]
+        return Position(start, self.source) if start >= 0 else None
+
+    def pos_end(self, i):
+        end = self.end[i]
+        return Position(end, self.source, True) if end >= 0 else None
+
+class FoldState:
+    __slots__ = ('prepared',)
+
+    def __init__(self):
+        self.prepared = None
+
+#######################################
+# INTERPRETER
+#######################################
+
+class FlatFunction(BaseFunction):
+    """A function whose body is a node of a FlatAST"""
+    def __init__(self, name, ast, body, arg_names):
+        super().__init__(name)
+        self.ast = ast
+        self.body = body
+        self.arg_names = arg_names  # plain strings
+
+    def copy(self):
+        copy = FlatFunction(self.name, self.ast, self.body, self.arg_names)
+        copy.set_context(self.context)
+        copy.set_pos(self.pos_start, self.pos_end)
+        return copy
+
+    def execute(self, args, interpreter_class=None):
+        res = RTResult()
+
+        res.register(self.check_args(self.arg_names, args))
+        if res.error: return res
+
+        exec_ctx = self.generate_new_context()
+        for arg_name, arg_value in zip(self.arg_names, args):
+            arg_value.set_context(exec_ctx)
+            exec_ctx.symbol_table.set(arg_name, arg_value)
+
+        try:
+            return FlatInterpreter(self.ast).visit(self.body, exec_ctx)
+        except RecursionError:
+            return self.call_depth_error()
+
+
+def apply_op(op_type, left, right):
+    if op_type == TT_PLUS: return left.added_to(right)
+    if op_type == TT_MINUS: return left.subbed_by(right)
+    if op_type == TT_MUL: return left.multed_by(right)
+    if op_type == TT_DIV: return left.dived_by(right)
+
+
+# Steps of FlatInterpreter's work stack; each item is (step, node)
+EVAL          = 0   # push the value of node
+APPLY_BINOP   = 1   # combine the two values on top
+APPLY_UNARY   = 2
+DISCARD       = 3   # drop a statement's value
+ASSIGN        = 4   # bind the value on top (it stays on the stack)
+APPLY_CALL    = 5   # callee and arguments are on the value stack
+
+
+class FlatInterpreter:
+    """
+    Runs a FlatAST with the same values, errors and positions as the
+    (quiet) Interpreter runs the object AST. Steps are not traced.
+
+    Nodes with children are evaluated with a work stack instead of
+    recursion, so expressions of any depth run; leaves have visit_* methods.
+    """
+    def __init__(self, ast):
+        self.ast = ast
+        self.leaf_visitors = {
+            NUMBER: self.visit_number, LISTOP: self.visit_listop,
+            VAR_ACCESS: self.visit_var_access, FUNC_DEF: self.visit_func_def,
+        }
+
+    def visit(self, i, context):
+        ast = self.ast
+        res = RTResult()
+        values = []
+        work = [(EVAL, i)]
+
+        while work:
+            step, i = work.pop()
+
+            if step == EVAL:
+                kind = ast.kind_of(i)
+                if kind == BINOP:
+                    work += ((APPLY_BINOP, i), (EVAL, ast.right(i)), (EVAL, ast.left(i)))
+                elif kind == UNARY:
+                    work += ((APPLY_UNARY, i), (EVAL, ast.left(i)))
+                elif kind == LIST:
+                    elements = ast.elements(i)
+                    if not elements:
+                        values.append(Number(0))
+                        continue
+                    for k in range(len(elements) - 1, -1, -1):
+                        work.append((EVAL, elements[k]))
+                        if k > 0: work.append((DISCARD, i))
+                elif kind == VAR_ASSIGN:
+                    work += ((ASSIGN, i), (EVAL, ast.right(i)))
+                elif kind == CALL:
+                    work.append((APPLY_CALL, i))
+                    args = ast.call_args(i)
+                    for k in range(len(args) - 1, -1, -1):
+                        work.append((EVAL, args[k]))
+                    work.append((EVAL, ast.left(i)))
+                else:
+                    value = res.register(self.leaf_visitors[kind](i, context))
+                    if res.error: return res
+                    values.append(value)
+
+            elif step == APPLY_BINOP:
+                right = values.pop()
+                result, error = apply_op(ast.op_type(i), values.pop(), right)
+                if error: return res.failure(error)
+                values.append(self.span(result, i))
+
+            elif step == APPLY_UNARY:
+                number = values.pop()
+                if ast.op_type(i) == TT_MINUS:
+                    number, error = number.multed_by(Number(-1))
+                    if error: return res.failure(error)
+                values.append(self.span(number, i))
+
+            elif step == DISCARD:
+                values.pop()
+
+            elif step == ASSIGN:
+                context.symbol_table.set(ast.name_of(i), values[-1])
+
+            elif step == APPLY_CALL:
+                arg_count = len(ast.call_args(i))
+                args = values[len(values) - arg_count:]
+                del values[len(values) - arg_count:]
+                value_to_call = self.span(values.pop().copy(), i)
+
+                if not isinstance(value_to_call, BaseFunction):
+                    return res.failure(RTError(ast.pos_start(i), ast.pos_end(i), "Identifier is not a function", context))
+                value = res.register(value_to_call.execute(args))
+                if res.error: return res
+                values.append(value)
+
+        return res.success(values.pop())
+
+    def span(self, value, i):
+        return value.set_pos(self.ast.pos_start(i), self.ast.pos_end(i))
+
+    def visit_number(self, i, context):
+        return RTResult().success(self.span(Number(self.ast.value(i)).set_context(context), i))
+
+    def visit_listop(self, i, context):
+        res = RTResult()
+        numbers = self.ast.elements(i)
+
+        if len(numbers) == 0:
+            return res.failure(RTError(
+                self.ast.pos_start(i), self.ast.pos_end(i),
+                "Cannot perform operation on empty list",
+                context
+            ))
+
+        value, zero_index = fold_list(self.ast.fold_state(i), self.ast.op_type(i), lambda: [self.ast.value(number) for number in numbers])
+        if zero_index is not None:
+            zero = numbers[zero_index]
+            return res.failure(RTError(self.ast.pos_start(zero), self.ast.pos_end(zero), 'Division by zero', context))
+
+        return res.success(self.span(Number(value).set_context(context), i))
+
+    def visit_var_access(self, i, context):
+        res = RTResult()
+        var_name = self.ast.name_of(i)
+        value = context.symbol_table.get(var_name)
+
+        if not value:
+            return res.failure(RTError(self.ast.pos_start(i), self.ast.pos_end(i), f"'{var_name}' is not defined", context))
+        return res.success(self.span(value.copy(), i).set_context(context))
+
+    def visit_func_def(self, i, context):
+        func_name = self.ast.name_of(i)
+        func_value = FlatFunction(func_name, self.ast, self.ast.body(i), self.ast.arg_names(i))
+        self.span(func_value.set_context(context), i)
+        context.symbol_table.set(func_name, func_value)
+        return RTResult().success(func_value)
+
+
+def run_flat(ast, context):
+    """Execute a FlatAST from its root node (returns an RTResult)."""
+    return FlatInterpreter(ast).visit(ast.root, context)
@@ -0,0 +1,144 @@
+#######################################
+# FUNCTION MEMO
+# Remembers the results of function calls
+# by the values they were computed from
+#######################################
+
+import math
+from collections import OrderedDict, namedtuple
+
+from basic import (
+    ListNode, NumberNode, BinOpNode, UnaryOpNode, ListOpNode,
+    VarAccessNode, VarAssignNode, FuncDefNode, Number, Context,
+)
+
+# Results kept per function body; the least recently used go first
+MAX_ENTRIES = 1024
+# Memoizing pays off once at least one lookup in this many hits
+MIN_HIT_RATE = 4
+
+MemoInfo = namedtuple('MemoInfo', 'hits misses maxsize currsize active')
+
+
+class FunctionMemo:
+    """
+    Results of one function body.
+
+    A body only computes with numbers, so its result depends on nothing
+    but the values of its arguments and of the free variables it reads
+    (found in the caller's scope, which changes from call to call). Both
+    make up the key. Only successful calls are stored: errors carry the
+    position and context of their own call.
+
+    A body whose calls rarely repeat (fewer than one hit in MIN_HIT_RATE
+    lookups, once maxsize calls have missed) stops being memoized, so it
+    does not pay for lookups that never hit.
+    """
+    def __init__(self, free_names, maxsize=MAX_ENTRIES):
+        self.free_names = free_names
+        self.maxsize = maxsize
+        self.results = OrderedDict()  # key -> (value, pos_start, pos_end)
+        self.hits = 0
+        self.misses = 0
+        self.active = True
+
+    def key(self, func, args):
+        """The key of calling func with args, or None if it is not cacheable"""
+        if not self.active: return None
+        parts = [value_key(arg) for arg in args]
+        symbol_table = func.context.symbol_table
+        for name in self.free_names:
+            value = symbol_table.get(name)
+            if type(value) is not Number: return None  # undefined, or a function
+            parts.append(value_key(value))
+        return tuple(parts)
+
+    def lookup(self, func, key):
+        """The remembered result of a call (as Function.execute returns it), or None"""
+        entry = self.results.get(key)
+        if entry is None:
+            self.misses += 1
+            if self.misses >= self.maxsize and self.hits * MIN_HIT_RATE < self.misses:
+                self.active = False
+                self.results.clear()
+            return None
+
+        self.hits += 1
+        self.results.move_to_end(key)
+        value, pos_start, pos_end = entry
+        exec_ctx = Context(func.name, func.context, func.pos_start)
+        return Number(value).set_context(exec_ctx).set_pos(pos_start, pos_end)
+
+    def store(self, key, result):
+        if not self.active: return
+        self.results[key] = (result.value, result.pos_start, result.pos_end)
+        if len(self.results) > self.maxsize:
+            self.results.popitem(last=False)
+
+    def info(self):
+        return MemoInfo(self.hits, self.misses, self.maxsize, len(self.results), self.active)
+
+
+def value_key(number):
+    value = number.value
+    if type(value) is float:
+        return (value, math.copysign(1.0, value))  # 1.0 is not 1, -0.0 is not 0.0
+    return value
+
+
+def free_names(body_node, params):
+    """
+    Names a body reads that it has not bound itself, or None if it does
+    anything but arithmetic (calls or defines functions, ...).
+    """
+    bound = set(params)
+    names = []
+    for statement in body_node.element_nodes:
+        nodes = [statement]
+        assigned = []
+        while nodes:
+            node = nodes.pop()
+            node_type = type(node)
+            if node_type is BinOpNode:
+                nodes.append(node.left_node)
+                nodes.append(node.right_node)
+            elif node_type is UnaryOpNode:
+                nodes.append(node.node)
+            elif node_type is VarAssignNode:
+                nodes.append(node.value_node)
+                assigned.append(node.var_name_tok.value)
+            elif node_type is VarAccessNode:
+                name = node.var_name_tok.value
+                if name not in bound and name not in names: names.append(name)
+            elif node_type is not NumberNode and node_type is not ListOpNode:
+                return None
+        bound.update(assigned)
+    return names
+
+
+def function_memo(body_node, arg_name_toks):
+    """
+    The FunctionMemo shared by every call of a body, or None if it cannot
+    have one. It is kept in body_node.memo (False: none possible), so it
+    lives as long as the program.
+    """
+    if type(body_node) is not ListNode: return None
+    memo = body_node.memo
+    if memo is None:
+        memo = False
+        if body_node.element_nodes:
+            names = free_names(body_node, [tok.value for tok in arg_name_toks])
+            if names is not None: memo = FunctionMemo(names, MAX_ENTRIES)
+        body_node.memo = memo
+    return memo if memo is not False else None
+
+
+def clear_memos(node):
+    """Forget the remembered results of every function defined in a program"""
+    lists = [node]
+    while lists:
+        list_node = lists.pop()
+        list_node.memo = None
+        for element_node in list_node.element_nodes:
+            if type(element_node) is FuncDefNode and type(element_node.body_node) is ListNode:
+                lists.append(element_node.body_node)
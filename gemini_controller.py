@@ -1,11 +1,51 @@
 import os
+import json
+import time
+import asyncio
+import threading
+import weakref
 import google.generativeai as genai
 from google.api_core import exceptions
+from resolver_cache import NEGATIVE_ENTRY, env_number, open_operation_cache
+from calc_templates import open_template_cache
+from resolver_backends import (
+    OPERATOR_SYMBOLS, ResolverBackend, TableBackend, QuotaExceeded, BackendError, backend_from_spec,
+)
+from resilience import (
+    TokenBucket, CircuitBreaker, CircuitOpen, LatencyTracker, backoff_delay,
+    DEFAULT_GEMINI_RPM, DEFAULT_RETRIES, DEFAULT_REQUEST_TIMEOUT, HEDGE_QUANTILE,
+)
+
+# Requests to the model running at the same time, per event loop
+# (override with LINGUAFLOW_LLM_CONCURRENCY)
+DEFAULT_CONCURRENCY = 4
+
+# Failures worth another try after a backoff
+TRANSIENT_ERRORS = (
+    exceptions.ResourceExhausted, exceptions.ServiceUnavailable, exceptions.DeadlineExceeded,
+    exceptions.InternalServerError, QuotaExceeded, BackendError,
+)
+
+
+class _LoopState:
+    """Requests in flight and the concurrency limit of one event loop"""
+    def __init__(self, max_concurrency):
+        self.limit = asyncio.Semaphore(max_concurrency)
+        self.inflight = {}  # request key -> future of the model's answer
+        self.tasks = set()  # requests running, kept until they finish
+
+
+class GeminiBackend(ResolverBackend):
+    """The Gemini API, through the google.generativeai SDK's blocking client"""
+    name = 'gemini'
+    requests_per_minute = DEFAULT_GEMINI_RPM
 
-class GeminiController:
     def __init__(self, api_key=None):
         """
-        Initialize the Gemini controller with API key and System Instructions.
+        Initialize the models with API key and System Instructions.
+
+        Args:
+            api_key (str): Gemini API key (defaults to GEMINI_API_KEY)
         """
         self.api_key = api_key or os.getenv('GEMINI_API_KEY')
 
@@ -56,7 +96,338 @@ class GeminiController:
             system_instruction=system_instruction
         )
 
-    def resolve_operation_word(self, word):
+        # Batch variant: resolves a whole program's words in one round trip
+        batch_instruction = """
+        You are a semantic resolver for a grammar-based mathematical interpreter.
+
+        You will receive a JSON array of words. For EACH word, decide if it
+        represents a mathematical operation.
+
+        Respond with ONLY a JSON object mapping every input word (exactly as given)
+        to one of these values:
+        - "+" (for addition: sum, add, plus, total, accumulate, aggregate, combine, etc.)
+        - "-" (for subtraction: subtract, minus, difference, take away, remove, etc.)
+        - "*" (for multiplication: multiply, times, product, etc.)
+        - "/" (for division: divide, split, quotient, etc.)
+        - "ERROR" (if the word is NOT a mathematical operation)
+
+        Rules:
+        1. NO explanations, NO extra text, ONLY the JSON object
+        2. Be case-insensitive and consider synonyms and common variations
+        3. HANDLE TYPOS: close misspellings of math operations resolve to the correct symbol
+        4. REJECT GIBBERISH and ordinary names (e.g., "asdfas", "x", "price") with "ERROR"
+
+        Example:
+        Input: ["sum", "multipy", "qwerty"]
+        Output: {"sum": "+", "multipy": "*", "qwerty": "ERROR"}
+        """
+
+        self.batch_model = genai.GenerativeModel(
+            model_name='gemini-2.5-flash',
+            system_instruction=batch_instruction
+        )
+
+    def resolve_word(self, word):
+        return self.model.generate_content(word).text
+
+    def resolve_words(self, words):
+        return self.batch_model.generate_content(json.dumps(list(words))).text
+
+    def convert(self, sentence):
+        prompt = f"""
+        Convert the following natural language math question into a simple symbolic expression.
+
+        Input: "{sentence}"
+
+        Rules:
+        1. Extract ONLY the mathematical expression using symbols: +, -, *, /, (, )
+        2. NO text, NO explanations, ONLY the symbolic expression
+        3. Examples:
+           - "what is 5 plus 3" → "5 + 3"
+           - "what is answer of 10 divided by 2" → "10 / 2"
+           - "calculate 5 times 3 minus 2" → "5 * 3 - 2"
+        4. If not a valid math question, respond with: ERROR
+
+        Output only the symbolic expression:
+        """
+        return self.model.generate_content(prompt).text
+
+
+class AsyncGeminiController:
+    """
+    Resolves operation words and natural language with Gemini (or another
+    ResolverBackend), as coroutines.
+
+    Identical requests that are in flight at the same time share one call
+    to the model: a word asked by several interpreters at once (alone or
+    as part of a batch) is sent once and every caller gets the answer.
+    At most max_concurrency calls run at a time in each event loop.
+
+    Calls are spaced by a token bucket matched to the backend's quota, and
+    transient failures are retried with exponential backoff. A circuit
+    breaker stops sending after repeated failures: while it is open,
+    requests fail at once, or are answered by the fallback backend when it
+    knows the answer. metrics() reports the state of all three.
+
+    Each request is given up after `timeout` seconds, and one still
+    unanswered after the 95th percentile of recent latencies is hedged: a
+    duplicate is sent and the first reply wins.
+    """
+    def __init__(self, api_key=None, cache=None, max_concurrency=None, templates=None, backend=None,
+                 fallback=None, breaker=None):
+        """
+        Initialize the controller and its backend.
+
+        Args:
+            api_key (str): Gemini API key (defaults to GEMINI_API_KEY)
+            cache: Word -> operator cache (defaults to the shared on-disk cache)
+            max_concurrency (int): Model calls running at once per event loop
+                (defaults to LINGUAFLOW_LLM_CONCURRENCY, or DEFAULT_CONCURRENCY)
+            templates: ConversionTemplates for 'calc' sentences (defaults to
+                the shared on-disk cache)
+            backend (ResolverBackend): Service answering the requests
+                (defaults to LINGUAFLOW_RESOLVER, or Gemini)
+            fallback (ResolverBackend): Answers requests while the circuit is
+                open (defaults to a TableBackend)
+            breaker (CircuitBreaker): Defaults to a CircuitBreaker()
+        """
+        self.backend = backend or backend_from_spec() or GeminiBackend(api_key)
+
+        # Resolutions are cached across runs, so warm scripts never reach the LLM.
+        # Stand-in backends do not share the on-disk caches: their answers are not the model's
+        shared = isinstance(self.backend, GeminiBackend)
+        self.cache = cache if cache is not None else (open_operation_cache() if shared else None)
+        # Converted 'calc' sentences, reused for sentences differing only in their numbers
+        self.templates = templates if templates is not None else (open_template_cache() if shared else None)
+
+        self.max_concurrency = max_concurrency or env_number('LINGUAFLOW_LLM_CONCURRENCY', DEFAULT_CONCURRENCY, int, minimum=1)
+        self._loop_states = weakref.WeakKeyDictionary()  # event loop -> _LoopState
+
+        # LINGUAFLOW_LLM_RPM overrides the backend's own quota (0: no limit)
+        rpm = env_number('LINGUAFLOW_LLM_RPM', self.backend.requests_per_minute or 0)
+        self.limiter = TokenBucket(rpm / 60) if rpm > 0 else None
+        self.breaker = breaker or CircuitBreaker()
+        self.fallback = fallback if fallback is not None else TableBackend()
+        self.retries = DEFAULT_RETRIES
+        self.timeout = env_number('LINGUAFLOW_LLM_TIMEOUT', DEFAULT_REQUEST_TIMEOUT, minimum=0)
+        self.hedge = os.getenv('LINGUAFLOW_LLM_HEDGE', 'on').lower() not in ('off', '0', 'false', 'no')
+        self.latency = LatencyTracker()
+        self.counts = {'requests': 0, 'failures': 0, 'retries': 0, 'fallbacks': 0, 'timeouts': 0, 'hedges': 0}
+        self._counts_lock = threading.Lock()
+
+    @property
+    def model(self):
+        """The Gemini model answering single requests (None for other backends)"""
+        return getattr(self.backend, 'model', None)
+
+    @property
+    def batch_model(self):
+        return getattr(self.backend, 'batch_model', None)
+
+    ###################################
+    # Requests
+    ###################################
+
+    def _state(self):
+        loop = asyncio.get_running_loop()
+        state = self._loop_states.get(loop)
+        if state is None:
+            state = self._loop_states[loop] = _LoopState(self.max_concurrency)
+        return state
+
+    def _start(self, state, key, coro):
+        """Run coro as the in-flight request for key"""
+        task = asyncio.ensure_future(coro)
+        self._track(state, key, task)
+        return task
+
+    def _track(self, state, key, future):
+        state.inflight[key] = future
+
+        def finished(future):
+            if state.inflight.get(key) is future:
+                del state.inflight[key]
+        future.add_done_callback(finished)
+        self._keep(state, future)
+
+    def _keep(self, state, future):
+        # The loop only keeps weak references to tasks
+        state.tasks.add(future)
+        future.add_done_callback(state.tasks.discard)
+
+    def _count(self, name):
+        with self._counts_lock:
+            self.counts[name] += 1
+
+    async def _generate(self, request, argument):
+        """
+        The backend's reply to request(argument), within the rate and
+        concurrency limits. Transient failures are retried and count
+        toward the circuit breaker; raises CircuitOpen without sending
+        while the backend is failing.
+        """
+        attempt = 0
+        while True:
+            self.breaker.check()
+            if self.limiter is not None:
+                await asyncio.sleep(self.limiter.reserve())
+
+            try:
+                reply = await self._hedged(request, argument)
+            except Exception as e:
+                self._count('failures')
+                if not isinstance(e, TRANSIENT_ERRORS):
+                    # The backend answered, if only to refuse: it is reachable
+                    self.breaker.record_success()
+                    raise
+                self.breaker.record_failure()
+                if attempt >= self.retries or self.breaker.is_open:
+                    raise
+                self._count('retries')
+                await asyncio.sleep(backoff_delay(attempt))
+                attempt += 1
+                continue
+
+            self.breaker.record_success()
+            return reply
+
+    async def _hedged(self, request, argument):
+        """The first reply to request(argument), sent twice if the first copy is slow"""
+        acquired = asyncio.Event()
+        first = asyncio.ensure_future(self._send(request, argument, acquired))
+        delay = self.latency.quantile(HEDGE_QUANTILE) if self.hedge else None
+        if delay is None: return await first
+
+        # The hedge clock starts once the first copy holds a concurrency slot:
+        # time spent queued behind other requests is not the backend's latency
+        waiting = asyncio.ensure_future(acquired.wait())
+        try:
+            await asyncio.wait({first, waiting}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            waiting.cancel()
+
+        done, _ = await asyncio.wait({first}, timeout=delay)
+        # A hedge never waits for a concurrency slot or the rate limit: that would only add load
+        if done or self._state().limit.locked() or (self.limiter is not None and not self.limiter.try_take()):
+            return await first
+
+        self._count('hedges')
+        tasks = {first, asyncio.ensure_future(self._send(request, argument))}
+        try:
+            while tasks:
+                done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None: return task.result()
+            return first.result()  # both failed
+        finally:
+            for task in tasks: task.cancel()
+
+    async def _send(self, request, argument, acquired=None):
+        """
+        One request to the backend, given up after self.timeout seconds.
+        acquired (an asyncio.Event) is set once the request holds its
+        concurrency slot.
+        """
+        self._count('requests')
+        async with self._state().limit:
+            if acquired is not None: acquired.set()
+            start = time.monotonic()
+            try:
+                # Backends are blocking and run in a worker thread (the Gemini
+                # SDK's asyncio client is tied to a single event loop). A timed
+                # out thread finishes in the background; its reply is dropped.
+                reply = await asyncio.wait_for(asyncio.to_thread(request, argument), self.timeout)
+            except asyncio.TimeoutError:
+                self._count('timeouts')
+                raise BackendError(f"no reply within {self.timeout:g}s")
+            self.latency.record(time.monotonic() - start)
+            return reply
+
+    async def _fall_back(self, request, argument, usable):
+        """
+        The fallback backend's reply while the circuit is open, if usable(reply);
+        otherwise (a failed, late or unusable reply) None, and the CircuitOpen
+        goes on. Like _send, the request runs in a worker thread within
+        self.timeout. Fallback replies are never cached.
+        """
+        try:
+            reply = (await asyncio.wait_for(asyncio.to_thread(request, argument), self.timeout)).strip()
+        except Exception:
+            return None
+        if not usable(reply): return None
+        self._count('fallbacks')
+        return reply
+
+    def metrics(self):
+        """Request counts and the state of the rate limiter and circuit breaker"""
+        with self._counts_lock:
+            metrics = dict(self.counts)
+        breaker = self.breaker
+        metrics.update(
+            circuit=breaker.state,
+            consecutive_failures=breaker.failures,
+            circuit_opened=breaker.times_opened,
+            rejected=breaker.rejected,
+            rate_limit_wait=self.limiter.waited if self.limiter is not None else 0.0,
+            latency_p95=self.latency.quantile(HEDGE_QUANTILE),
+        )
+        return metrics
+
+    async def _ask_word(self, key, word):
+        """The model's raw answer for a word, shared with identical requests in flight"""
+        state = self._state()
+        while True:
+            future = state.inflight.get(key)
+            if future is None or future.done():
+                future = self._start(state, key, self._request_word(key, word))
+                return await asyncio.shield(future)
+            answer = await asyncio.shield(future)
+            if answer is not None: return answer
+            # A batch in flight did not answer the word: ask for it alone
+
+    async def _request_word(self, key, word):
+        try:
+            result = (await self._generate(self.backend.resolve_word, word)).strip()
+        except CircuitOpen:
+            result = await self._fall_back(self.fallback.resolve_word, word, lambda reply: reply in OPERATOR_SYMBOLS)
+            if result is None: raise
+            return result
+
+        # Only definite answers are cached; malformed replies may succeed next time
+        if self.cache is not None and (result in OPERATOR_SYMBOLS or result == NEGATIVE_ENTRY):
+            self.cache.put(key, result)
+        return result
+
+    async def _request_batch(self, words, futures):
+        """Ask for words (key -> word as written) in one prompt; answer each key's future"""
+        answers = {}
+        try:
+            reply = parse_json_object(await self._generate(self.backend.resolve_words, list(words.values())))
+            answers = {str(word).lower(): str(answer).strip() for word, answer in reply.items()}
+        except Exception:
+            pass
+        finally:
+            for key, future in futures.items():
+                answer = answers.get(key)
+                if answer in OPERATOR_SYMBOLS or answer == NEGATIVE_ENTRY:
+                    if self.cache is not None:
+                        self.cache.put(key, answer)
+                else:
+                    answer = None  # not answered: callers may ask for it alone
+                if not future.done():
+                    future.set_result(answer)
+
+    ###################################
+    # Resolution
+    ###################################
+
+    def cached_resolution(self, word):
+        """(symbol, error) for a word whose answer is cached, else None"""
+        if self.cache is None: return None
+        cached = self.cache.get(word.lower())
+        return self.interpret_symbol(word, cached) if cached is not None else None
+
+    async def resolve_operation_word(self, word):
         """
         Resolve a single word to a mathematical operator symbol.
 
@@ -73,30 +444,99 @@ class GeminiController:
                 - error: Error message or None if successful
 
         Example:
-            >>> resolve_operation_word("sum")
+            >>> await resolve_operation_word("sum")
             ('+', None)
-            >>> resolve_operation_word("gibberish")
+            >>> await resolve_operation_word("gibberish")
             (None, "Unknown operation word: 'gibberish'")
         """
-        try:
-            response = self.model.generate_content(word)
-            result = response.text.strip()
+        cached = self.cached_resolution(word)
+        if cached is not None: return cached
 
-            # Validate response
-            if result in ['+', '-', '*', '/']:
-                return result, None
-            elif result == "ERROR":
-                return None, f"Unknown operation word: '{word}'"
-            else:
-                # LLM returned unexpected format - treat as error
-                return None, f"Cannot resolve '{word}' to a mathematical operation"
+        try:
+            return self.interpret_symbol(word, await self._ask_word(word.lower(), word))
 
-        except exceptions.ResourceExhausted:
+        except CircuitOpen as e:
+            return None, str(e)
+        except (exceptions.ResourceExhausted, QuotaExceeded):
             return None, "LLM quota exceeded. Please try again later."
         except Exception as e:
             return None, f"LLM error: {str(e)}"
 
-    def convert_natural_to_symbolic(self, sentence):
+    async def resolve_operation_words(self, words):
+        """
+        Resolve many words to operator symbols with a single LLM request.
+
+        Cached words are answered locally and words already being asked
+        for by another request wait for that answer; only the rest are
+        sent, together, in one JSON prompt.
+
+        Args:
+            words (iterable): Candidate operation words
+
+        Returns:
+            dict: {word: (symbol, error)} in the same format as
+                resolve_operation_word(). Words the request could not answer
+                (quota, network or malformed reply) are left out, so callers
+                can fall back to resolving them one at a time.
+
+        Example:
+            >>> await resolve_operation_words(["sum", "hello"])
+            {'sum': ('+', None), 'hello': (None, "Unknown operation word: 'hello'")}
+        """
+        results = {}
+        pending = {}  # lowercase key -> words as written
+
+        for word in words:
+            cached = self.cached_resolution(word)
+            if cached is not None:
+                results[word] = cached
+            else:
+                pending.setdefault(word.lower(), []).append(word)
+
+        if not pending: return results
+
+        state = self._state()
+        loop = asyncio.get_running_loop()
+        waiting = {}
+        new = {}  # keys nobody is asking for yet -> their future
+        for key in pending:
+            future = state.inflight.get(key)
+            if future is None or future.done():
+                future = new[key] = loop.create_future()
+                self._track(state, key, future)
+            waiting[key] = future
+        if new:
+            self._keep(state, asyncio.ensure_future(
+                self._request_batch({key: pending[key][0] for key in new}, new)))
+
+        for key, future in waiting.items():
+            try:
+                answer = await asyncio.shield(future)
+            except Exception:
+                continue
+            if answer in OPERATOR_SYMBOLS or answer == NEGATIVE_ENTRY:
+                for word in pending[key]:
+                    results[word] = self.interpret_symbol(word, answer)
+
+        return results
+
+    def interpret_symbol(self, word, result):
+        """Turn a raw LLM (or cached) answer into the (symbol, error) pair."""
+        # Validate response
+        if result in OPERATOR_SYMBOLS:
+            return result, None
+        elif result == NEGATIVE_ENTRY:
+            return None, f"Unknown operation word: '{word}'"
+        else:
+            # LLM returned unexpected format - treat as error
+            return None, f"Cannot resolve '{word}' to a mathematical operation"
+
+    def cached_conversion(self, sentence):
+        """The symbolic expression for a sentence with a cached template, else None"""
+        if self.templates is None: return None
+        return self.templates.lookup(sentence)
+
+    async def convert_natural_to_symbolic(self, sentence):
         """
         Convert a natural language math sentence to symbolic expression.
         Used for the 'calc' prefix command.
@@ -108,43 +548,147 @@ class GeminiController:
             tuple: (symbolic_expression, error)
 
         Example:
-            >>> convert_natural_to_symbolic("what is answer of 10 divided by 2")
+            >>> await convert_natural_to_symbolic("what is answer of 10 divided by 2")
             ("10 / 2", None)
         """
-        prompt = f"""
-        Convert the following natural language math question into a simple symbolic expression.
-
-        Input: "{sentence}"
-
-        Rules:
-        1. Extract ONLY the mathematical expression using symbols: +, -, *, /, (, )
-        2. NO text, NO explanations, ONLY the symbolic expression
-        3. Examples:
-           - "what is 5 plus 3" → "5 + 3"
-           - "what is answer of 10 divided by 2" → "10 / 2"
-           - "calculate 5 times 3 minus 2" → "5 * 3 - 2"
-        4. If not a valid math question, respond with: ERROR
-
-        Output only the symbolic expression:
-        """
+        cached = self.cached_conversion(sentence)
+        if cached is not None: return cached, None
 
         try:
-            response = self.model.generate_content(prompt)
-            result = response.text.strip()
-
-            # Remove any quotes that might be in the response
-            result = result.replace('"', '').replace("'", "")
+            state = self._state()
+            key = ('calc', sentence)
+            future = state.inflight.get(key)
+            if future is None or future.done():
+                future = self._start(state, key, self._request_conversion(sentence))
+            result = await asyncio.shield(future)
 
             if result == "ERROR" or result.startswith("ERROR"):
                 return None, "Cannot convert to symbolic expression"
 
             return result, None
 
-        except exceptions.ResourceExhausted:
+        except CircuitOpen as e:
+            return None, str(e)
+        except (exceptions.ResourceExhausted, QuotaExceeded):
             return None, "LLM quota exceeded. Please try again later."
         except Exception as e:
             return None, f"LLM error: {str(e)}"
 
+    async def _request_conversion(self, sentence):
+        try:
+            result = (await self._generate(self.backend.convert, sentence)).strip()
+        except CircuitOpen:
+            result = await self._fall_back(self.fallback.convert, sentence, lambda reply: not reply.startswith("ERROR"))
+            if result is None: raise
+            return result
+
+        # Remove any quotes that might be in the response
+        result = result.replace('"', '').replace("'", "")
+        if self.templates is not None and not result.startswith("ERROR"):
+            self.templates.store(sentence, result)
+        return result
+
+
+class _BackgroundLoop:
+    """An event loop in a daemon thread, running the blocking API's coroutines"""
+    def __init__(self):
+        self.loop = None
+        self.lock = threading.Lock()
+
+    def submit(self, coro):
+        """Start coro on the loop; returns a concurrent.futures.Future of its result"""
+        with self.lock:
+            if self.loop is None:
+                self.loop = asyncio.new_event_loop()
+                threading.Thread(target=self.loop.run_forever, name='linguaflow-llm', daemon=True).start()
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def run(self, coro, timeout=None):
+        """coro's result; raises TimeoutError (and cancels it) after timeout seconds"""
+        future = self.submit(coro)
+        try:
+            return future.result(timeout)
+        except TimeoutError:
+            # Requests in flight carry on for their other callers and the cache
+            future.cancel()
+            raise
+
+
+_background_loop = _BackgroundLoop()
+
+
+class GeminiController:
+    """
+    Blocking interface to an AsyncGeminiController, for the parser and
+    the REPL. Cached words are answered in the calling thread; requests
+    run on one background event loop shared by all threads, so identical
+    requests from concurrent interpreters are coalesced there.
+    """
+    def __init__(self, api_key=None, cache=None, max_concurrency=None, controller=None, templates=None,
+                 backend=None, fallback=None, breaker=None):
+        """
+        Args:
+            api_key, cache, max_concurrency, templates, backend, fallback,
+            breaker: As for AsyncGeminiController
+            controller: An AsyncGeminiController to use instead of a new one
+        """
+        self.async_controller = controller or AsyncGeminiController(
+            api_key, cache, max_concurrency, templates, backend, fallback, breaker)
+
+    @property
+    def backend(self):
+        return self.async_controller.backend
+
+    @property
+    def model(self):
+        return self.async_controller.model
+
+    @property
+    def batch_model(self):
+        return self.async_controller.batch_model
+
+    @property
+    def cache(self):
+        return self.async_controller.cache
+
+    @cache.setter
+    def cache(self, cache):
+        self.async_controller.cache = cache
+
+    @property
+    def templates(self):
+        return self.async_controller.templates
+
+    @templates.setter
+    def templates(self, templates):
+        self.async_controller.templates = templates
+
+    def resolve_operation_word(self, word, timeout=None):
+        """Blocking AsyncGeminiController.resolve_operation_word (TimeoutError after timeout seconds)"""
+        cached = self.async_controller.cached_resolution(word)
+        if cached is not None: return cached
+        return _background_loop.run(self.async_controller.resolve_operation_word(word), timeout)
+
+    def resolve_operation_words(self, words, timeout=None):
+        """Blocking AsyncGeminiController.resolve_operation_words (TimeoutError after timeout seconds)"""
+        return _background_loop.run(self.async_controller.resolve_operation_words(list(words)), timeout)
+
+    def submit_operation_words(self, words):
+        """Start resolve_operation_words in the background; returns a concurrent.futures.Future"""
+        return _background_loop.submit(self.async_controller.resolve_operation_words(list(words)))
+
+    def interpret_symbol(self, word, result):
+        return self.async_controller.interpret_symbol(word, result)
+
+    def metrics(self):
+        return self.async_controller.metrics()
+
+    def convert_natural_to_symbolic(self, sentence, timeout=None):
+        """Blocking AsyncGeminiController.convert_natural_to_symbolic (TimeoutError after timeout seconds)"""
+        cached = self.async_controller.cached_conversion(sentence)
+        if cached is not None: return cached, None
+        return _background_loop.run(self.async_controller.convert_natural_to_symbolic(sentence), timeout)
+
     # Keep old method for backwards compatibility during transition
     def convert_to_expression(self, natural_language_input):
         """
@@ -171,12 +715,23 @@ class GeminiController:
         """
         try:
             # Simple test
-            response = self.model.generate_content("Output the number 1")
-            return response.text is not None
+            return self.backend.resolve_word("add") is not None
         except Exception as e:
             print(f"Connection test failed: {str(e)}")
             return False
 
+def parse_json_object(text):
+    """Parse a JSON object from an LLM reply, tolerating ```json fences."""
+    text = text.strip()
+    if text.startswith('```'):
+        text = text.strip('`')
+        if text.startswith('json'):
+            text = text[4:]
+    result = json.loads(text)
+    if not isinstance(result, dict):
+        raise ValueError("Expected a JSON object")
+    return result
+
 # Singleton setup remains the same
 _gemini_instance = None
 
@@ -184,4 +739,8 @@ def get_gemini_controller(api_key=None):
     global _gemini_instance
     if _gemini_instance is None:
         _gemini_instance = GeminiController(api_key)
-    return _gemini_instance
\ No newline at end of file
+    return _gemini_instance
+
+def get_async_gemini_controller(api_key=None):
+    """The AsyncGeminiController behind get_gemini_controller(), for asyncio code"""
+    return get_gemini_controller(api_key).async_controller
@@ -0,0 +1,218 @@
+#######################################
+# ITERATIVE INTERPRETER
+# Evaluates the AST with an explicit work
+# stack instead of Python recursion
+#######################################
+
+from basic import (
+    ListNode, NumberNode, BinOpNode, UnaryOpNode, ListOpNode,
+    VarAccessNode, VarAssignNode, FuncDefNode, CallNode,
+    RTResult, RTError, Number, BaseFunction, Function,
+    TT_PLUS, TT_MINUS, TT_MUL, TT_DIV, MAX_CALL_DEPTH,
+)
+from list_fold import fold_list
+from function_memo import function_memo
+
+# Work items are tuples whose first element is one of these
+EVAL        = 0   # (EVAL, node, context): push the value of node
+BINOP       = 1   # (BINOP, node, context): combine the two values on top
+BINOP_LEAF  = 2   # (BINOP_LEAF, node, context): right operand is a leaf, evaluated here
+UNARY       = 3   # (UNARY, node, context)
+DISCARD     = 4   # (DISCARD,): drop a statement's value
+ASSIGN      = 5   # (ASSIGN, node, context)
+CALL        = 6   # (CALL, node, context): callee and arguments are on the value stack
+RETURN      = 7   # (RETURN, memo, key): a function body finished; remember its result under key
+
+LEAF_NODES = (NumberNode, VarAccessNode)
+
+
+def apply_op(op_type, left, right):
+    if op_type == TT_PLUS: return left.added_to(right)
+    if op_type == TT_MINUS: return left.subbed_by(right)
+    if op_type == TT_MUL: return left.multed_by(right)
+    if op_type == TT_DIV: return left.dived_by(right)
+
+
+class IterativeInterpreter:
+    """
+    Same semantics as Interpreter (values, errors and positions), but the
+    AST is walked with a work stack and function calls push their body onto
+    it, so neither deep expressions nor deep call chains grow the Python
+    stack. Memory use is proportional to the nesting depth. Steps are not
+    traced.
+    """
+
+    def run(self, node, context):
+        res = RTResult()
+        values = []
+        work = [(EVAL, node, context)]
+        depth = 0
+
+        while work:
+            item = work.pop()
+            kind = item[0]
+
+            if kind == EVAL:
+                node, context = item[1], item[2]
+                node_type = type(node)
+
+                if node_type is NumberNode:
+                    values.append(Number(node.tok.value).set_context(context).set_pos(node.pos_start, node.pos_end))
+
+                elif node_type is BinOpNode:
+                    # Left operand first, exactly like the recursive interpreter
+                    if isinstance(node.right_node, LEAF_NODES):
+                        work.append((BINOP_LEAF, node, context))
+                    else:
+                        work.append((BINOP, node, context))
+                        work.append((EVAL, node.right_node, context))
+                    work.append((EVAL, node.left_node, context))
+
+                elif node_type is VarAccessNode:
+                    value, error = self.access(node, context)
+                    if error: return res.failure(error)
+                    values.append(value)
+
+                elif node_type is ListNode:
+                    if not node.element_nodes:
+                        values.append(Number(0))
+                        continue
+                    for i in range(len(node.element_nodes) - 1, -1, -1):
+                        work.append((EVAL, node.element_nodes[i], context))
+                        if i > 0: work.append((DISCARD,))
+
+                elif node_type is UnaryOpNode:
+                    work.append((UNARY, node, context))
+                    work.append((EVAL, node.node, context))
+
+                elif node_type is ListOpNode:
+                    if not node.number_nodes:
+                        return res.failure(RTError(
+                            node.pos_start, node.pos_end,
+                            "Cannot perform operation on empty list",
+                            context
+                        ))
+                    value, zero_index = fold_list(node, node.op_tok.type, lambda: [number_node.tok.value for number_node in node.number_nodes])
+                    if zero_index is not None:
+                        zero_node = node.number_nodes[zero_index]
+                        return res.failure(RTError(zero_node.pos_start, zero_node.pos_end, 'Division by zero', context))
+                    values.append(Number(value).set_context(context).set_pos(node.pos_start, node.pos_end))
+
+                elif node_type is VarAssignNode:
+                    work.append((ASSIGN, node, context))
+                    work.append((EVAL, node.value_node, context))
+
+                elif node_type is FuncDefNode:
+                    func_name = node.var_name_tok.value
+                    func_value = Function(func_name, node.body_node, node.arg_name_toks)
+                    func_value.set_context(context).set_pos(node.pos_start, node.pos_end)
+                    context.symbol_table.set(func_name, func_value)
+                    values.append(func_value)
+
+                elif node_type is CallNode:
+                    work.append((CALL, node, context))
+                    for i in range(len(node.arg_nodes) - 1, -1, -1):
+                        work.append((EVAL, node.arg_nodes[i], context))
+                    work.append((EVAL, node.node_to_call, context))
+
+                else:
+                    raise Exception(f'No visit_{node_type.__name__} method defined')
+
+            elif kind == BINOP or kind == BINOP_LEAF:
+                node, context = item[1], item[2]
+                if kind == BINOP_LEAF:
+                    right, error = self.leaf(node.right_node, context)
+                    if error: return res.failure(error)
+                else:
+                    right = values.pop()
+                left = values.pop()
+
+                result, error = apply_op(node.op_tok.type, left, right)
+                if error: return res.failure(error)
+                values.append(result.set_pos(node.pos_start, node.pos_end))
+
+            elif kind == DISCARD:
+                values.pop()
+
+            elif kind == UNARY:
+                node = item[1]
+                number = values.pop()
+                if node.op_tok.type == TT_MINUS:
+                    number, error = number.multed_by(Number(-1))
+                    if error: return res.failure(error)
+                values.append(number.set_pos(node.pos_start, node.pos_end))
+
+            elif kind == ASSIGN:
+                node = item[1]
+                if node.slot is not None:
+                    item[2].symbol_table.values[node.slot] = values[-1]
+                else:
+                    item[2].symbol_table.set(node.var_name_tok.value, values[-1])
+
+            elif kind == CALL:
+                node, context = item[1], item[2]
+                arg_count = len(node.arg_nodes)
+                args = values[len(values) - arg_count:]
+                del values[len(values) - arg_count:]
+                func = values.pop().copy().set_pos(node.pos_start, node.pos_end)
+
+                if not isinstance(func, BaseFunction):
+                    return res.failure(RTError(node.pos_start, node.pos_end, "Identifier is not a function", context))
+
+                if not isinstance(func, Function):
+                    # Other callables run their own execute()
+                    value = res.register(func.execute(args))
+                    if res.error: return res
+                    values.append(value)
+                    continue
+
+                res.register(func.check_args(func.arg_names, args))
+                if res.error: return res
+
+                memo = key = None
+                if func.memoize and not any(isinstance(arg, BaseFunction) for arg in args):
+                    memo = function_memo(func.body_node, func.arg_names)
+                    if memo is not None:
+                        key = memo.key(func, args)
+                        if key is not None:
+                            value = memo.lookup(func, key)
+                            if value is not None:
+                                values.append(value)
+                                continue
+
+                depth += 1
+                if depth > MAX_CALL_DEPTH:
+                    return res.failure(RTError(node.pos_start, node.pos_end, "Maximum call depth exceeded", context))
+
+                exec_ctx = func.generate_new_context()
+                func.populate_args(func.arg_names, args, exec_ctx)
+                work.append((RETURN, memo, key))
+                work.append((EVAL, func.body_node, exec_ctx))
+
+            elif kind == RETURN:
+                depth -= 1
+                if item[2] is not None: item[1].store(item[2], values[-1])
+
+        return res.success(values.pop())
+
+    def access(self, node, context):
+        var_name = node.var_name_tok.value
+        if node.slot is not None:
+            value = context.symbol_table.values[node.slot]
+        else:
+            value = context.symbol_table.get(var_name)
+
+        if value is None:
+            return None, RTError(node.pos_start, node.pos_end, f"'{var_name}' is not defined", context)
+        value = Number(value.value) if type(value) is Number else value.copy()
+        return value.set_pos(node.pos_start, node.pos_end).set_context(context), None
+
+    def leaf(self, node, context):
+        if type(node) is NumberNode:
+            return Number(node.tok.value).set_context(context).set_pos(node.pos_start, node.pos_end), None
+        return self.access(node, context)
+
+
+def run_iterative(node, context):
+    """Execute an AST with the iterative interpreter (returns an RTResult)."""
+    return IterativeInterpreter().run(node, context)
@@ -0,0 +1,139 @@
+#######################################
+# LIST FOLD
+# Evaluates list operations
+# (sum these numbers: [...]) in one step,
+# with NumPy when it is installed
+#######################################
+
+import math
+
+from basic import TT_PLUS, TT_MINUS, TT_MUL, TT_DIV
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional: fold in plain Python
+    np = None
+
+# Lists shorter than this are folded in Python: building the arrays costs
+# more than it saves
+VECTOR_MIN = 32
+
+# Integers up to this size convert to float64 exactly, so NumPy rounds
+# every step the same way Python does
+EXACT_INT = 2 ** 53
+
+ACCUMULATE = {}
+if np is not None:
+    ACCUMULATE = {
+        TT_PLUS: np.add.accumulate,
+        TT_MINUS: np.subtract.accumulate,
+        TT_MUL: np.multiply.accumulate,
+        TT_DIV: np.divide.accumulate,
+    }
+
+
+def fold_numbers(op_type, values):
+    """
+    Apply op_type left to right over a list of numbers, exactly as the
+    Interpreter folds Number objects: ((v0 op v1) op v2) ...
+
+    Returns (result, None), or (None, index) when values[index] is the
+    first zero divisor of a division.
+    """
+    if np is None or len(values) < VECTOR_MIN:
+        return fold_small(op_type, values)
+    return fold_prepared(op_type, values, *prepare(op_type, values))
+
+
+def fold_list(node, op_type, make_values):
+    """
+    fold_numbers for a ListOpNode, which is always folded with the same
+    operator and values. A long list keeps its values and array in
+    node.prepared, so make_values() is only called the first time and the
+    data goes away with the program.
+    """
+    prepared = node.prepared
+    if prepared is None:
+        values = make_values()
+        if np is None or len(values) < VECTOR_MIN:
+            return fold_small(op_type, values)
+        prepared = node.prepared = (values,) + prepare(op_type, values)
+    return fold_prepared(op_type, *prepared)
+
+
+def fold_small(op_type, values):
+    if op_type == TT_DIV:
+        for index in range(1, len(values)):
+            if values[index] == 0:
+                return None, index
+    return fold_python(op_type, values), None
+
+
+def fold_prepared(op_type, values, column, first_float, exact):
+    if op_type == TT_DIV:
+        if column is None:
+            return fold_small(op_type, values)
+        zeros = np.flatnonzero(column[1:] == 0)
+        if len(zeros): return None, int(zeros[0]) + 1
+    return fold_vector(op_type, values, column, first_float, exact), None
+
+
+def prepare(op_type, values):
+    """
+    The float64 column of values (None if an int is beyond float range),
+    the index of the first float, and whether NumPy rounds the fold like
+    Python does. It does when every int it converts fits in 53 bits: the
+    ints after the first float, or all of them for a division (integers
+    before the first float are otherwise folded exactly, in Python).
+    """
+    kinds = list(map(type, values))
+    first_float = kinds.index(float) if float in kinds else len(values)
+    try:
+        column = np.array(values, dtype=np.float64)
+    except OverflowError:
+        return None, first_float, False
+
+    start = 0 if op_type == TT_DIV else first_float
+    exact = int not in kinds[start:] or np.abs(column[start:]).max() <= EXACT_INT
+    return column, first_float, exact
+
+
+def fold_python(op_type, values):
+    result = values[0]
+    if op_type == TT_PLUS:
+        for value in values[1:]: result = result + value
+    elif op_type == TT_MINUS:
+        for value in values[1:]: result = result - value
+    elif op_type == TT_MUL:
+        for value in values[1:]: result = result * value
+    elif op_type == TT_DIV:
+        for value in values[1:]: result = result / value
+    return result
+
+
+def fold_vector(op_type, values, column, first_float, exact):
+    """
+    The float part of the fold runs as one NumPy accumulate, which (unlike
+    np.add.reduce's pairwise summation) keeps the left-to-right rounding.
+    Integers before the first float are folded exactly in Python first,
+    since that is what the Interpreter would compute for them.
+    """
+    if op_type != TT_DIV and first_float == len(values):
+        return fold_exact(op_type, values)   # all integers: an exact int
+    if len(values) == 1:
+        return values[0]
+    if column is None or not exact:
+        return fold_python(op_type, values)
+
+    if op_type != TT_DIV and first_float > 0:
+        column = column[first_float - 1:].copy()
+        column[0] = float(fold_exact(op_type, values[:first_float]))   # OverflowError for huge ints, like Python
+    with np.errstate(all='ignore'):   # overflow gives inf, as in Python
+        return float(ACCUMULATE[op_type](column)[-1])
+
+
+def fold_exact(op_type, ints):
+    """Integer fold of PLUS, MINUS or MUL (builtins, no float rounding)"""
+    if op_type == TT_PLUS: return sum(ints)
+    if op_type == TT_MUL: return math.prod(ints)
+    return ints[0] - sum(ints[1:])
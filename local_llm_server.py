@@ -0,0 +1,143 @@
+#######################################
+# LOCAL LLM SERVER
+# Offline stand-in for the Gemini API,
+# with configurable latency and failures
+#######################################
+
+"""
+Serves the HttpBackend protocol (see resolver_backends.py) with the
+answers of a TableBackend, after a simulated model latency. A share of
+the requests can fail with HTTP 500 (error_rate) or HTTP 429, the quota
+error (quota_rate). Latencies and failures come from a seeded random
+generator, so a run can be repeated.
+
+Usage:
+    python local_llm_server.py [--port 8765] [--latency 0.5] [--jitter 0.2]
+                               [--error-rate 0.0] [--quota-rate 0.0] [--seed 0]
+
+Then run LinguaFlow against it with LINGUAFLOW_RESOLVER=http://127.0.0.1:8765
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from resolver_backends import TableBackend
+
+DEFAULT_PORT = 8765
+
+
+class LatencyProfile:
+    """How long requests take and how often they fail"""
+    def __init__(self, latency=0.5, jitter=0.2, error_rate=0.0, quota_rate=0.0, seed=0):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.quota_rate = quota_rate
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+
+    def draw(self):
+        """(delay in seconds, HTTP status) for the next request"""
+        with self.lock:
+            delay = max(0.0, self.latency + self.random.uniform(-self.jitter, self.jitter))
+            failure = self.random.random()
+        if failure < self.quota_rate: return delay, 429
+        if failure < self.quota_rate + self.error_rate: return delay, 500
+        return delay, 200
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        server = self.server
+        routes = {
+            '/resolve': lambda body: server.backend.resolve_word(body['word']),
+            '/resolve_batch': lambda body: server.backend.resolve_words(body['words']),
+            '/convert': lambda body: server.backend.convert(body['sentence']),
+        }
+        if self.path not in routes:
+            return self.reply(404, {'error': f'No route {self.path}'})
+
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            body = json.loads(self.rfile.read(length).decode('utf-8'))
+            text = routes[self.path](body)
+        except (ValueError, KeyError, TypeError) as e:
+            return self.reply(400, {'error': f'Bad request: {e}'})
+
+        delay, status = server.profile.draw()
+        time.sleep(delay)
+        with server.lock:
+            server.requests += 1
+        if status != 200:
+            return self.reply(status, {'error': 'Simulated failure'})
+        self.reply(200, {'text': text})
+
+    def reply(self, status, body):
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+class StandInServer(ThreadingHTTPServer):
+    """The stand-in server. requests counts the requests answered (or failed)."""
+    daemon_threads = True
+
+    def __init__(self, port=DEFAULT_PORT, profile=None, backend=None, verbose=False):
+        super().__init__(('127.0.0.1', port), StandInHandler)
+        self.profile = profile or LatencyProfile()
+        self.backend = backend or TableBackend()
+        self.verbose = verbose
+        self.requests = 0
+        self.lock = threading.Lock()
+
+    @property
+    def url(self):
+        return f'http://127.0.0.1:{self.server_address[1]}'
+
+
+def start_server(port=0, backend=None, **profile):
+    """
+    Serve in a daemon thread (port 0 picks a free port), answering with
+    backend (default: a TableBackend). Other keyword arguments are the
+    LatencyProfile. Returns the StandInServer; stop it with shutdown()
+    and server_close().
+    """
+    server = StandInServer(port, LatencyProfile(**profile), backend)
+    threading.Thread(target=server.serve_forever, name='linguaflow-stand-in', daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Offline stand-in for the LinguaFlow LLM resolver.')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--latency', type=float, default=0.5, help='mean seconds per request')
+    parser.add_argument('--jitter', type=float, default=0.2, help='latency varies by up to this much')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='share of requests failing with HTTP 500')
+    parser.add_argument('--quota-rate', type=float, default=0.0, help='share of requests failing with HTTP 429')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    profile = LatencyProfile(args.latency, args.jitter, args.error_rate, args.quota_rate, args.seed)
+    server = StandInServer(args.port, profile, verbose=True)
+    print(f"Serving on {server.url} (LINGUAFLOW_RESOLVER={server.url})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
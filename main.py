@@ -1,21 +1,23 @@
+import argparse
 import basic
 import sys
 import os
 from dotenv import load_dotenv
 from help_rules import print_help, print_rules_summary
 from gemini_controller import get_gemini_controller
+from program_cache import open_program_cache
 
 # Load environment variables
 load_dotenv()
 
-def run_code(text, filename, symbol_table):
-    """Execute LinguaFlow code and return result."""
+def run_code(text, filename, symbol_table, cache=None, mode='full'):
+    """Execute LinguaFlow code and return result (mode: see basic.OUTPUT_MODES)."""
     # Handle "calc" prefix logic for natural language conversion
     if text.lower().startswith('calc '):
         natural_query = text[5:].strip()
         try:
             gemini = get_gemini_controller()
-            symbolic_expr, error = gemini.convert_natural_to_symbolic(natural_query)
+            symbolic_expr, error = gemini.convert_natural_to_symbolic(natural_query, timeout=basic.Parser.resolution_budget)
 
             if error:
                 print(f"Error: {error}")
@@ -23,16 +25,19 @@ def run_code(text, filename, symbol_table):
 
             print(f"\n[Natural Language Conversion] '{natural_query}' -> '{symbolic_expr}'")
             text = symbolic_expr
+        except TimeoutError:
+            print(f"Error: no conversion within the {basic.Parser.resolution_budget:g}s resolution budget")
+            return None, None
         except Exception as e:
             print(f"Error converting natural language: {str(e)}")
             return None, None
 
     # Run Interpreter
-    result, error = basic.run(filename, text, symbol_table)
+    result, error = basic.run(filename, text, symbol_table, cache=cache, mode=mode)
     return result, error
 
 
-def run_file(filepath):
+def run_file(filepath, mode='full'):
     """Execute a .lf file."""
     if not os.path.exists(filepath):
         print(f"Error: File '{filepath}' not found.")
@@ -58,8 +63,8 @@ def run_file(filepath):
     filename = os.path.basename(filepath)
     print(f"\n[Running {filename}]\n")
 
-    # Execute the code
-    result, error = run_code(code, filepath, symbol_table)
+    # Execute the code (compiled scripts are reused while the file is unchanged)
+    result, error = run_code(code, filepath, symbol_table, cache=open_program_cache(), mode=mode)
 
     if error:
         print("\n" + "!" * 60)
@@ -74,7 +79,7 @@ def run_file(filepath):
         print("=" * 60 + "\n")
 
 
-def run_repl():
+def run_repl(mode='full'):
     """Run interactive REPL mode."""
     # Display startup banner
     print("\n" + "="*60)
@@ -110,7 +115,7 @@ def run_repl():
             continue
 
         # Run the code
-        result, error = run_code(text, '<stdin>', global_symbol_table)
+        result, error = run_code(text, '<stdin>', global_symbol_table, mode=mode)
 
         if error:
             print("\n" + "!" * 60)
@@ -125,9 +130,26 @@ def run_repl():
 
 
 if __name__ == '__main__':
-    if len(sys.argv) > 1:
+    arg_parser = argparse.ArgumentParser(description="LinguaFlow - Natural Command Interpreter")
+    arg_parser.add_argument('file', nargs='?', help="a .lf script to run (omit for the REPL)")
+    output = arg_parser.add_mutually_exclusive_group()
+    output.add_argument('--quiet', dest='mode', action='store_const', const='quiet',
+                        help="show only the result")
+    output.add_argument('--summary', dest='mode', action='store_const', const='summary',
+                        help="show the tokens and syntax tree")
+    output.add_argument('--trace', dest='mode', action='store_const', const='full',
+                        help="show the tokens, syntax tree and every evaluation step (default)")
+    arg_parser.add_argument('--resolution-budget', type=float, metavar='SECONDS',
+                            help=f"time a program may wait for the LLM in total (default {basic.Parser.resolution_budget:g})")
+    arg_parser.set_defaults(mode='full')
+    args = arg_parser.parse_args()
+
+    if args.resolution_budget is not None:
+        basic.Parser.resolution_budget = args.resolution_budget
+
+    if args.file:
         # File mode: python main.py script.lf
-        run_file(sys.argv[1])
+        run_file(args.file, mode=args.mode)
     else:
         # REPL mode: python main.py
-        run_repl()
\ No newline at end of file
+        run_repl(mode=args.mode)
\ No newline at end of file
@@ -0,0 +1,290 @@
+#######################################
+# NATIVE COMPILER
+# Compiles function bodies to real Python
+# functions with compile()
+#######################################
+
+import math
+import weakref
+
+from basic import (
+    ListNode, VarAssignNode,
+    Number, BaseFunction, Context, SymbolTable, RTError,
+    TT_PLUS, TT_MINUS, TT_MUL, TT_DIV,
+)
+
+#######################################
+# RUNTIME SUPPORT
+#######################################
+
+class NativeFault(Exception):
+    """
+    Runtime error raised by generated code.
+
+    Carries either a span index plus message (turned into an RTError by
+    NativeBody.call) or an RTError already produced by a nested call.
+    """
+    def __init__(self, span_idx=None, details=None, error=None):
+        super().__init__(details)
+        self.span_idx = span_idx
+        self.details = details
+        self.error = error
+
+
+class NativeFallback(Exception):
+    """A value the fast path cannot represent (e.g. a function used as a number)."""
+
+
+class NativeFrame:
+    """State of one native call: its context and, if needed, a symbol table."""
+    __slots__ = ('func', 'context', 'spans')
+
+    def __init__(self, func, context, spans):
+        self.func = func
+        self.context = context
+        self.spans = spans
+
+    def scope(self, local_values):
+        # Callees see the caller's variables (dynamic scoping), so the
+        # locals are published in a SymbolTable, built only when a call happens
+        if not hasattr(self.context, 'symbol_table'):
+            self.context.symbol_table = SymbolTable(self.func.context.symbol_table)
+        symbols = self.context.symbol_table.symbols
+        for name, value in local_values.items():
+            symbols[name] = Number(value).set_context(self.context)
+        return self.context.symbol_table
+
+
+def _div(left, right, span_idx):
+    if right == 0: raise NativeFault(span_idx, 'Division by zero')
+    return left / right
+
+
+def _fail(span_idx, details):
+    raise NativeFault(span_idx, details)
+
+
+def _load(frame, name, span_idx):
+    value = frame.func.context.symbol_table.get(name)
+    if value is None: raise NativeFault(span_idx, f"'{name}' is not defined")
+    if isinstance(value, BaseFunction): raise NativeFallback()
+    return value.value
+
+
+def _callee(frame, local_values, name, span_idx):
+    value = frame.scope(local_values).get(name)
+    if value is None: raise NativeFault(span_idx, f"'{name}' is not defined")
+    return value
+
+
+def _invoke(frame, func, args, span_idx):
+    if not isinstance(func, BaseFunction):
+        raise NativeFault(span_idx, "Identifier is not a function")
+
+    node = frame.spans[span_idx]
+    callee = func.copy().set_pos(node.pos_start, node.pos_end).set_context(frame.context)
+    res = callee.execute([Number(arg).set_context(frame.context) for arg in args])
+    if res.error: raise NativeFault(error=res.error)
+    if isinstance(res.value, BaseFunction): raise NativeFallback()
+    return res.value.value
+
+
+RUNTIME = {
+    '_div': _div, '_fail': _fail, '_load': _load,
+    '_callee': _callee, '_invoke': _invoke,
+}
+
+#######################################
+# CODE GENERATION
+#######################################
+
+class Unsupported(Exception):
+    """The body uses something the native backend does not compile."""
+
+
+# Python precedence levels of the generated expressions
+PREC_SUM, PREC_PRODUCT, PREC_UNARY, PREC_ATOM = 1, 2, 3, 4
+
+BINARY_OPS = {
+    TT_PLUS: ('+', PREC_SUM),
+    TT_MINUS: ('-', PREC_SUM),
+    TT_MUL: ('*', PREC_PRODUCT),
+}
+
+
+class NativeCompiler:
+    """
+    Generates Python source for a function body.
+
+    Bodies are straight-line code, so every name can be classified while
+    generating: parameters and variables already created in the body are
+    Python locals, anything else is looked up in the caller's scope.
+    """
+
+    def __init__(self, params):
+        self.params = list(params)
+        self.locals = set(params)
+        self.spans = []
+        self.result_node = None  # node whose span the returned Number carries
+
+    def local(self, name):
+        return f'v_{name}'
+
+    def add_span(self, node):
+        self.spans.append(node)
+        return len(self.spans) - 1
+
+    def generate(self, body_node):
+        if not isinstance(body_node, ListNode): raise Unsupported()
+
+        args = ''.join(f', {self.local(name)}' for name in self.params)
+        lines = [f'def native_body(__frame{args}):']
+
+        statements = body_node.element_nodes
+        if not statements:
+            lines.append('    return 0')
+
+        for i, node in enumerate(statements):
+            last = i == len(statements) - 1
+            if last:
+                self.result_node = node.value_node if isinstance(node, VarAssignNode) else node
+            if isinstance(node, VarAssignNode):
+                name = node.var_name_tok.value
+                lines.append(f'    {self.local(name)} = {self.expr(node.value_node)}')
+                self.locals.add(name)
+                if last: lines.append(f'    return {self.local(name)}')
+            elif last:
+                lines.append(f'    return {self.expr(node)}')
+            else:
+                lines.append(f'    {self.expr(node)}')
+
+        return '\n'.join(lines) + '\n'
+
+    def expr(self, node):
+        code, _ = self.visit(node)
+        return code
+
+    def operand(self, node, min_prec):
+        code, prec = self.visit(node)
+        return code if prec >= min_prec else f'({code})'
+
+    def visit(self, node):
+        method = getattr(self, f'gen_{type(node).__name__}', None)
+        if method is None: raise Unsupported()
+        return method(node)
+
+    def gen_NumberNode(self, node):
+        value = node.tok.value
+        if isinstance(value, float) and not math.isfinite(value):
+            return f'float({str(value)!r})', PREC_ATOM  # inf has no literal
+        return repr(value), PREC_ATOM
+
+    def gen_VarAccessNode(self, node):
+        name = node.var_name_tok.value
+        if name in self.locals:
+            return self.local(name), PREC_ATOM
+        return f'_load(__frame, {name!r}, {self.add_span(node)})', PREC_ATOM
+
+    def gen_BinOpNode(self, node):
+        if node.op_tok.type == TT_DIV:
+            left, right = self.expr(node.left_node), self.expr(node.right_node)
+            return f'_div({left}, {right}, {self.add_span(node.right_node)})', PREC_ATOM
+
+        symbol, prec = BINARY_OPS[node.op_tok.type]
+        # Left-associative: the left side may share our precedence, the right may not
+        left = self.operand(node.left_node, prec)
+        right = self.operand(node.right_node, prec + 1)
+        return f'{left} {symbol} {right}', prec
+
+    def gen_UnaryOpNode(self, node):
+        if node.op_tok.type == TT_MINUS:
+            return f'-{self.operand(node.node, PREC_UNARY)}', PREC_UNARY
+        return self.visit(node.node)
+
+    def gen_ListOpNode(self, node):
+        if not node.number_nodes:
+            return f"_fail({self.add_span(node)}, 'Cannot perform operation on empty list')", PREC_ATOM
+
+        # Left-to-right fold, exactly like the interpreter
+        code, prec = self.visit(node.number_nodes[0])
+        for number_node in node.number_nodes[1:]:
+            if node.op_tok.type == TT_DIV:
+                code = f'_div({code}, {self.expr(number_node)}, {self.add_span(number_node)})'
+                prec = PREC_ATOM
+            else:
+                symbol, op_prec = BINARY_OPS[node.op_tok.type]
+                left = code if prec >= op_prec else f'({code})'
+                code = f'{left} {symbol} {self.operand(number_node, op_prec + 1)}'
+                prec = op_prec
+        return code, prec
+
+    def gen_CallNode(self, node):
+        name = node.node_to_call.var_name_tok.value
+        local_values = '{' + ', '.join(f'{n!r}: {self.local(n)}' for n in sorted(self.locals)) + '}'
+        callee = f'_callee(__frame, {local_values}, {name!r}, {self.add_span(node.node_to_call)})'
+        args = ''.join(f'{self.expr(arg)}, ' for arg in node.arg_nodes)
+        return f'_invoke(__frame, {callee}, ({args}), {self.add_span(node)})', PREC_ATOM
+
+#######################################
+# COMPILED BODIES
+#######################################
+
+class NativeBody:
+    """A function body compiled to a Python function."""
+
+    def __init__(self, function, spans, result_node, source):
+        self.function = function
+        self.spans = spans
+        self.result_node = result_node
+        self.source = source
+
+    def call(self, func, args):
+        """
+        Run the body for Function func with argument values args.
+
+        Returns (value, error); value is None when the call must be
+        redone by the tree-walking interpreter.
+        """
+        exec_ctx = Context(func.name, func.context, func.pos_start)
+        frame = NativeFrame(func, exec_ctx, self.spans)
+
+        try:
+            result = self.function(frame, *[arg.value for arg in args])
+        except NativeFault as fault:
+            if fault.error: return None, fault.error
+            node = self.spans[fault.span_idx]
+            return None, RTError(node.pos_start, node.pos_end, fault.details, exec_ctx)
+        except NativeFallback:
+            return None, None
+
+        value = Number(result).set_context(exec_ctx)
+        if self.result_node is not None:
+            value.set_pos(self.result_node.pos_start, self.result_node.pos_end)
+        return value, None
+
+
+# body ListNode -> NativeBody or None; an entry goes away with its program
+_native_bodies = weakref.WeakKeyDictionary()
+
+def native_body(body_node, arg_name_toks):
+    """Compile (once) and return the NativeBody for a function, or None if unsupported."""
+    try:
+        return _native_bodies[body_node]
+    except KeyError:
+        native = _native_bodies[body_node] = compile_body(body_node, arg_name_toks)
+        return native
+
+
+def compile_body(body_node, arg_name_toks):
+    params = [tok.value for tok in arg_name_toks]
+    if len(set(params)) != len(params): return None  # repeated parameter names
+
+    compiler = NativeCompiler(params)
+    try:
+        source = compiler.generate(body_node)
+        namespace = dict(RUNTIME)
+        exec(compile(source, '<linguaflow native>', 'exec'), namespace)
+    except (Unsupported, SyntaxError, RecursionError, MemoryError):
+        return None
+
+    return NativeBody(namespace['native_body'], compiler.spans, compiler.result_node, source)
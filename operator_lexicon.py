@@ -0,0 +1,95 @@
+#######################################
+# OPERATOR LEXICON
+# Offline resolution of common operation words
+# (runs before the LLM is consulted)
+#######################################
+
+# Curated synonyms for each operator. Keep entries unambiguous: a word
+# that could plausibly mean two operations belongs to the LLM.
+OPERATOR_LEXICON = {
+    '+': [
+        'add', 'adds', 'added', 'adding', 'addition', 'plus', 'sum', 'total',
+        'accumulate', 'aggregate', 'combine', 'increase', 'increment',
+    ],
+    '-': [
+        'subtract', 'subtracts', 'subtracted', 'subtracting', 'subtraction',
+        'minus', 'difference', 'take', 'remove', 'deduct', 'decrease', 'decrement',
+    ],
+    '*': [
+        'multiply', 'multiplies', 'multiplied', 'multiplying', 'multiplication',
+        'times', 'product',
+    ],
+    '/': [
+        'divide', 'divides', 'divided', 'dividing', 'division', 'split',
+        'quotient',
+    ],
+}
+
+# Shorter words are never treated as typos: dropping or swapping a letter
+# of a synonym too often gives an ordinary word ('time', 'spit', 'mins')
+MIN_TYPO_LENGTH = 5
+
+
+def deletions(word):
+    """All strings made by deleting one character of word."""
+    return {word[:i] + word[i + 1:] for i in range(len(word))}
+
+
+def transpositions(word):
+    """All strings made by swapping two adjacent characters of word."""
+    return {word[:i] + word[i + 1] + word[i] + word[i + 2:] for i in range(len(word) - 1)}
+
+
+class OperatorLexicon:
+    """
+    Exact and typo-tolerant lookup of operation words.
+
+    Only the two typos that seldom turn one real word into another are
+    accepted: a synonym missing one letter ('multipy') or with two adjacent
+    letters swapped ('mutliply'). Other near misses, such as a changed or
+    added letter, are as likely to be identifiers ('timer', 'plush',
+    'dividend') and are left to the LLM.
+
+    Missing letters are found with a deletion index: every lexicon word is
+    indexed under each of its one-letter deletions.
+    """
+
+    def __init__(self, lexicon=OPERATOR_LEXICON):
+        self.symbols = {}
+        for symbol, words in lexicon.items():
+            for word in words:
+                self.symbols[word] = symbol
+
+        self.index = {}
+        for word in self.symbols:
+            for deleted in deletions(word):
+                self.index.setdefault(deleted, set()).add(word)
+
+    def lookup(self, word):
+        """
+        Return '+', '-', '*' or '/' if word confidently names an operation,
+        otherwise None (the caller should ask the LLM).
+        """
+        word = word.lower()
+        symbol = self.symbols.get(word)
+        if symbol is not None: return symbol
+        if len(word) < MIN_TYPO_LENGTH: return None
+
+        candidates = set(self.index.get(word, ()))
+        candidates.update(swapped for swapped in transpositions(word) if swapped in self.symbols)
+        symbols = {self.symbols[candidate] for candidate in candidates}
+
+        # Only answer when every match agrees on the operator
+        if len(symbols) == 1:
+            return symbols.pop()
+        return None
+
+
+_default_lexicon = None
+
+def lookup_operator(word):
+    """Resolve word against the built-in lexicon (see OperatorLexicon.lookup)."""
+    global _default_lexicon
+    if _default_lexicon is None:
+        _default_lexicon = OperatorLexicon()
+    return _default_lexicon.lookup(word)
@@ -0,0 +1,144 @@
+#######################################
+# OPTIMIZER
+# AST -> AST passes run between parsing
+# and execution
+#######################################
+
+from copy import copy as shallow_copy
+
+from basic import (
+    Token, ListNode, NumberNode, BinOpNode, UnaryOpNode, ListOpNode,
+    VarAssignNode, FuncDefNode, CallNode,
+    TT_INT, TT_FLOAT, TT_PLUS, TT_MINUS, TT_MUL, TT_DIV,
+)
+
+def apply_op(op_type, left, right):
+    """
+    Evaluate one operation exactly as Number does. Returns None when the
+    operation must stay for the runtime (division by zero, overflow).
+    """
+    if op_type == TT_PLUS: return left + right
+    if op_type == TT_MINUS: return left - right
+    if op_type == TT_MUL: return left * right
+    if op_type == TT_DIV:
+        if right == 0: return None
+        try:
+            return left / right
+        except OverflowError:
+            return None
+
+
+def is_numeric(node):
+    """
+    True for nodes that always evaluate to a plain Number (never a Function)
+    and whose own span appears in no error, so an identity like x * 1 may
+    return them unchanged.
+    """
+    if isinstance(node, UnaryOpNode): return node.op_tok.type == TT_MINUS
+    if isinstance(node, ListOpNode): return bool(node.number_nodes)
+    return isinstance(node, BinOpNode)
+
+
+def is_literal(node, value):
+    # Exactly the int literal: 1.0 would turn an int operand into a float
+    return isinstance(node, NumberNode) and type(node.tok.value) is int and node.tok.value == value
+
+
+class ConstantFolder:
+    """
+    Folds constant subtrees into NumberNodes and removes the identities
+    x * 1, 1 * x and x - 0.
+
+    Folding uses the same Python arithmetic as the interpreter, so results
+    are bit-identical. x + 0 is deliberately kept: -0.0 + 0 is 0.0. Division
+    by a constant zero is never folded, so the error is still raised at run
+    time with the divisor's span. Nodes are never modified in place; unchanged
+    subtrees are shared with the input.
+    """
+
+    def __init__(self):
+        self.folded = 0
+
+    def fold(self, node):
+        method = getattr(self, f'fold_{type(node).__name__}', None)
+        return method(node) if method else node
+
+    def constant(self, value, node):
+        self.folded += 1
+        tok_type = TT_INT if isinstance(value, int) else TT_FLOAT
+        tok = Token(tok_type, value)
+        tok.set_span(node, node)
+        return NumberNode(tok)
+
+    def respan(self, kept, node):
+        # The simplified expression still spans the whole original one
+        copy = shallow_copy(kept)
+        copy.set_span(node, node)
+        copy.pos_start, copy.pos_end = node.pos_start, node.pos_end
+        self.folded += 1
+        return copy
+
+    def fold_ListNode(self, node):
+        elements = [self.fold(element) for element in node.element_nodes]
+        if all(new is old for new, old in zip(elements, node.element_nodes)): return node
+        return ListNode(elements)
+
+    def fold_BinOpNode(self, node):
+        left, right = self.fold(node.left_node), self.fold(node.right_node)
+        op_type = node.op_tok.type
+
+        if isinstance(left, NumberNode) and isinstance(right, NumberNode):
+            value = apply_op(op_type, left.tok.value, right.tok.value)
+            if value is not None: return self.constant(value, node)
+
+        if op_type == TT_MUL and is_literal(right, 1) and is_numeric(left):
+            return self.respan(left, node)
+        if op_type == TT_MUL and is_literal(left, 1) and is_numeric(right):
+            return self.respan(right, node)
+        if op_type == TT_MINUS and is_literal(right, 0) and is_numeric(left):
+            return self.respan(left, node)
+
+        if left is node.left_node and right is node.right_node: return node
+        return BinOpNode(left, node.op_tok, right)
+
+    def fold_UnaryOpNode(self, node):
+        operand = self.fold(node.node)
+        if isinstance(operand, NumberNode):
+            value = operand.tok.value * -1 if node.op_tok.type == TT_MINUS else operand.tok.value
+            return self.constant(value, node)
+
+        if operand is node.node: return node
+        return UnaryOpNode(node.op_tok, operand)
+
+    def fold_ListOpNode(self, node):
+        numbers = [self.fold(number) for number in node.number_nodes]
+        if numbers and all(isinstance(number, NumberNode) for number in numbers):
+            value = numbers[0].tok.value
+            for number in numbers[1:]:
+                value = apply_op(node.op_tok.type, value, number.tok.value)
+                if value is None: break
+            else:
+                return self.constant(value, node)
+
+        if all(new is old for new, old in zip(numbers, node.number_nodes)): return node
+        return ListOpNode(node.op_tok, numbers)
+
+    def fold_VarAssignNode(self, node):
+        value = self.fold(node.value_node)
+        if value is node.value_node: return node
+        return VarAssignNode(node.var_name_tok, value)
+
+    def fold_FuncDefNode(self, node):
+        body = self.fold(node.body_node)
+        if body is node.body_node: return node
+        return FuncDefNode(node.var_name_tok, node.arg_name_toks, body)
+
+    def fold_CallNode(self, node):
+        args = [self.fold(arg) for arg in node.arg_nodes]
+        if all(new is old for new, old in zip(args, node.arg_nodes)): return node
+        return CallNode(node.node_to_call, args)
+
+
+def fold_constants(node):
+    """Return an equivalent AST with constant subtrees folded (see ConstantFolder)."""
+    return ConstantFolder().fold(node)
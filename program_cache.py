@@ -0,0 +1,156 @@
+#######################################
+# PROGRAM CACHE
+# Compiled (lexed, parsed and resolved)
+# programs stored as .lfc files
+#######################################
+
+import hashlib
+import os
+import pickle
+import sys
+import tempfile
+import time
+
+from resolver_cache import caching_disabled, default_cache_dir, env_number, DEFAULT_TTL
+
+# Every .lfc file starts with this header
+LFC_MAGIC = b'LFC1\n'
+
+# Compiled programs kept; the least recently used beyond this are removed
+DEFAULT_MAX_PROGRAMS = 500
+
+
+class ProgramCache:
+    """
+    Directory of compiled programs, one `<sha256>.lfc` file per program.
+
+    A file holds the pickled tokens and AST after operator words have been
+    resolved (and after constant folding, when enabled), so a cache hit
+    skips lexing, parsing and every LLM request. The key covers everything
+    the AST depends on: the source text and file name, the names already
+    bound in the symbol table and its parents, the optimize and flat flags, the interpreter
+    version and the Python version.
+
+    Unreadable, corrupt or stale files are treated as misses, and write
+    failures are ignored: the program is simply compiled again.
+
+    Like the resolver cache, the directory is bounded: a hit refreshes the
+    file's modification time, and each store removes files unused for `ttl`
+    seconds and then the least recently used beyond `max_entries`.
+    """
+
+    def __init__(self, directory=None, ttl=DEFAULT_TTL, max_entries=DEFAULT_MAX_PROGRAMS, clock=time.time):
+        self.directory = directory or os.path.join(default_cache_dir(), 'programs')
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.clock = clock
+
+    def key(self, fn, text, symbol_table, optimize=False, flat=False):
+        from basic import INTERPRETER_VERSION
+
+        names = sorted(symbol_table.names()) if symbol_table is not None else []
+        digest = hashlib.sha256()
+        parts = (INTERPRETER_VERSION, sys.version, fn, str(bool(optimize)), str(bool(flat)), '\0'.join(names), text)
+        for part in parts:
+            digest.update(part.encode('utf-8', 'surrogatepass'))
+            digest.update(b'\0\0')
+        return digest.hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.directory, f'{key}.lfc')
+
+    def load(self, key):
+        """Return (tokens, ast_node) stored under key, or None on a miss."""
+        try:
+            with open(self.path(key), 'rb') as f:
+                data = f.read()
+        except OSError:
+            return None
+
+        if not data.startswith(LFC_MAGIC): return None
+        try:
+            tokens, node = pickle.loads(data[len(LFC_MAGIC):])
+        except Exception:
+            return None
+
+        try:
+            now = self.clock()
+            os.utime(self.path(key), (now, now))
+        except OSError:
+            pass
+        return tokens, node
+
+    def store(self, key, tokens, node):
+        """Write a compiled program; readers never see a partial file."""
+        tmp_path = None
+        try:
+            data = LFC_MAGIC + pickle.dumps((tokens, node), protocol=pickle.HIGHEST_PROTOCOL)
+            os.makedirs(self.directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, self.path(key))
+            tmp_path = None
+            now = self.clock()
+            os.utime(self.path(key), (now, now))
+            self.evict()
+        except (OSError, pickle.PicklingError, RecursionError):
+            pass
+        finally:
+            if tmp_path is not None:
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+
+    def evict(self):
+        """Remove expired files, then the least recently used beyond max_entries"""
+        try:
+            names = [name for name in os.listdir(self.directory) if name.endswith('.lfc')]
+        except OSError:
+            return
+
+        files = []
+        for name in names:
+            path = os.path.join(self.directory, name)
+            try:
+                files.append((os.stat(path).st_mtime, path))
+            except OSError:
+                pass
+        files.sort(reverse=True)
+
+        now = self.clock()
+        for i, (used, path) in enumerate(files):
+            expired = self.ttl is not None and now - used > self.ttl
+            if expired or (self.max_entries is not None and i >= self.max_entries):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    def clear(self):
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return
+        for name in names:
+            if name.endswith('.lfc'):
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except OSError:
+                    pass
+
+
+def open_program_cache():
+    """
+    Open the shared compiled-program cache.
+
+    Returns None when caching is turned off with LINGUAFLOW_CACHE=off.
+    Files unused for LINGUAFLOW_CACHE_TTL seconds are removed, as are the
+    least recently used beyond LINGUAFLOW_PROGRAM_CACHE_MAX_ENTRIES.
+    """
+    if caching_disabled(): return None
+    return ProgramCache(
+        ttl=env_number('LINGUAFLOW_CACHE_TTL', DEFAULT_TTL),
+        max_entries=env_number('LINGUAFLOW_PROGRAM_CACHE_MAX_ENTRIES', DEFAULT_MAX_PROGRAMS, int),
+    )
@@ -0,0 +1,147 @@
+#######################################
+# RESILIENCE
+# Rate limiting, backoff and circuit breaking
+# for requests to the resolver backend
+#######################################
+
+import random
+import threading
+import time
+from collections import deque
+
+# Requests per minute allowed by the Gemini quota (override with LINGUAFLOW_LLM_RPM)
+DEFAULT_GEMINI_RPM = 60
+DEFAULT_BURST = 10
+
+DEFAULT_FAILURE_THRESHOLD = 5   # consecutive failures that open the circuit
+DEFAULT_COOLDOWN = 30.0         # seconds the circuit stays open
+DEFAULT_RETRIES = 2
+BACKOFF_BASE = 0.5
+BACKOFF_CAP = 8.0
+
+# Seconds a single request may take (override with LINGUAFLOW_LLM_TIMEOUT)
+DEFAULT_REQUEST_TIMEOUT = 20.0
+# A duplicate request is sent once the first is slower than this share of recent ones
+HEDGE_QUANTILE = 0.95
+LATENCY_WINDOW = 200
+MIN_LATENCY_SAMPLES = 20
+
+
+class CircuitOpen(Exception):
+    """A request refused without being sent, while the backend is failing"""
+
+
+class TokenBucket:
+    """
+    Client-side rate limit: `rate` requests per second on average, with
+    bursts of up to `burst`. reserve() takes a token and returns how long
+    the caller must wait before sending; tokens may be owed, so callers
+    queue up in order instead of polling. Shared by threads and event
+    loops alike.
+    """
+    def __init__(self, rate, burst=DEFAULT_BURST, clock=time.monotonic):
+        self.rate = rate
+        self.burst = burst
+        self.clock = clock
+        self.tokens = float(burst)
+        self.updated = clock()
+        self.waited = 0.0  # total seconds of delay handed out
+        self.lock = threading.Lock()
+
+    def reserve(self):
+        with self.lock:
+            now = self.clock()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+            self.waited += wait
+            return wait
+
+    def try_take(self):
+        """Take a token only if one is available now"""
+        with self.lock:
+            now = self.clock()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens < 1: return False
+            self.tokens -= 1
+            return True
+
+
+class CircuitBreaker:
+    """
+    Stops requests to a failing backend. After `threshold` consecutive
+    failures the circuit opens and check() raises CircuitOpen for
+    `cooldown` seconds. Then it is half-open: a single trial request goes
+    through, and its outcome closes the circuit or opens it again.
+    """
+    CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half-open'
+
+    def __init__(self, threshold=DEFAULT_FAILURE_THRESHOLD, cooldown=DEFAULT_COOLDOWN, clock=time.monotonic):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.clock = clock
+        self.state = self.CLOSED
+        self.failures = 0       # consecutive
+        self.opened_at = None
+        self.trial = False      # a half-open trial request is in flight
+        self.times_opened = 0
+        self.rejected = 0
+        self.lock = threading.Lock()
+
+    def check(self):
+        """Raise CircuitOpen unless a request may be sent now"""
+        with self.lock:
+            if self.state == self.OPEN and self.clock() - self.opened_at >= self.cooldown:
+                self.state = self.HALF_OPEN
+            if self.state == self.CLOSED: return
+            if self.state == self.HALF_OPEN and not self.trial:
+                self.trial = True
+                return
+            self.rejected += 1
+            retry_in = max(0.0, self.opened_at + self.cooldown - self.clock())
+            raise CircuitOpen(f"LLM unavailable after repeated failures; retrying in {retry_in:.0f}s")
+
+    def record_success(self):
+        with self.lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self.trial = False
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            self.trial = False
+            if self.state == self.HALF_OPEN or self.failures >= self.threshold:
+                if self.state != self.OPEN: self.times_opened += 1
+                self.state = self.OPEN
+                self.opened_at = self.clock()
+
+    @property
+    def is_open(self):
+        return self.state == self.OPEN
+
+
+class LatencyTracker:
+    """Durations of the latest successful requests"""
+    def __init__(self, window=LATENCY_WINDOW, min_samples=MIN_LATENCY_SAMPLES):
+        self.samples = deque(maxlen=window)
+        self.min_samples = min_samples
+        self.lock = threading.Lock()
+
+    def record(self, seconds):
+        with self.lock:
+            self.samples.append(seconds)
+
+    def quantile(self, q):
+        """The q quantile of recent durations, or None until there are min_samples"""
+        with self.lock:
+            if len(self.samples) < self.min_samples: return None
+            ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def backoff_delay(attempt, base=BACKOFF_BASE, cap=BACKOFF_CAP, rand=random.random):
+    """Seconds to wait before retry number attempt (0, 1, ...): exponential, full jitter"""
+    return rand() * min(cap, base * 2 ** attempt)
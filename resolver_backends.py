@@ -0,0 +1,171 @@
+#######################################
+# RESOLVER BACKENDS
+# Services answering the controller's requests:
+# Gemini, a local table, or an HTTP server
+#######################################
+
+import os
+import re
+import abc
+import json
+import urllib.error
+import urllib.request
+
+from operator_lexicon import OperatorLexicon
+
+OPERATOR_SYMBOLS = ['+', '-', '*', '/']
+
+
+class QuotaExceeded(Exception):
+    """The backend refused a request for lack of quota (like HTTP 429)"""
+
+
+class BackendError(Exception):
+    """The backend failed to answer a request (worth another try)"""
+
+
+class BackendRejected(Exception):
+    """The backend refused a request (like HTTP 400) or sent an unreadable reply"""
+
+
+class ResolverBackend(abc.ABC):
+    """
+    Interface of the services behind the GeminiController.
+
+    Each method makes one blocking request and returns the reply as text,
+    in the format the Gemini prompts ask for. The controller runs them in
+    worker threads and takes care of caching, coalescing and concurrency.
+    A subclass missing any of them cannot be instantiated.
+    """
+    name = None
+    requests_per_minute = None  # quota the controller paces requests to (None: no limit)
+
+    @abc.abstractmethod
+    def resolve_word(self, word):
+        """'+', '-', '*' or '/' for an operation word, else 'ERROR'"""
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def resolve_words(self, words):
+        """A JSON object mapping each of words to what resolve_word gives"""
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def convert(self, sentence):
+        """The symbolic expression for a natural language sentence, or 'ERROR'"""
+        raise NotImplementedError
+
+
+# Sentence tokens kept by TableBackend.convert
+SENTENCE_TOKEN = re.compile(r'\d+(?:\.\d+)?|[-+*/()]|[A-Za-z]+')
+
+
+class TableBackend(ResolverBackend):
+    """
+    Deterministic in-process answers: words are looked up in the operator
+    lexicon (typos included) and extra, a word -> symbol dict; sentences
+    are converted by keeping their numbers, brackets and operation words.
+    No network, no API key.
+    """
+    name = 'table'
+
+    def __init__(self, extra=None):
+        self.lexicon = OperatorLexicon()
+        self.extra = {word.lower(): symbol for word, symbol in (extra or {}).items()}
+
+    def resolve_word(self, word):
+        symbol = self.extra.get(word.lower()) or self.lexicon.lookup(word)
+        return symbol or 'ERROR'
+
+    def resolve_words(self, words):
+        return json.dumps({word: self.resolve_word(word) for word in words})
+
+    def convert(self, sentence):
+        parts = []
+        for token in SENTENCE_TOKEN.findall(sentence):
+            if token[0].isalpha():
+                token = self.resolve_word(token)
+                if token == 'ERROR': continue
+            parts.append(token)
+
+        expression = ' '.join(parts)
+        return expression if is_infix(parts) else 'ERROR'
+
+
+def is_infix(parts):
+    """Whether parts form a bracketed infix expression (without unary minus)"""
+    depth = 0
+    operand = True  # an operand is expected next
+    for part in parts:
+        if part == '(':
+            if not operand: return False
+            depth += 1
+        elif part == ')':
+            if operand or depth == 0: return False
+            depth -= 1
+        elif part in OPERATOR_SYMBOLS:
+            if operand: return False
+            operand = True
+        else:
+            if not operand: return False
+            operand = False
+    return bool(parts) and not operand and depth == 0
+
+
+class HttpBackend(ResolverBackend):
+    """
+    A resolver service over HTTP, such as local_llm_server.py. Requests are
+    POSTs of a JSON body to /resolve ({"word"}), /resolve_batch ({"words"})
+    and /convert ({"sentence"}); replies are {"text": reply}. HTTP 429
+    raises QuotaExceeded, other 4xx statuses and malformed replies
+    BackendRejected, server errors and network failures BackendError.
+    """
+    name = 'http'
+
+    def __init__(self, url, timeout=30):
+        self.url = url.rstrip('/')
+        self.timeout = timeout
+
+    def request(self, path, body):
+        request = urllib.request.Request(
+            self.url + path, data=json.dumps(body).encode('utf-8'),
+            headers={'Content-Type': 'application/json'}, method='POST',
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                data = response.read()
+        except urllib.error.HTTPError as e:
+            if e.code == 429:
+                raise QuotaExceeded(f"{self.url} refused the request (HTTP 429)")
+            if 400 <= e.code < 500:
+                raise BackendRejected(f"{self.url} refused the request (HTTP {e.code})")
+            raise BackendError(f"{self.url} answered HTTP {e.code}")
+        except (urllib.error.URLError, OSError) as e:
+            raise BackendError(f"{self.url} did not answer: {e}")
+
+        try:
+            return json.loads(data.decode('utf-8'))['text']
+        except (ValueError, KeyError, TypeError) as e:
+            raise BackendRejected(f"{self.url} sent a malformed reply: {e}")
+
+    def resolve_word(self, word):
+        return self.request('/resolve', {'word': word})
+
+    def resolve_words(self, words):
+        return self.request('/resolve_batch', {'words': list(words)})
+
+    def convert(self, sentence):
+        return self.request('/convert', {'sentence': sentence})
+
+
+def backend_from_spec(spec=None):
+    """
+    The backend named by spec (default: LINGUAFLOW_RESOLVER): 'table', or
+    an http:// or https:// URL. Returns None for 'gemini' or no setting,
+    meaning the Gemini API.
+    """
+    spec = (spec if spec is not None else os.getenv('LINGUAFLOW_RESOLVER', '')).strip()
+    if spec.lower() in ('', 'gemini'): return None
+    if spec.lower() == 'table': return TableBackend()
+    if spec.lower().startswith(('http://', 'https://')): return HttpBackend(spec)
+    raise ValueError(f"Unknown resolver backend: '{spec}' (expected gemini, table or an http:// URL)")
@@ -0,0 +1,185 @@
+#######################################
+# RESOLVER CACHE
+# Persistent on-disk cache for LLM resolutions,
+# shared by every process on the machine
+#######################################
+
+import os
+import sqlite3
+import threading
+import time
+import warnings
+
+DEFAULT_TTL = 30 * 24 * 60 * 60      # 30 days
+DEFAULT_MAX_ENTRIES = 10000
+
+# Stored for words the LLM rejected, so they are not asked about again
+NEGATIVE_ENTRY = 'ERROR'
+
+
+def default_cache_dir():
+    """Directory holding LinguaFlow caches (override with LINGUAFLOW_CACHE_DIR)."""
+    return os.getenv('LINGUAFLOW_CACHE_DIR') or os.path.join(
+        os.path.expanduser('~'), '.cache', 'linguaflow'
+    )
+
+
+class PersistentCache:
+    """
+    Small key/value store backed by SQLite.
+
+    Entries expire after `ttl` seconds. Once the table grows past
+    `max_entries`, the least recently used rows are evicted. A hit only
+    records its use when the last record is older than a tenth of the TTL,
+    so most reads stay reads. SQLite takes care of locking, so several
+    interpreters can share one cache file.
+
+    Any I/O problem (read-only home directory, corrupt file, ...) disables
+    the cache instead of failing the caller: a miss only costs an LLM call.
+    """
+
+    def __init__(self, path=None, table='entries', ttl=DEFAULT_TTL,
+                 max_entries=DEFAULT_MAX_ENTRIES, clock=time.time):
+        self.path = path or os.path.join(default_cache_dir(), 'resolver.sqlite3')
+        self.table = table
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.touch_interval = (ttl if ttl is not None else DEFAULT_TTL) / 10
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.conn = None
+
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self.conn = sqlite3.connect(self.path, timeout=5.0, check_same_thread=False)
+            self.conn.execute('PRAGMA journal_mode=WAL')
+            self.conn.execute(
+                f'CREATE TABLE IF NOT EXISTS {self.table} ('
+                'key TEXT PRIMARY KEY, value TEXT NOT NULL, '
+                'created REAL NOT NULL, used REAL NOT NULL)'
+            )
+            self.conn.commit()
+        except (sqlite3.Error, OSError):
+            self.conn = None
+
+    @property
+    def enabled(self):
+        return self.conn is not None
+
+    def get(self, key):
+        """Return the cached value for key, or None on a miss or expired entry."""
+        if not self.enabled: return None
+        now = self.clock()
+
+        with self.lock:
+            try:
+                row = self.conn.execute(
+                    f'SELECT value, created, used FROM {self.table} WHERE key = ?', (key,)
+                ).fetchone()
+                if row is None: return None
+
+                value, created, used = row
+                if self.ttl is not None and now - created > self.ttl:
+                    self.conn.execute(f'DELETE FROM {self.table} WHERE key = ?', (key,))
+                    self.conn.commit()
+                    return None
+
+                if now - used > self.touch_interval:
+                    self.conn.execute(f'UPDATE {self.table} SET used = ? WHERE key = ?', (now, key))
+                    self.conn.commit()
+                return value
+            except sqlite3.Error:
+                return None
+
+    def put(self, key, value):
+        """Store value under key, evicting old entries if the cache is full."""
+        if not self.enabled: return
+        now = self.clock()
+
+        with self.lock:
+            try:
+                self.conn.execute(
+                    f'INSERT OR REPLACE INTO {self.table} (key, value, created, used) '
+                    'VALUES (?, ?, ?, ?)',
+                    (key, value, now, now)
+                )
+                self.evict(now)
+                self.conn.commit()
+            except sqlite3.Error:
+                pass
+
+    def evict(self, now):
+        # Caller holds the lock; drop expired rows first, then the least recently used
+        if self.ttl is not None:
+            self.conn.execute(f'DELETE FROM {self.table} WHERE created < ?', (now - self.ttl,))
+
+        count = self.conn.execute(f'SELECT COUNT(*) FROM {self.table}').fetchone()[0]
+        if self.max_entries is not None and count > self.max_entries:
+            self.conn.execute(
+                f'DELETE FROM {self.table} WHERE key IN ('
+                f'SELECT key FROM {self.table} ORDER BY used ASC LIMIT ?)',
+                (count - self.max_entries,)
+            )
+
+    def clear(self):
+        if not self.enabled: return
+        with self.lock:
+            try:
+                self.conn.execute(f'DELETE FROM {self.table}')
+                self.conn.commit()
+            except sqlite3.Error:
+                pass
+
+    def __len__(self):
+        if not self.enabled: return 0
+        with self.lock:
+            return self.conn.execute(f'SELECT COUNT(*) FROM {self.table}').fetchone()[0]
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+
+def env_number(name, default, convert=float, minimum=None):
+    """
+    The number in environment variable name, or default when it is unset.
+    A value that is not a number (or is below minimum) is ignored with a
+    warning: a typo in a tuning knob should not break every LLM call.
+    """
+    raw = os.getenv(name)
+    if raw is None or not raw.strip(): return default
+    try:
+        value = convert(raw)
+    except ValueError:
+        value = None
+    if value is None or (minimum is not None and value < minimum):
+        warnings.warn(f"Ignoring {name}={raw!r}: expected a number"
+                      + (f" of at least {minimum}" if minimum is not None else "")
+                      + f", using {default}", RuntimeWarning, stacklevel=2)
+        return default
+    return value
+
+
+def caching_disabled():
+    """True when LINGUAFLOW_CACHE turns all on-disk caches off."""
+    return os.getenv('LINGUAFLOW_CACHE', '').lower() in ('0', 'off', 'false', 'no')
+
+
+def open_operation_cache():
+    """
+    Open the shared word -> operator cache.
+
+    Returns None when caching is turned off with LINGUAFLOW_CACHE=off.
+    TTL and size can be tuned with LINGUAFLOW_CACHE_TTL (seconds) and
+    LINGUAFLOW_CACHE_MAX_ENTRIES.
+    """
+    if caching_disabled(): return None
+
+    return PersistentCache(
+        table='operation_words',
+        ttl=env_number('LINGUAFLOW_CACHE_TTL', DEFAULT_TTL),
+        max_entries=env_number('LINGUAFLOW_CACHE_MAX_ENTRIES', DEFAULT_MAX_ENTRIES, int),
+    )
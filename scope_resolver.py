@@ -0,0 +1,78 @@
+#######################################
+# SCOPE RESOLVER
+# Gives the names of a function body
+# fixed slots in its call frame
+#######################################
+
+import weakref
+
+from basic import (
+    ListNode, BinOpNode, UnaryOpNode, VarAccessNode, VarAssignNode,
+    FuncDefNode, CallNode,
+)
+
+
+def resolve_body(body_node, arg_name_toks):
+    """
+    Number the names a function body binds (its parameters, and the
+    variables and functions it creates) and return the layout of its
+    frames: name -> slot.
+
+    Every VarAssignNode of the body gets the slot it stores to. A
+    VarAccessNode gets a slot only if its name is always bound in the
+    frame when it is read (a parameter, or a name assigned by an earlier
+    statement or earlier in the same expression). Other names are free:
+    scoping is dynamic, so they are looked up by name along the caller's
+    scope chain at every read. Bodies of nested functions are resolved
+    when they are first called.
+    """
+    layout = {}
+    bound = set()
+
+    def bind(name):
+        if name not in layout: layout[name] = len(layout)
+        bound.add(name)
+
+    for tok in arg_name_toks:
+        bind(tok.value)
+
+    # Visit in evaluation order: a name is bound once its assignment has run
+    nodes = [(node, False) for node in reversed(body_node.element_nodes)]
+    while nodes:
+        node, assigned = nodes.pop()
+        node_type = type(node)
+        if node_type is VarAccessNode:
+            name = node.var_name_tok.value
+            node.slot = layout[name] if name in bound else None
+        elif node_type is VarAssignNode:
+            if assigned:
+                bind(node.var_name_tok.value)
+                node.slot = layout[node.var_name_tok.value]
+            else:
+                nodes.append((node, True))
+                nodes.append((node.value_node, False))
+        elif node_type is BinOpNode:
+            nodes.append((node.right_node, False))
+            nodes.append((node.left_node, False))
+        elif node_type is UnaryOpNode:
+            nodes.append((node.node, False))
+        elif node_type is CallNode:
+            nodes.extend((arg_node, False) for arg_node in reversed(node.arg_nodes))
+            nodes.append((node.node_to_call, False))
+        elif node_type is ListNode:
+            nodes.extend((element_node, False) for element_node in reversed(node.element_nodes))
+        elif node_type is FuncDefNode:
+            bind(node.var_name_tok.value)
+    return layout
+
+
+# body ListNode -> layout; an entry goes away with its program
+_layouts = weakref.WeakKeyDictionary()
+
+def scope_layout(body_node, arg_name_toks):
+    """The frame layout of a body, resolved on its first call"""
+    try:
+        return _layouts[body_node]
+    except KeyError:
+        layout = _layouts[body_node] = resolve_body(body_node, arg_name_toks)
+        return layout
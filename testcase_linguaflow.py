@@ -22,11 +22,37 @@ Usage:
 import unittest
 import sys
 import io
+import os
+import tempfile
+import math
+import json
+import time
+import asyncio
+import threading
 from unittest.mock import patch, MagicMock
 
 import basic
 from basic import SymbolTable, Number
 import gemini_controller
+from resolver_cache import PersistentCache, open_operation_cache
+from calc_templates import ConversionTemplates, abstract_numbers, make_template
+from resolver_backends import (
+    ResolverBackend, TableBackend, HttpBackend, QuotaExceeded, BackendRejected, backend_from_spec,
+)
+from local_llm_server import start_server
+from resilience import TokenBucket, CircuitBreaker, CircuitOpen
+from operator_lexicon import OperatorLexicon, lookup_operator
+from fast_lexer import FastLexer
+from flat_ast import FlatAST
+import list_fold
+import batch
+from batch import compile_batch
+import function_memo
+from scope_resolver import resolve_body
+from verbose_output import format_ast
+from optimizer import fold_constants
+from program_cache import ProgramCache
+from word_prefetch import candidate_words
 
 
 # Mock operation word mappings for testing without LLM
@@ -100,19 +126,42 @@ def mock_convert_natural_to_symbolic(sentence):
 class MockGeminiController:
     """Mock Gemini controller for testing without API."""
 
-    def resolve_operation_word(self, word):
+    def resolve_operation_word(self, word, timeout=None):
         return mock_resolve_operation_word(word)
 
-    def convert_natural_to_symbolic(self, sentence):
+    def resolve_operation_words(self, words, timeout=None):
+        return {word: mock_resolve_operation_word(word) for word in words}
+
+    def convert_natural_to_symbolic(self, sentence, timeout=None):
         return mock_convert_natural_to_symbolic(sentence)
 
 
+class RecordingGeminiController(MockGeminiController):
+    """Mock controller that remembers which words it was asked to resolve."""
+
+    def __init__(self):
+        self.asked = []    # words resolved one at a time
+        self.batches = []  # word lists resolved in a single request
+
+    def resolve_operation_word(self, word, timeout=None):
+        self.asked.append(word)
+        return super().resolve_operation_word(word)
+
+    def resolve_operation_words(self, words, timeout=None):
+        self.batches.append(sorted(words))
+        return super().resolve_operation_words(words)
+
+
 class TestHelper:
     """Helper class to run LinguaFlow code and capture results."""
 
     @staticmethod
-    def run(code, symbol_table=None):
-        """Execute LinguaFlow code and return (result, error)."""
+    def run(code, symbol_table=None, engine='tree', optimize=False, mode='full', flat=False):
+        """
+        Execute LinguaFlow code and return (result, error, symbol_table).
+        Runs traced (mode='full') unless told otherwise, so the tracing
+        interpreter stays covered; quiet-path tests pass mode='quiet'.
+        """
         if symbol_table is None:
             symbol_table = SymbolTable()
             symbol_table.set("null", Number(0))
@@ -124,7 +173,7 @@ class TestHelper:
             # Mock the gemini controller
             with patch.object(gemini_controller, '_gemini_instance', MockGeminiController()):
                 with patch.object(gemini_controller, 'get_gemini_controller', return_value=MockGeminiController()):
-                    result, error = basic.run('<test>', code, symbol_table)
+                    result, error = basic.run('<test>', code, symbol_table, engine=engine, optimize=optimize, mode=mode, flat=flat)
         finally:
             sys.stdout = old_stdout
 
@@ -832,6 +881,1833 @@ class TestIntegration(unittest.TestCase):
         self.assertEqual(result.value, 13)  # 5 + 8 = 13
 
 
+# =============================================================================
+# BOUND NAME SHORT-CIRCUIT
+# =============================================================================
+class TestBoundNames(unittest.TestCase):
+    """
+    Names bound as variables or functions are never sent to the LLM.
+    """
+
+    def setUp(self):
+        # Route every word to the LLM mock so the requests can be observed
+        lexicon_off = patch.object(basic, 'lookup_operator', return_value=None)
+        lexicon_off.start()
+        self.addCleanup(lexicon_off.stop)
+
+    def parse(self, code, symbol_table=None):
+        controller = RecordingGeminiController()
+        tokens, error = basic.Lexer('<test>', code).make_tokens()
+        self.assertIsNone(error)
+        old_stdout = sys.stdout
+        sys.stdout = io.StringIO()
+        try:
+            with patch.object(gemini_controller, '_gemini_instance', controller):
+                basic.Parser(tokens, symbol_table=symbol_table).parse()
+        finally:
+            sys.stdout = old_stdout
+        return controller.asked
+
+    def test_variable_from_symbol_table(self):
+        """A variable in the live symbol table is not resolved"""
+        st = SymbolTable()
+        st.set("rate", Number(2))
+        self.assertEqual(self.parse("5 rate", st), [])
+
+    def test_variable_created_earlier(self):
+        """A variable created earlier in the program is not resolved"""
+        self.assertEqual(self.parse("create x as 2\n5 x"), [])
+
+    def test_variable_created_later_still_resolved(self):
+        """A name is only known after the statement that creates it"""
+        self.assertIn('x', self.parse("5 x\ncreate x as 2"))
+
+    def test_parameter_scope_ends_with_function(self):
+        """Parameter names are only bound inside the function body"""
+        st = SymbolTable()
+        st.set("null", Number(0))
+        code = "create f taking add do\nadd\nend\n5 add 3"
+        self.assertIn('add', self.parse(code))
+        result, error, _ = TestHelper.run(code, st)
+        self.assertIsNone(error)
+        self.assertEqual(result.value, 8)
+
+
+# =============================================================================
+# BATCHED RESOLUTION
+# =============================================================================
+class TestBatchedResolution(unittest.TestCase):
+    """
+    All unknown words of a program are resolved in one LLM request.
+    """
+
+    def setUp(self):
+        lexicon_off = patch.object(basic, 'lookup_operator', return_value=None)
+        lexicon_off.start()
+        self.addCleanup(lexicon_off.stop)
+
+    def test_single_request_per_program(self):
+        """Distinct words are batched and never asked individually"""
+        controller = RecordingGeminiController()
+        old_stdout = sys.stdout
+        sys.stdout = io.StringIO()
+        try:
+            with patch.object(gemini_controller, '_gemini_instance', controller):
+                result, error = basic.run('<test>', "5 add 3 times 2\nsum of 1 and 2", SymbolTable())
+        finally:
+            sys.stdout = old_stdout
+        self.assertIsNone(error)
+        self.assertEqual(result.value, 3)
+        self.assertEqual(controller.batches, [['add', 'sum', 'times']])
+        self.assertEqual(controller.asked, [])
+
+    def test_falls_back_to_single_words(self):
+        """Words missing from the batch answer are resolved one at a time"""
+        controller = RecordingGeminiController()
+        controller.resolve_operation_words = lambda words, timeout=None: {}
+        old_stdout = sys.stdout
+        sys.stdout = io.StringIO()
+        try:
+            with patch.object(gemini_controller, '_gemini_instance', controller):
+                result, error = basic.run('<test>', "5 add 3", SymbolTable())
+        finally:
+            sys.stdout = old_stdout
+        self.assertIsNone(error)
+        self.assertEqual(result.value, 8)
+        self.assertEqual(controller.asked, ['add'])
+
+    def make_controller(self, answer, cache=None):
+        with patch.object(gemini_controller.genai, 'configure'), \
+             patch.object(gemini_controller.genai, 'GenerativeModel') as model_cls:
+            model_cls.return_value.generate_content.return_value = MagicMock(text=answer)
+            controller = gemini_controller.GeminiController(api_key='test', cache=cache or False, templates=False)
+        controller.cache = cache
+        controller.templates = None
+        return controller
+
+    def test_controller_parses_json_map(self):
+        """The batch reply is a JSON object, possibly fenced"""
+        controller = self.make_controller('```json\n{"Sum": "+", "qwerty": "ERROR"}\n```')
+        results = controller.resolve_operation_words(['Sum', 'qwerty', 'times'])
+        self.assertEqual(results['Sum'], ('+', None))
+        self.assertIsNone(results['qwerty'][0])
+        self.assertNotIn('times', results)
+
+    def test_controller_skips_cached_words(self):
+        """Cached words are not sent in the batch prompt"""
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        cache = PersistentCache(os.path.join(tmpdir.name, 'cache.sqlite3'))
+        self.addCleanup(cache.close)
+        cache.put('sum', '+')
+        controller = self.make_controller('{"times": "*"}', cache)
+        results = controller.resolve_operation_words(['sum', 'times'])
+        self.assertEqual(results, {'sum': ('+', None), 'times': ('*', None)})
+        controller.batch_model.generate_content.assert_called_once_with('["times"]')
+        self.assertEqual(cache.get('times'), '*')
+
+
+# =============================================================================
+# OFFLINE OPERATOR LEXICON
+# =============================================================================
+class TestOperatorLexicon(unittest.TestCase):
+    """
+    Built-in resolver tier that runs before the LLM.
+    """
+
+    def test_exact_synonyms(self):
+        """Every mocked LLM synonym is known offline"""
+        for word, symbol in MOCK_OPERATION_WORDS.items():
+            self.assertEqual(lookup_operator(word), symbol, word)
+
+    def test_typos(self):
+        """Close misspellings resolve to the intended operator"""
+        self.assertEqual(lookup_operator('multipy'), '*')
+        self.assertEqual(lookup_operator('mutliply'), '*')
+        self.assertEqual(lookup_operator('divdie'), '/')
+        self.assertEqual(lookup_operator('Differnce'), '-')
+
+    def test_unknown_words_left_to_llm(self):
+        """Gibberish, names, short words and near misses that are words of their own are not guessed"""
+        for word in ('qwerty', 'asdfas', 'price', 'x', 'sam',
+                     'timer', 'plush', 'mines', 'dividend', 'adder', 'time', 'spit', 'devide'):
+            self.assertIsNone(lookup_operator(word), word)
+
+    def test_ambiguous_typo_rejected(self):
+        """A typo matching synonyms of two operators is not resolved"""
+        lexicon = OperatorLexicon({'+': ['boards'], '-': ['boarde']})
+        self.assertIsNone(lexicon.lookup('board'))
+        self.assertEqual(lexicon.lookup('baords'), '+')
+
+    def test_runs_without_llm(self):
+        """Lexicon words parse and run with the LLM disabled"""
+        tokens, _ = basic.Lexer('<test>', '5 add 3 multipy 2').make_tokens()
+        old_stdout = sys.stdout
+        sys.stdout = io.StringIO()
+        try:
+            with patch.object(basic, 'get_gemini_controller', side_effect=AssertionError):
+                ast = basic.Parser(tokens, use_llm=False).parse()
+        finally:
+            sys.stdout = old_stdout
+        self.assertIsNone(ast.error)
+        self.assertEqual(ast.node.element_nodes[0].op_tok.type, basic.TT_PLUS)
+
+
+# =============================================================================
+# FAST LEXER
+# =============================================================================
+LEXER_INPUTS = [
+    "",
+    "5 + 3",
+    "  10.5 * (2 - .5)",
+    "1.2.3",
+    "7.",
+    "create x as 10\ncreate y as x * 2; y - x\n",
+    "create f taking a_1 b2 do\n\ta + b2\nend\nfind f 1 2",
+    "sum these numbers: [1, 2.5, 3]",
+    "SUM Of 5 AND 3",
+    "5add3",
+    "x = 5",
+    "5 + 3\r\n",
+    "_hidden",
+    "10 caf\u00e9",
+    "trailing   \t",
+]
+
+
+class TestFastLexer(unittest.TestCase):
+    """FastLexer must produce exactly what Lexer produces"""
+
+    @staticmethod
+    def describe(pos):
+        return (pos.idx, pos.ln, pos.col, pos.fn, pos.ftxt)
+
+    def test_same_tokens_as_lexer(self):
+        """Token types, values and positions match the reference Lexer"""
+        for text in LEXER_INPUTS:
+            with self.subTest(text=text):
+                expected, expected_error = basic.Lexer('<test>', text).make_tokens()
+                tokens, error = FastLexer('<test>', text).make_tokens()
+                self.assertEqual(len(tokens), len(expected))
+                for tok, exp in zip(tokens, expected):
+                    self.assertEqual((tok.type, tok.value, type(tok.value)), (exp.type, exp.value, type(exp.value)))
+                    self.assertEqual(self.describe(tok.pos_start), self.describe(exp.pos_start))
+                    self.assertEqual(self.describe(tok.pos_end), self.describe(exp.pos_end))
+                if expected_error:
+                    self.assertEqual(error.as_string(), expected_error.as_string())
+                else:
+                    self.assertIsNone(error)
+
+    def test_token_positions_are_independent(self):
+        """Number and word tokens end where they end, not at the end of the input"""
+        tokens, _ = basic.Lexer('<test>', "12 abc + 1").make_tokens()
+        self.assertEqual([tok.pos_end.idx for tok in tokens[:3]], [2, 6, 8])
+
+
+# =============================================================================
+# SOURCE POSITIONS
+# =============================================================================
+class TestSourcePositions(unittest.TestCase):
+    """Tokens and nodes keep integer offsets; positions are built on demand"""
+
+    def test_tokens_store_offsets(self):
+        """Lexing creates no Position objects"""
+        tokens, _ = FastLexer('<test>', "create x as 12\nx * 3").make_tokens()
+        number = tokens[3]
+        self.assertEqual((number.start, number.end), (12, 14))
+        self.assertIs(number.source, tokens[0].source)
+        with self.assertRaises(AttributeError):
+            basic.Span.pos_start.__get__(number)  # slot still empty
+        self.assertEqual((number.pos_start.ln, number.pos_start.col), (0, 12))
+        self.assertIs(basic.Span.pos_start.__get__(number), number.pos_start)
+
+    def test_compact_objects(self):
+        """Tokens, positions, nodes and values carry no per-instance dict"""
+        tokens, _ = FastLexer('<test>', "-(x + 2)").make_tokens()
+        ast = basic.Parser(tokens, use_llm=False).parse()
+        unary = ast.node.element_nodes[0]
+        objects = [tokens[0], tokens[0].pos_start, ast.node, unary, unary.node,
+                   unary.node.left_node, unary.node.right_node, Number(1), basic.RTResult()]
+        for obj in objects:
+            with self.subTest(type=type(obj).__name__):
+                self.assertFalse(hasattr(obj, '__dict__'))
+
+    def test_line_and_column(self):
+        """Offsets map to lines and columns like the character-stepping lexer"""
+        source = basic.Source('<test>', "ab\n\ncd")
+        self.assertEqual([source.line_col(idx) for idx in range(6)],
+                         [(0, 0), (0, 1), (0, 2), (1, 0), (2, 0), (2, 1)])
+
+    def test_end_position_before_newline(self):
+        """A range ending with a newline ends on that line"""
+        source = basic.Source('<test>', "ab\ncd")
+        end = basic.Position(3, source, is_end=True)
+        self.assertEqual((end.ln, end.col), (0, 3))
+        start = basic.Position(3, source)
+        self.assertEqual((start.ln, start.col), (1, 0))
+
+    def test_error_message(self):
+        """Error messages locate the failing line and underline the span"""
+        code = "create f taking a do\ncreate b as a - 2\n10 / b\nend\n\nfind f 2"
+        _, error, _ = TestHelper.run(code)
+        self.assertEqual(error.as_string(),
+                         "Traceback (most recent call last):\n"
+                         "  File <test>, line 6, in <program>\n"
+                         "  File <test>, line 3, in f\n"
+                         "Runtime Error: Division by zero\n\n\n"
+                         "10 / b\n"
+                         "     ^")
+
+
+# =============================================================================
+# EXECUTION ENGINES
+# =============================================================================
+ENGINE_PROGRAMS = [
+    "2 + 3 * 4 - 6 / 2",
+    "--5 + -(2 * 3.5)",
+    "10 / 4",
+    "5 add 3 times 2",
+    "subtract these numbers: [10, 3, 2.5]",
+    "product of 4 and 2.5",
+    "create x as 10\ncreate y as x * 2\ny - x",
+    "create double taking x do\nx * 2\nend\nfind double 21",
+    "create scale taking x do\nx * factor\nend\ncreate factor as 3\nfind scale 5",
+    "create f taking a b do\ncreate t as a * b\nt + a\nend\nfind f 3 4",
+    "create inner taking a do\na + outer_arg\nend\n"
+    "create outer taking outer_arg do\nfind inner 1\nend\nfind outer 41",
+    "create fortytwo taking do\n42\nend\nfind fortytwo",
+    "create f taking a do\na\nend",
+    # Runtime errors
+    "10 / (5 - 5)",
+    "divide these numbers: [10, 2, 0, 4]",
+    "sum these numbers: []",
+    "undefined_var + 5",
+    "create x as 5\nfind x 1",
+    "create f taking a b do\na + b\nend\nfind f 1",
+    "create f taking a do\na / 0\nend\nfind f 1",
+    "create g taking a do\n1 / a\nend\ncreate f taking a do\nfind g a\nend\nfind f 0",
+    "create f taking a do\nmissing * a\nend\nfind f 2",
+    "create f taking a do\nsum these numbers: []\nend\nfind f 2",
+    "create f taking a do\nfind a 1\nend\nfind f 2",
+    "create f taking a do\nfind nowhere a\nend\nfind f 2",
+    "create g taking do\n1\nend\ncreate f taking a do\nfind g a\nend\nfind f 2",
+    "create f taking a b do\na - -b - (a - b) * -(a + b)\nend\nfind f 7 2.5",
+    "create f taking a do\ncreate t as divide these numbers: [9, 4, 2]\nt * a\nend\nfind f 4",
+    "(5 + 3) * 2 - 16 / (4 - 4)",
+    "create f taking a do\n(a * 2) * 1 - 0 + 0\nend\nfind f -0.0",
+    "create f taking a do\n1 * (a / 2) - 0\nend\nfind f 3",
+    # Bodies the native compiler hands back to the interpreter
+    "create f taking a do\ncreate g taking b do\nb * a\nend\nfind g 3\nend\nfind f 5",
+    "create h taking do\n1\nend\ncreate f taking a do\nh + a\nend\nfind f 2",
+    # Functions used as numbers count as 0
+    "create h taking do\n1\nend\n5 / h",
+    "create h taking do\n1\nend\n-h * 2 + h",
+]
+
+
+class TestEngines(unittest.TestCase):
+    """
+    Every execution engine must agree with the tree-walking interpreter,
+    including runtime error messages and positions.
+    """
+
+    def assert_same_as_tree(self, engine, optimize=False, mode='quiet', flat=False):
+        for code in ENGINE_PROGRAMS:
+            with self.subTest(code=code):
+                with patch.object(basic.Function, 'use_native', False), \
+                        patch.object(basic.Interpreter, 'fast_path', False):
+                    expected, expected_error, expected_st = TestHelper.run(code)
+                result, error, st = TestHelper.run(code, engine=engine, optimize=optimize, mode=mode, flat=flat)
+                if expected_error:
+                    self.assertIsNotNone(error)
+                    self.assertEqual(error.as_string(), expected_error.as_string())
+                else:
+                    self.assertIsNone(error)
+                    self.assertEqual(repr(result), repr(expected))
+                    self.assertEqual(sorted(st.symbols), sorted(expected_st.symbols))
+
+    def test_bytecode_vm(self):
+        """The bytecode VM matches the tree-walking interpreter"""
+        self.assert_same_as_tree('vm')
+
+    def test_native_functions(self):
+        """Function bodies compiled to Python match the tree-walking interpreter"""
+        self.assert_same_as_tree('tree')
+
+    def test_fast_interpreter(self):
+        """The raw-number interpreter of quiet tree runs matches the Interpreter"""
+        with patch.object(basic.Function, 'use_native', False):
+            self.assert_same_as_tree('tree')
+
+    def test_fast_interpreter_allocations(self):
+        """Expressions build no Number or RTResult per node, only for the result"""
+        tokens, _ = basic.Lexer('<test>', "create a as 2\n(a * 3 + -a) / (a - 0.5) - a * a").make_tokens()
+        node = basic.Parser(tokens, use_llm=False).parse().node
+        context = basic.Context('<program>')
+        context.symbol_table = SymbolTable()
+
+        created = []
+        number_init, result_init = Number.__init__, basic.RTResult.__init__
+        with patch.object(Number, '__init__', lambda *args: created.append(args[0]) or number_init(*args)), \
+                patch.object(basic.RTResult, '__init__', lambda *args: created.append(args[0]) or result_init(*args)):
+            result = basic.execute(node, context)
+        self.assertAlmostEqual(result.value.value, 4 / 1.5 - 4)
+        # The stored value of a, the result, and the RTResult returning it
+        self.assertEqual(len(created), 3)
+
+    def test_iterative_interpreter(self):
+        """The explicit-stack interpreter matches the tree-walking interpreter"""
+        self.assert_same_as_tree('iterative')
+
+    def test_iterative_deep_expression(self):
+        """Expressions far deeper than the Python recursion limit evaluate"""
+        code = "1" + " + 1" * 50000 + " - 0.5"
+        for options in ({'engine': 'iterative'}, {'engine': 'vm'}, {'flat': True}):
+            with self.subTest(**options):
+                result, error, _ = TestHelper.run(code, **options)
+                self.assertIsNone(error)
+                self.assertEqual(result.value, 50000.5)
+
+    def test_iterative_nested_parentheses(self):
+        """Parentheses and unary signs nested far deeper than the recursion limit parse and evaluate"""
+        depth = 5000
+        cases = [
+            ("(" * depth + "1" + ")" * depth, 1),
+            ("(" * depth + "1" + " + 1)" * depth, depth + 1),
+            ("(-" * depth + "2" + ")" * depth, 2),
+            ("-" * (depth + 1) + "2", -2),
+        ]
+        for code, expected in cases:
+            for options in ({'engine': 'iterative'}, {'engine': 'vm'}, {'flat': True}):
+                with self.subTest(code=code[:12], **options):
+                    result, error, _ = TestHelper.run(code, **options)
+                    self.assertIsNone(error)
+                    self.assertEqual(result.value, expected)
+
+    def test_too_deep_program_is_an_error(self):
+        """Nesting the parser cannot handle is reported, not raised"""
+        depth = 2000
+        code = "create f taking a do\n" * depth + "1\n" + "end\n" * depth
+        result, error, _ = TestHelper.run(code, engine='iterative')
+        self.assertIsNone(result)
+        self.assertIn("Program nested too deeply", error.as_string())
+
+    def test_iterative_deep_calls(self):
+        """Long call chains do not consume Python stack frames"""
+        lines = ["create f0 taking x do\nx + 1\nend"]
+        lines += [f"create f{i} taking x do\ncreate y as x + 1\nfind f{i - 1} y\nend" for i in range(1, 3000)]
+        lines.append("find f2999 0")
+        result, error, _ = TestHelper.run("\n".join(lines), engine='iterative')
+        self.assertIsNone(error)
+        self.assertEqual(result.value, 3000)
+
+    def test_iterative_runaway_recursion(self):
+        """Unbounded recursion fails quickly, with the repeated frames collapsed"""
+        start = time.perf_counter()
+        result, error, _ = TestHelper.run("create f taking x do\nfind f x\nend\nfind f 1", engine='iterative')
+        self.assertLess(time.perf_counter() - start, 10)
+        self.assertIsNone(result)
+        message = error.as_string()
+        self.assertIn("Maximum call depth exceeded", message)
+        self.assertIn(f"[Previous line repeated {basic.MAX_CALL_DEPTH - basic.TRACEBACK_REPEATS} more times]", message)
+        self.assertLess(len(message.splitlines()), 20)
+
+    def test_vm_runaway_recursion(self):
+        """The VM stops unbounded recursion instead of growing its call stack forever"""
+        result, error, _ = TestHelper.run("create f taking a do\nfind f a\nend\nfind f 1", engine='vm')
+        self.assertIsNone(result)
+        self.assertIn("Maximum call depth exceeded", error.as_string())
+
+    def test_tree_runaway_recursion(self):
+        """The tree walk reports unbounded recursion as an error instead of raising RecursionError"""
+        code = "create f taking a do\nfind f a\nend\nfind f 1"
+        for options in ({}, {'mode': 'quiet'}, {'flat': True}):
+            for native in (True, False):
+                with self.subTest(native=native, **options), patch.object(basic.Function, 'use_native', native):
+                    result, error, _ = TestHelper.run(code, **options)
+                    self.assertIsNone(result)
+                    message = error.as_string()
+                    self.assertIn("Maximum call depth exceeded", message)
+                    self.assertIn("more times]", message)
+
+    def test_constant_folding(self):
+        """Folded programs behave exactly like the original on every engine"""
+        self.assert_same_as_tree('tree', optimize=True)
+        self.assert_same_as_tree('vm', optimize=True)
+
+    def test_native_body_compiled_once(self):
+        """A function body is compiled on its first call and reused by copies"""
+        import native_compiler
+        _, _, st = TestHelper.run("create f taking a b do\ncreate t as a * b\nt + a\nend")
+        body = st.get("f").body_node
+        self.assertNotIn(body, native_compiler._native_bodies)
+
+        result, error, _ = TestHelper.run("find f 3 4", st, mode='quiet')
+        self.assertIsNone(error)
+        self.assertEqual(result.value, 15)
+        native = native_compiler._native_bodies[body]
+        self.assertIsNotNone(native)
+        self.assertIn("v_t + v_a", native.source)
+
+        TestHelper.run("find f 1 1", st, mode='quiet')
+        self.assertIs(native_compiler._native_bodies[body], native)
+
+    def test_native_bodies_released(self):
+        """Compiled bodies do not outlive their programs"""
+        import gc
+        import native_compiler
+        tokens, _ = basic.Lexer('<test>', "create f taking a b do\na * b + 1\nend").make_tokens()
+        func_def = basic.Parser(tokens, use_llm=False).parse().node.element_nodes[0]
+        self.assertIsNotNone(native_compiler.native_body(func_def.body_node, func_def.arg_name_toks))
+        self.assertIn(func_def.body_node, native_compiler._native_bodies)
+        size = len(native_compiler._native_bodies)
+        func_def = None
+        gc.collect()
+        self.assertEqual(len(native_compiler._native_bodies), size - 1)
+
+    def test_traced_function_body(self):
+        """The full trace shows the steps inside function bodies"""
+        old_stdout = sys.stdout
+        sys.stdout = output = io.StringIO()
+        try:
+            with patch.object(gemini_controller, '_gemini_instance', MockGeminiController()):
+                result, error = basic.run('<test>', "create f taking a b do\na * b + 1\nend\nfind f 2 3", SymbolTable(), mode='full')
+        finally:
+            sys.stdout = old_stdout
+        self.assertIsNone(error)
+        self.assertEqual(result.value, 7)
+        self.assertIn("Multiply operation", output.getvalue())
+        self.assertIn("Add operation", output.getvalue())
+
+    def test_error_inside_function_is_reported(self):
+        """Runtime errors inside a function body reach the caller"""
+        result, error, _ = TestHelper.run("create f taking a do\na / 0\nend\nfind f 1")
+        self.assertIsNone(result)
+        self.assertIn("in f", error.as_string())
+        self.assertIn("Division by zero", error.as_string())
+
+    def test_vm_shares_symbol_table(self):
+        """Functions and variables defined by the VM are usable by the tree walker"""
+        st = SymbolTable()
+        st.set("null", Number(0))
+        TestHelper.run("create base as 4\ncreate add_base taking x do\nx + base\nend", st, engine='vm')
+        self.assertEqual(st.get("base").value, 4)
+        result, error, _ = TestHelper.run("find add_base 6", st)
+        self.assertIsNone(error)
+        self.assertEqual(result.value, 10)
+
+
+# =============================================================================
+# FLAT AST
+# =============================================================================
+class TestFlatAST(unittest.TestCase):
+    """Parser(flat=True) output and the FlatInterpreter"""
+
+    def parse(self, code, flat):
+        tokens, _ = FastLexer('<test>', code).make_tokens()
+        old_stdout = sys.stdout
+        sys.stdout = io.StringIO()
+        try:
+            ast = basic.Parser(tokens, use_llm=False, flat=flat).parse()
+        finally:
+            sys.stdout = old_stdout
+        self.assertIsNone(ast.error)
+        return ast.node
+
+    def test_same_results_as_tree(self):
+        """Flat programs give the same values and errors as the object AST"""
+        TestEngines.assert_same_as_tree(self, 'tree', flat=True)
+
+    def test_flat_function_called_by_other_engines(self):
+        """Functions defined by a flat run can be called from every engine"""
+        for engine in ('tree', 'vm', 'iterative'):
+            with self.subTest(engine=engine):
+                st = SymbolTable()
+                TestHelper.run("create f taking a b do\na * b + 1\nend\ncreate g taking a do\na / 0\nend", st, flat=True)
+                result, error, _ = TestHelper.run("find f 2 (1 + 2)", st, engine=engine)
+                self.assertIsNone(error)
+                self.assertEqual(result.value, 7)
+                result, error, _ = TestHelper.run("find g 1", st, engine=engine)
+                self.assertIsNone(result)
+                self.assertIn("Division by zero", error.as_string())
+
+    def test_arrays(self):
+        """Nodes are rows of array columns; constants and names are shared"""
+        ast = self.parse("create x as 2\nx * 2 + x", flat=True)
+        self.assertIsInstance(ast, FlatAST)
+        self.assertEqual(len(ast), 8)
+        self.assertEqual(ast.consts, [2])
+        self.assertEqual(ast.names, ['x'])
+        self.assertEqual(ast.kind_name(ast.root), 'ListNode')
+        add = ast.children(ast.root)[1]
+        self.assertEqual((ast.kind_name(add), ast.op_type(add)), ('BinOpNode', basic.TT_PLUS))
+        self.assertEqual((ast.pos_start(add).col, ast.pos_end(add).col), (0, 9))
+
+    def test_format_ast(self):
+        """The verbose printer draws a flat AST exactly like the object AST"""
+        code = "create y as -(3 * x)\nsum these numbers: [1, 2]\nproduct of y and 4"
+        self.assertEqual(format_ast(self.parse(code, flat=True)), format_ast(self.parse(code, flat=False)))
+
+    def test_summary_output(self):
+        """Summary mode prints the flat AST"""
+        old_stdout = sys.stdout
+        sys.stdout = output = io.StringIO()
+        try:
+            result, error = basic.run('<test>', "2 + 3", SymbolTable(), mode='summary', flat=True)
+        finally:
+            sys.stdout = old_stdout
+        self.assertEqual(result.value, 5)
+        self.assertIn("BinOp(+)", output.getvalue())
+
+    def test_cached(self):
+        """Flat programs round-trip through the program cache"""
+        with tempfile.TemporaryDirectory() as directory:
+            cache = ProgramCache(directory)
+            for _ in range(2):
+                result, error = basic.run('<test>', "create f taking a do\na * 2\nend\nfind f 4",
+                                          SymbolTable(), cache=cache, flat=True)
+                self.assertEqual(result.value, 8)
+            self.assertEqual(len(os.listdir(directory)), 1)
+
+    def test_unsupported_combinations(self):
+        """Other engines and constant folding need the object AST"""
+        with self.assertRaises(ValueError):
+            basic.run('<test>', "1", SymbolTable(), engine='vm', flat=True)
+        with self.assertRaises(ValueError):
+            basic.run('<test>', "1", SymbolTable(), optimize=True, flat=True)
+
+
+# =============================================================================
+# LIST FOLDING
+# =============================================================================
+class TestListFold(unittest.TestCase):
+    """List operations folded in one step (list_fold.py)"""
+
+    LISTS = [
+        [3, 1.25, 7, 0.1, 2] * 20,
+        list(range(1, 60)),
+        [0.1] * 100 + [10 ** 15, 3],
+        [2 ** 60 + 1, 0.5] + [3] * 40,
+    ]
+
+    def assert_same_as_element_fold(self, code, **options):
+        # Without NumPy, lists are folded element by element, like Number objects
+        with patch.object(list_fold, 'np', None):
+            expected, expected_error, _ = TestHelper.run(code)
+        result, error, _ = TestHelper.run(code, mode='quiet', **options)
+        if expected_error:
+            self.assertEqual(error.as_string(), expected_error.as_string())
+        else:
+            self.assertIsNone(error)
+            self.assertEqual(repr(result), repr(expected))
+
+    def test_same_results_as_element_fold(self):
+        """Long lists give exactly the values of the step-by-step fold"""
+        for values in self.LISTS:
+            for word in ('sum', 'subtract', 'multiply', 'divide'):
+                code = f"{word} these numbers: [{', '.join(map(str, values))}]"
+                for options in ({}, {'engine': 'iterative'}, {'flat': True}):
+                    with self.subTest(word=word, size=len(values), **options):
+                        self.assert_same_as_element_fold(code, **options)
+
+    def test_left_to_right(self):
+        """Subtraction and division keep their left-to-right order"""
+        self.assertEqual(list_fold.fold_numbers(basic.TT_MINUS, [100] + [0.5] * 40), (80.0, None))
+        self.assertEqual(list_fold.fold_numbers(basic.TT_DIV, [2.0 ** 40] + [2] * 40), (1.0, None))
+
+    def test_division_by_zero_position(self):
+        """Division by zero points at the first zero in the list"""
+        code = "divide these numbers: [" + "1, " * 40 + "0, 5, 0]"
+        for options in ({}, {'engine': 'iterative'}, {'flat': True}):
+            with self.subTest(**options):
+                _, error, _ = TestHelper.run(code, **options)
+                self.assertIn("Division by zero", error.as_string())
+                self.assertEqual((error.pos_start.col, error.pos_end.col), (143, 144))
+
+    def test_without_numpy(self):
+        """Without NumPy the list is folded in plain Python"""
+        with patch.object(list_fold, 'np', None):
+            for values in self.LISTS:
+                code = f"subtract these numbers: [{', '.join(map(str, values))}]"
+                with self.subTest(size=len(values)):
+                    result, error, _ = TestHelper.run(code, mode='quiet')
+                    self.assertIsNone(error)
+                    expected = values[0]
+                    for value in values[1:]: expected = expected - value
+                    self.assertEqual(repr(result.value), repr(expected))
+
+    @unittest.skipUnless(list_fold.np, "NumPy is not installed")
+    def test_prepared_lists_live_with_the_program(self):
+        """A long list keeps its prepared array on its own node, not in a global table"""
+        code = "sum these numbers: [" + ", ".join(["1.5"] * 40) + "]"
+        for flat in (False, True):
+            with self.subTest(flat=flat):
+                tokens, _ = FastLexer('<test>', code).make_tokens()
+                ast = basic.Parser(tokens, use_llm=False, flat=flat, quiet=True).parse().node
+                context = basic.Context('<program>')
+                context.symbol_table = SymbolTable()
+                self.assertEqual(basic.execute(ast, context).value.value, 60.0)
+                if flat:
+                    prepared = ast.fold_state(ast.children(ast.root)[0]).prepared
+                else:
+                    prepared = ast.element_nodes[0].prepared
+                self.assertEqual(len(prepared[0]), 40)
+
+
+# =============================================================================
+# BATCH EVALUATION
+# =============================================================================
+class TestBatch(unittest.TestCase):
+    """Compiling a program once and evaluating it over input columns (batch.py)"""
+
+    def compile(self, code, input_names, symbol_table=None):
+        old_stdout = sys.stdout
+        sys.stdout = io.StringIO()
+        try:
+            with patch.object(gemini_controller, '_gemini_instance', MockGeminiController()):
+                program, error = compile_batch(code, input_names, symbol_table, fn='<test>')
+        finally:
+            sys.stdout = old_stdout
+        self.assertIsNone(error)
+        return program
+
+    def assert_same_as_run(self, code, columns, symbol_table=None):
+        """Every row gives the value or error of running it on its own"""
+        program = self.compile(code, list(columns), symbol_table)
+        values, errors = program.evaluate(columns)
+        for row in range(len(values)):
+            st = SymbolTable(symbol_table)
+            for name, column in columns.items():
+                st.set(name, Number(column[row]))
+            expected, expected_error, _ = TestHelper.run(code, st)
+            with self.subTest(code=code, row=row):
+                if expected_error:
+                    self.assertEqual(errors[row].as_string(), expected_error.as_string())
+                else:
+                    self.assertNotIn(row, errors)
+                    self.assertEqual(values[row], expected.value)
+        return program, values, errors
+
+    def test_formula(self):
+        """A formula over int and float columns"""
+        program, values, errors = self.assert_same_as_run(
+            "create total as price * qty add tax", {'price': [2.5, 10.0, 3.0], 'qty': [2, 0, 7], 'tax': [1, 2, 3]})
+        self.assertEqual(list(values), [6.0, 2.0, 24.0])
+        self.assertEqual(errors, {})
+
+    @unittest.skipUnless(batch.np, "NumPy is not installed")
+    def test_formula_in_columns(self):
+        """Arithmetic programs are evaluated column at a time"""
+        program = self.compile("create total as price * qty add tax", ['price', 'qty', 'tax'])
+        self.assertTrue(program.vectorized)
+
+    def test_row_errors(self):
+        """Division by zero fails only its own rows, at the right position"""
+        _, values, errors = self.assert_same_as_run("create r as a / b\nr * 2", {'a': [1, 2, 3, 4], 'b': [2, 0, 0.0, 8]})
+        self.assertEqual(sorted(errors), [1, 2])
+        self.assertIn("Division by zero", errors[1].as_string())
+        self.assertEqual(values[0], 1.0)
+
+    def test_row_errors_by_row(self):
+        """Without NumPy failed rows hold None"""
+        with patch.object(batch, 'np', None):
+            _, values, errors = self.assert_same_as_run("create r as a / b\nr * 2", {'a': [1, 2], 'b': [0, 8]})
+        self.assertEqual(values, [None, 0.5])
+        self.assertEqual(sorted(errors), [0])
+
+    @unittest.skipUnless(batch.np, "NumPy is not installed")
+    def test_row_errors_in_columns(self):
+        """Failed rows hold nan in float columns"""
+        _, values, _ = self.assert_same_as_run("create r as a / b\nr * 2", {'a': [1, 2, 3, 4], 'b': [2, 0, 0.0, 8]})
+        self.assertTrue(math.isnan(values[1]))
+
+    def test_python_arithmetic(self):
+        """Integer results are exact, even where int64 would overflow"""
+        columns = {'x': [2 ** 62, 3, -2 ** 63, 2 ** 70], 'y': [4, 2 ** 60 + 1, 1, 3]}
+        for code in ("x * y", "x + y - 1", "x / y", "-x"):
+            self.assert_same_as_run(code, columns)
+
+    def test_shared_names(self):
+        """Names of the symbol table are shared by every row; functions run row by row"""
+        st = SymbolTable()
+        st.set("rate", Number(3))
+        self.assert_same_as_run("x * rate", {'x': [1, 2]}, st)
+
+        program, values, _ = self.assert_same_as_run(
+            "create f taking a do\na * rate\nend\nfind f x", {'x': [1, 2]}, st)
+        self.assertFalse(program.vectorized)
+        self.assertEqual(list(values), [3, 6])
+
+    @unittest.skipUnless(batch.np, "NumPy is not installed")
+    def test_shared_names_in_columns(self):
+        """Shared numbers do not stop a program from running column at a time"""
+        st = SymbolTable()
+        st.set("rate", Number(3))
+        program, _, _ = self.assert_same_as_run("x * rate", {'x': [1, 2]}, st)
+        self.assertTrue(program.vectorized)
+
+    def test_program_errors(self):
+        """Errors of the whole program are reported for every row"""
+        _, _, errors = self.assert_same_as_run("x + missing", {'x': [1, 2]})
+        self.assertEqual(sorted(errors), [0, 1])
+
+    def test_columns_checked(self):
+        """Missing or uneven input columns are rejected"""
+        program = self.compile("x + y", ['x', 'y'])
+        with self.assertRaises(ValueError):
+            program.evaluate({'x': [1]})
+        with self.assertRaises(ValueError):
+            program.evaluate({'x': [1], 'y': [1, 2]})
+
+    def test_without_numpy(self):
+        """Without NumPy rows are run one by one and a list is returned"""
+        with patch.object(batch, 'np', None):
+            program = self.compile("a / b", ['a', 'b'])
+            values, errors = program.evaluate({'a': [1, 4], 'b': [0, 2]})
+        self.assertFalse(program.vectorized)
+        self.assertEqual(values, [None, 2.0])
+        self.assertEqual(list(errors), [0])
+
+
+# =============================================================================
+# FUNCTION MEMOIZATION
+# =============================================================================
+class TestFunctionMemo(unittest.TestCase):
+    """Results of repeated function calls (function_memo.py)"""
+
+    def test_repeated_calls_hit(self):
+        """The same arguments are computed once"""
+        st = SymbolTable()
+        result, error, _ = TestHelper.run(
+            "create f taking a b do\ncreate t as a * b\nt + a\nend\nfind f 3 4\nfind f 3 4\nfind f 3 5", st, mode='quiet')
+        self.assertIsNone(error)
+        self.assertEqual(result.value, 18)
+        self.assertEqual(st.get("f").cache_info()[:4], (1, 2, function_memo.MAX_ENTRIES, 2))
+
+    def test_same_results_as_without_memo(self):
+        """Free variables, value types and errors are part of each call"""
+        programs = [
+            "create scale taking x do\nx * factor\nend\ncreate factor as 2\nfind scale 5\n"
+            "create factor as 3\nfind scale 5",
+            "create f taking a do\na + 1\nend\ncreate x as find f 1\nfind f 1.0",
+            "create f taking a do\na * -1\nend\ncreate x as find f 0.0\nfind f 0",
+            "create f taking a do\n10 / a\nend\ncreate x as find f 2\nfind f 2 / 0",
+            "create f taking a do\n10 / a\nend\ncreate x as find f 2\nfind f 0",
+        ]
+        for code in programs:
+            for engine in ('tree', 'iterative'):
+                with self.subTest(code=code, engine=engine):
+                    with patch.object(basic.Function, 'memoize', False):
+                        expected, expected_error, _ = TestHelper.run(code, engine=engine)
+                    result, error, _ = TestHelper.run(code + "\n" + code.rsplit("\n", 1)[1], engine=engine, mode='quiet')
+                    if expected_error:
+                        self.assertEqual(error.as_string(), expected_error.as_string())
+                    else:
+                        self.assertEqual(repr(result), repr(expected))
+
+    def test_only_arithmetic_bodies(self):
+        """Bodies that call functions are not memoized"""
+        st = SymbolTable()
+        TestHelper.run("create g taking do\n1\nend\ncreate f taking a do\nfind g\nend\nfind f 1", st, mode='quiet')
+        self.assertIsNone(st.get("f").cache_info())
+        self.assertIsNotNone(st.get("g").cache_info())
+
+    def test_lru_eviction(self):
+        """The least recently used result is dropped first"""
+        memo = function_memo.FunctionMemo([], maxsize=2)
+        memo.store((1,), Number(1))
+        memo.store((2,), Number(2))
+        self.assertEqual(memo.lookup(basic.Function('f', None, []), (1,)).value, 1)
+        memo.store((3,), Number(3))
+        self.assertEqual(list(memo.results), [(1,), (3,)])
+
+    def test_gives_up_without_hits(self):
+        """A body whose calls never repeat stops being memoized"""
+        st = SymbolTable()
+        with patch.object(function_memo, 'MAX_ENTRIES', 8):
+            TestHelper.run("create f taking a do\na * 2\nend\n" + "\n".join(f"find f {i}" for i in range(20)), st, mode='quiet')
+        info = st.get("f").cache_info()
+        self.assertFalse(info.active)
+        self.assertEqual((info.misses, info.currsize), (8, 0))
+
+    def test_memo_lives_on_the_body(self):
+        """Each program's memos hang off its function bodies and can be cleared"""
+        tokens, _ = basic.Lexer('<test>', "create f taking a do\na * 2\nend\nfind f 3\nfind f 3").make_tokens()
+        node = basic.Parser(tokens, use_llm=False).parse().node
+        context = basic.Context('<program>')
+        context.symbol_table = SymbolTable()
+        self.assertEqual(basic.execute(node, context).value.value, 6)
+        body = node.element_nodes[0].body_node
+        self.assertEqual(body.memo.info()[:2], (1, 1))
+        function_memo.clear_memos(node)
+        self.assertIsNone(body.memo)
+
+    def test_traced_calls_not_memoized(self):
+        """Every traced call shows the steps of its body"""
+        old_stdout = sys.stdout
+        sys.stdout = output = io.StringIO()
+        try:
+            result, error = basic.run('<test>', "create f taking a do\na * 2\nend\nfind f 3\nfind f 3", SymbolTable(), mode='full')
+        finally:
+            sys.stdout = old_stdout
+        self.assertIsNone(error)
+        self.assertEqual(result.value, 6)
+        self.assertEqual(output.getvalue().count("Result: 3 * 2 = 6"), 2)
+
+
+# =============================================================================
+# SCOPE RESOLUTION
+# =============================================================================
+class TestScopeResolver(unittest.TestCase):
+    """Frame slots of function bodies (scope_resolver.py)"""
+
+    def parse_function(self, code):
+        tokens, error = basic.Lexer('<test>', code).make_tokens()
+        self.assertIsNone(error)
+        return basic.Parser(tokens, use_llm=False).parse().node.element_nodes[0]
+
+    def test_layout(self):
+        """Parameters come first; a name read before it is assigned is looked up by name"""
+        func = self.parse_function("create f taking a b do\ncreate c as t + a\ncreate t as c\nt + b\nend")
+        layout = resolve_body(func.body_node, func.arg_name_toks)
+        self.assertEqual(layout, {'a': 0, 'b': 1, 'c': 2, 't': 3})
+
+        first, second, last = func.body_node.element_nodes
+        self.assertEqual((first.slot, first.value_node.left_node.slot, first.value_node.right_node.slot), (2, None, 0))
+        self.assertEqual((second.slot, second.value_node.slot), (3, 2))
+        self.assertEqual((last.left_node.slot, last.right_node.slot), (3, 1))
+
+    def test_programs_released(self):
+        """Nothing keeps a finished program's function bodies alive"""
+        import gc
+        import weakref
+        code = "create f taking a b do\ncreate t as a * b\nt + a\nend\nfind f 3 4\nfind f 3 4"
+        bodies = []
+        for use_native in (True, False):
+            st = SymbolTable()
+            with patch.object(basic.Function, 'use_native', use_native):
+                TestHelper.run(code, st, mode='quiet')
+            bodies.append(weakref.ref(st.get("f").body_node))
+        st = None
+        gc.collect()
+        self.assertEqual([body() for body in bodies], [None, None])
+
+    def test_dynamic_scoping(self):
+        """Callees still see the variables of their caller's frame"""
+        programs = [
+            ("create g taking do\nx * 2\nend\ncreate f taking a do\ncreate x as a + 1\nfind g\nend\nfind f 4", 10),
+            ("create t as 1\ncreate f taking a do\ncreate u as t\ncreate t as a\nu + t\nend\nfind f 5", 6),
+            ("create f taking a a do\na\nend\nfind f 1 2", 2),
+            ("create f taking n do\ncreate h taking do\nn * 3\nend\nfind h\nend\nfind f 2", 6),
+        ]
+        for code, expected in programs:
+            for engine in ('tree', 'iterative', 'vm'):
+                with self.subTest(code=code, engine=engine), \
+                        patch.object(basic.Function, 'use_native', False):
+                    result, error, _ = TestHelper.run(code, engine=engine)
+                    self.assertIsNone(error)
+                    self.assertEqual(result.value, expected)
+
+    def test_undefined_local(self):
+        """A local read before its assignment, with no outer value, is not defined"""
+        with patch.object(basic.Function, 'use_native', False):
+            _, error, _ = TestHelper.run("create f taking do\ncreate y as t\ncreate t as 1\nend\nfind f")
+        self.assertIn("'t' is not defined", error.as_string())
+
+    def test_lookup_does_not_compare_values(self):
+        """SymbolTable.get tests for None by identity"""
+        class Uncomparable:
+            def __eq__(self, other): raise AssertionError("compared")
+        value = Uncomparable()
+        table = SymbolTable(SymbolTable())
+        table.parent.set('x', value)
+        self.assertIs(table.get('x'), value)
+
+
+# =============================================================================
+# OUTPUT MODES
+# =============================================================================
+class TestOutputModes(unittest.TestCase):
+    """Quiet, summary and full trace output of basic.run"""
+
+    def capture(self, code, mode, engine='tree'):
+        symbol_table = SymbolTable()
+        output = io.StringIO()
+        old_stdout = sys.stdout
+        sys.stdout = output
+        try:
+            result, error = basic.run('<test>', code, symbol_table, engine=engine, mode=mode)
+        finally:
+            sys.stdout = old_stdout
+        return result, error, output.getvalue()
+
+    def test_quiet_prints_nothing(self):
+        """Quiet mode writes nothing to stdout"""
+        for engine in ('tree', 'vm', 'iterative'):
+            with self.subTest(engine=engine):
+                result, error, output = self.capture("create f taking x do\nx times 2\nend\nfind f (2 + 3)", 'quiet', engine)
+                self.assertIsNone(error)
+                self.assertEqual(result.value, 10)
+                self.assertEqual(output, "")
+
+    def test_summary_shows_tokens_and_tree(self):
+        """Summary mode prints the lexer and parser stages but no steps"""
+        _, _, output = self.capture("2 times 3", 'summary')
+        self.assertIn("[Lexicon Resolution] 'times' -> '*'", output)
+        self.assertIn("1. LEXER", output)
+        self.assertIn("2. PARSER", output)
+        self.assertNotIn("3. INTERPRETER", output)
+        self.assertNotIn("Multiply operation", output)
+
+    def test_full_trace(self):
+        """Full mode prints every evaluation step"""
+        _, _, output = self.capture("2 + 3", 'full')
+        self.assertIn("3. INTERPRETER", output)
+        self.assertIn("Add operation (+):", output)
+        self.assertIn("Result: 2 + 3 = 5", output)
+
+    def test_traced_function_bodies(self):
+        """Walked function bodies are traced too"""
+        with patch.object(basic.Function, 'use_native', False):
+            _, _, output = self.capture("create f taking x do\nx * 7\nend\nfind f 6", 'full')
+        self.assertIn("Result: 6 * 7 = 42", output)
+
+    def test_full_trace_matches_quiet(self):
+        """Tracing does not change results or errors"""
+        TestEngines.assert_same_as_tree(self, 'tree', mode='full')
+
+    def test_unknown_mode(self):
+        """An unknown output mode is rejected"""
+        with self.assertRaises(ValueError):
+            basic.run('<test>', "1", SymbolTable(), mode='loud')
+
+
+# =============================================================================
+# OPTIMIZER
+# =============================================================================
+class TestOptimizer(unittest.TestCase):
+    """
+    Constant folding pass (optimizer.py).
+    """
+
+    def parse(self, code):
+        tokens, error = basic.Lexer('<test>', code).make_tokens()
+        self.assertIsNone(error)
+        ast = basic.Parser(tokens, use_llm=False).parse()
+        self.assertIsNone(ast.error)
+        return ast.node
+
+    def test_folds_constant_expression(self):
+        """(5 + 3) * 2 becomes a single number"""
+        node = fold_constants(self.parse("(5 + 3) * 2")).element_nodes[0]
+        self.assertIsInstance(node, basic.NumberNode)
+        self.assertEqual(node.tok.value, 16)
+
+    def test_folds_list_operation(self):
+        """List operations on literals are folded"""
+        node = fold_constants(self.parse("sum these numbers: [1, 2, 3.5]")).element_nodes[0]
+        self.assertIsInstance(node, basic.NumberNode)
+        self.assertEqual(node.tok.value, 6.5)
+        self.assertEqual(node.tok.type, basic.TT_FLOAT)
+
+    def test_division_by_zero_not_folded(self):
+        """The divisor is folded, the division itself is left for the runtime"""
+        node = fold_constants(self.parse("10 / (5 - 5)")).element_nodes[0]
+        self.assertIsInstance(node, basic.BinOpNode)
+        self.assertIsInstance(node.right_node, basic.NumberNode)
+        self.assertEqual(node.right_node.tok.value, 0)
+
+    def test_identities(self):
+        """x * 1 and x - 0 are removed, x + 0 is kept (-0.0 + 0 is 0.0)"""
+        node = fold_constants(self.parse("(a * b) * 1")).element_nodes[0]
+        self.assertEqual(node.op_tok.type, basic.TT_MUL)
+        self.assertIsInstance(node.left_node, basic.VarAccessNode)
+
+        node = fold_constants(self.parse("(a * b) + 0")).element_nodes[0]
+        self.assertEqual(node.op_tok.type, basic.TT_PLUS)
+
+    def test_variables_not_simplified(self):
+        """x * 1 is kept for a bare name, which could hold a function"""
+        node = fold_constants(self.parse("a * 1")).element_nodes[0]
+        self.assertIsInstance(node, basic.BinOpNode)
+
+    def test_function_bodies_folded(self):
+        """Constants inside function bodies are folded without touching the input"""
+        original = self.parse("create f taking a do\na * (2 + 3)\nend")
+        folded = fold_constants(original)
+        self.assertIsNot(folded, original)
+        body = folded.element_nodes[0].body_node.element_nodes[0]
+        self.assertEqual(body.right_node.tok.value, 5)
+        self.assertIsInstance(original.element_nodes[0].body_node.element_nodes[0].right_node, basic.BinOpNode)
+
+    def test_unchanged_tree_is_shared(self):
+        """Nothing to fold: the same tree is returned"""
+        node = self.parse("a + b")
+        self.assertIs(fold_constants(node), node)
+
+
+# =============================================================================
+# PROGRAM CACHE
+# =============================================================================
+class TestProgramCache(unittest.TestCase):
+    """
+    Compiled-program (.lfc) cache used by basic.run.
+    """
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.cache = ProgramCache(self.tmpdir.name)
+
+    def run_cached(self, code, symbol_table=None, optimize=False):
+        if symbol_table is None:
+            symbol_table = SymbolTable()
+        controller = RecordingGeminiController()
+        old_stdout = sys.stdout
+        sys.stdout = io.StringIO()
+        try:
+            with patch.object(gemini_controller, '_gemini_instance', controller), \
+                 patch.object(basic, 'lookup_operator', return_value=None):
+                result, error = basic.run('<test>', code, symbol_table, optimize=optimize, cache=self.cache)
+        finally:
+            sys.stdout = old_stdout
+        return result, error, controller
+
+    def lfc_files(self):
+        return [name for name in os.listdir(self.tmpdir.name) if name.endswith('.lfc')]
+
+    def test_second_run_skips_resolution(self):
+        """A cached program is not parsed again, so no words are resolved"""
+        code = "create f taking a do\na add 3\nend\nfind f 4"
+        result, error, controller = self.run_cached(code)
+        self.assertIsNone(error)
+        self.assertEqual(result.value, 7)
+        self.assertEqual(controller.batches, [['add']])
+        self.assertEqual(len(self.lfc_files()), 1)
+
+        with patch.object(basic.Parser, 'parse', side_effect=AssertionError("parsed again")):
+            result, error, controller = self.run_cached(code)
+        self.assertIsNone(error)
+        self.assertEqual(result.value, 7)
+        self.assertEqual(controller.batches, [])
+
+    def test_changed_source_is_recompiled(self):
+        """Editing the program changes the key"""
+        self.run_cached("5 add 3")
+        result, _, controller = self.run_cached("5 add 4")
+        self.assertEqual(result.value, 9)
+        self.assertEqual(controller.batches, [['add']])
+        self.assertEqual(len(self.lfc_files()), 2)
+
+    def test_key_depends_on_bindings_and_options(self):
+        """Names bound beforehand and the optimize flag select different entries"""
+        st = SymbolTable()
+        base = self.cache.key('<test>', "add 1", st)
+        self.assertNotEqual(base, self.cache.key('<test>', "add 1", st, optimize=True))
+        st.set("add", Number(1))
+        self.assertNotEqual(base, self.cache.key('<test>', "add 1", st))
+
+    def test_key_covers_parent_scopes(self):
+        """Names bound in a parent table change the parse, so they select different entries"""
+        parent = SymbolTable()
+        parent.set("plus", Number(100))
+        base = self.cache.key('<test>', "x plus 3", SymbolTable(SymbolTable()))
+        self.assertNotEqual(base, self.cache.key('<test>', "x plus 3", SymbolTable(parent)))
+
+        old_stdout = sys.stdout
+        sys.stdout = io.StringIO()
+        try:
+            with patch.object(gemini_controller, '_gemini_instance', RecordingGeminiController()):
+                program, error = compile_batch("x plus 3", ['x'], SymbolTable(), cache=self.cache)
+                self.assertIsNone(error)
+                self.assertEqual(list(program.evaluate({'x': [1, 2]})[0]), [4, 5])
+                program, error = compile_batch("x plus 3", ['x'], parent, cache=self.cache)
+        finally:
+            sys.stdout = old_stdout
+        self.assertIsNone(program)
+        self.assertIn("Invalid Syntax", error.as_string())
+
+    def test_least_recently_used_evicted(self):
+        """The directory keeps at most max_entries programs, dropping the least recently used"""
+        now = [1000.0]
+        self.cache = ProgramCache(self.tmpdir.name, max_entries=2, clock=lambda: now[0])
+        for code in ("1 + 1", "1 + 2", "1 + 3"):
+            self.run_cached(code)
+            now[0] += 1
+            if code == "1 + 2":
+                self.run_cached("1 + 1")  # a hit makes it recent again
+                now[0] += 1
+        keys = {self.cache.key('<test>', code, SymbolTable()) + '.lfc' for code in ("1 + 1", "1 + 3")}
+        self.assertEqual(set(self.lfc_files()), keys)
+
+    def test_unused_programs_expire(self):
+        """Files unused for ttl seconds are removed by the next store"""
+        now = [1000.0]
+        self.cache = ProgramCache(self.tmpdir.name, ttl=60, clock=lambda: now[0])
+        self.run_cached("1 + 1")
+        now[0] += 120
+        self.run_cached("1 + 2")
+        self.assertEqual(self.lfc_files(), [self.cache.key('<test>', "1 + 2", SymbolTable()) + '.lfc'])
+
+    def test_interpreter_version_invalidates(self):
+        """Files written by another interpreter version are not used"""
+        key = self.cache.key('<test>', "1 + 2", None)
+        with patch.object(basic, 'INTERPRETER_VERSION', 'other'):
+            self.assertNotEqual(self.cache.key('<test>', "1 + 2", None), key)
+
+    def test_errors_keep_positions(self):
+        """Runtime errors of a cached program point at the same source"""
+        code = "create x as 0\n10 / x"
+        _, first, _ = self.run_cached(code)
+        _, second, _ = self.run_cached(code)
+        self.assertEqual(second.as_string(), first.as_string())
+
+    def test_corrupt_file_is_a_miss(self):
+        """A damaged .lfc file is ignored and rewritten"""
+        self.run_cached("2 * 3")
+        path = os.path.join(self.tmpdir.name, self.lfc_files()[0])
+        with open(path, 'wb') as f:
+            f.write(b'LFC1\ngarbage')
+        result, error, _ = self.run_cached("2 * 3")
+        self.assertIsNone(error)
+        self.assertEqual(result.value, 6)
+        self.assertIsNotNone(self.cache.load(self.lfc_files()[0][:-4]))
+
+    def test_parse_errors_not_cached(self):
+        """Only successfully compiled programs are stored"""
+        _, error, _ = self.run_cached("5 qwerty 3")
+        self.assertIsNotNone(error)
+        self.assertEqual(self.lfc_files(), [])
+
+
+# =============================================================================
+# RESOLVER CACHE
+# =============================================================================
+class TestResolverCache(unittest.TestCase):
+    """
+    Persistent word -> operator cache used by GeminiController.
+    """
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, 'cache.sqlite3')
+        self.now = 1000.0
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def make_cache(self, **kwargs):
+        cache = PersistentCache(self.path, table='operation_words', clock=lambda: self.now, **kwargs)
+        self.addCleanup(cache.close)
+        return cache
+
+    def make_controller(self, cache, answer):
+        with patch.object(gemini_controller.genai, 'configure'), \
+             patch.object(gemini_controller.genai, 'GenerativeModel') as model_cls:
+            model_cls.return_value.generate_content.return_value = MagicMock(text=answer)
+            controller = gemini_controller.GeminiController(api_key='test', cache=cache, templates=False)
+        controller.templates = None
+        return controller
+
+    def test_shared_between_instances(self):
+        """Entries written by one cache are visible to another on the same file"""
+        self.make_cache().put('sum', '+')
+        self.assertEqual(self.make_cache().get('sum'), '+')
+
+    def test_entries_expire(self):
+        """Entries older than the TTL are treated as misses"""
+        cache = self.make_cache(ttl=60)
+        cache.put('sum', '+')
+        self.now += 61
+        self.assertIsNone(cache.get('sum'))
+
+    def test_least_recently_used_evicted(self):
+        """The cache never grows past max_entries"""
+        cache = self.make_cache(max_entries=2, ttl=100)
+        cache.put('sum', '+')
+        self.now += 11
+        cache.put('times', '*')
+        self.now += 11
+        cache.get('sum')
+        self.now += 11
+        cache.put('minus', '-')
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(cache.get('times'))
+        self.assertEqual(cache.get('sum'), '+')
+
+    def test_recent_hits_not_written(self):
+        """Hits only record their use once the last record is a tenth of the TTL old"""
+        cache = self.make_cache(ttl=100)
+        cache.put('sum', '+')
+        used = lambda: cache.conn.execute("SELECT used FROM operation_words").fetchone()[0]
+        self.now += 5
+        cache.get('sum')
+        self.assertEqual(used(), 1000.0)
+        self.now += 6
+        cache.get('sum')
+        self.assertEqual(used(), 1011.0)
+
+    def test_warm_lookup_skips_llm(self):
+        """A cached word is resolved without calling the model"""
+        controller = self.make_controller(self.make_cache(), '*')
+        self.assertEqual(controller.resolve_operation_word('Multiply'), ('*', None))
+        self.assertEqual(controller.resolve_operation_word('multiply'), ('*', None))
+        self.assertEqual(controller.model.generate_content.call_count, 1)
+
+    def test_negative_entries_cached(self):
+        """Rejected words are cached too"""
+        controller = self.make_controller(self.make_cache(), 'ERROR')
+        controller.resolve_operation_word('qwerty')
+        symbol, error = controller.resolve_operation_word('qwerty')
+        self.assertIsNone(symbol)
+        self.assertIn("Unknown operation word", error)
+        self.assertEqual(controller.model.generate_content.call_count, 1)
+
+    def test_malformed_answer_not_cached(self):
+        """Unexpected LLM output is not remembered"""
+        cache = self.make_cache()
+        controller = self.make_controller(cache, 'plus sign')
+        controller.resolve_operation_word('plus')
+        self.assertIsNone(cache.get('plus'))
+
+    def test_bad_settings_fall_back_to_defaults(self):
+        """A typo in a cache or controller setting warns instead of failing"""
+        settings = {'LINGUAFLOW_CACHE_DIR': self.tmpdir.name, 'LINGUAFLOW_CACHE_TTL': '1 day',
+                    'LINGUAFLOW_CACHE_MAX_ENTRIES': '10k', 'LINGUAFLOW_LLM_CONCURRENCY': '0',
+                    'LINGUAFLOW_LLM_RPM': 'fast', 'LINGUAFLOW_LLM_TIMEOUT': '-1'}
+        with patch.dict(os.environ, settings), self.assertWarns(RuntimeWarning):
+            cache = open_operation_cache()
+            self.addCleanup(cache.close)
+            controller = gemini_controller.AsyncGeminiController(backend=TableBackend())
+        self.assertEqual(cache.ttl, 30 * 24 * 60 * 60)
+        self.assertEqual(cache.max_entries, 10000)
+        self.assertEqual(controller.max_concurrency, gemini_controller.DEFAULT_CONCURRENCY)
+        self.assertIsNone(controller.limiter)
+        self.assertEqual(controller.timeout, 20.0)
+
+
+# =============================================================================
+# ASYNC CONTROLLER
+# =============================================================================
+class TestAsyncController(unittest.TestCase):
+    """
+    AsyncGeminiController: coalescing of identical requests in flight and
+    the concurrency limit.
+    """
+
+    def make_controller(self, answer, delay=0.05, **kwargs):
+        """A controller whose model answers every prompt with answer(prompt) after delay"""
+        self.calls = []
+        self.running = self.most_running = 0
+        lock = threading.Lock()
+
+        def generate_content(prompt):
+            with lock:
+                self.calls.append(prompt)
+                self.running += 1
+                self.most_running = max(self.most_running, self.running)
+            time.sleep(delay)
+            with lock:
+                self.running -= 1
+            return MagicMock(text=answer(prompt))
+
+        with patch.object(gemini_controller.genai, 'configure'), \
+             patch.object(gemini_controller.genai, 'GenerativeModel') as model_cls:
+            model_cls.return_value.generate_content.side_effect = generate_content
+            controller = gemini_controller.AsyncGeminiController(api_key='test', cache=False, templates=False, **kwargs)
+        controller.cache = None
+        controller.templates = None
+        return controller
+
+    def test_identical_words_coalesced(self):
+        """Concurrent requests for one word make a single model call"""
+        controller = self.make_controller(lambda prompt: '+')
+
+        async def main():
+            return await asyncio.gather(*[controller.resolve_operation_word(word) for word in ['Sum', 'sum'] * 5])
+        results = asyncio.run(main())
+        self.assertEqual(results, [('+', None)] * 10)
+        self.assertEqual(len(self.calls), 1)
+
+    def test_errors_shared(self):
+        """Every caller waiting on a failed request gets its error"""
+        controller = self.make_controller(lambda prompt: 1 / 0)
+
+        async def main():
+            return await asyncio.gather(*[controller.resolve_operation_word('sum') for _ in range(3)])
+        results = asyncio.run(main())
+        self.assertEqual(len(self.calls), 1)
+        for symbol, error in results:
+            self.assertIsNone(symbol)
+            self.assertIn("LLM error", error)
+
+    def test_concurrency_limit(self):
+        """No more than max_concurrency model calls run at once"""
+        controller = self.make_controller(lambda prompt: '*', max_concurrency=2)
+
+        async def main():
+            return await asyncio.gather(*[controller.resolve_operation_word(f'word{i}') for i in range(6)])
+        asyncio.run(main())
+        self.assertEqual(len(self.calls), 6)
+        self.assertEqual(self.most_running, 2)
+
+    def test_batch_shares_requests_in_flight(self):
+        """A batch only sends words nobody is asking for yet"""
+        def answer(prompt):
+            return '{"times": "*", "hello": "ERROR"}' if prompt.startswith('[') else '+'
+        controller = self.make_controller(answer)
+
+        async def main():
+            single = asyncio.ensure_future(controller.resolve_operation_word('add'))
+            await asyncio.sleep(0)
+            words = await controller.resolve_operation_words(['add', 'times', 'hello'])
+            return await single, words
+        single, words = asyncio.run(main())
+        self.assertEqual(single, ('+', None))
+        self.assertEqual(words['add'], ('+', None))
+        self.assertEqual(words['times'], ('*', None))
+        self.assertIsNone(words['hello'][0])
+        self.assertEqual(sorted(self.calls), ['["times", "hello"]', 'add'])
+
+    def test_word_missing_from_batch_asked_alone(self):
+        """A single request waiting on a batch that skipped its word asks again"""
+        controller = self.make_controller(lambda prompt: '{}' if prompt.startswith('[') else '-')
+
+        async def main():
+            batch = asyncio.ensure_future(controller.resolve_operation_words(['minus']))
+            await asyncio.sleep(0)
+            single = await controller.resolve_operation_word('minus')
+            return single, await batch
+        single, words = asyncio.run(main())
+        self.assertEqual(single, ('-', None))
+        self.assertEqual(words, {})
+        self.assertEqual(self.calls, ['["minus"]', 'minus'])
+
+    def test_blocking_controller(self):
+        """GeminiController coalesces calls from several threads"""
+        controller = gemini_controller.GeminiController(controller=self.make_controller(lambda prompt: '/', delay=0.2))
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(controller.resolve_operation_word('divide')))
+                   for _ in range(4)]
+        for thread in threads: thread.start()
+        for thread in threads: thread.join()
+        self.assertEqual(results, [('/', None)] * 4)
+        self.assertEqual(len(self.calls), 1)
+        self.assertEqual(controller.convert_natural_to_symbolic('ten over two'), ('/', None))
+
+
+# =============================================================================
+# CALC TEMPLATES
+# =============================================================================
+class TestCalcTemplates(unittest.TestCase):
+    """Natural language conversions reused with different numbers"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        cache = PersistentCache(os.path.join(self.tmpdir.name, 'cache.sqlite3'), table='calc_templates')
+        self.addCleanup(cache.close)
+        self.templates = ConversionTemplates(cache)
+
+    def test_abstract_numbers(self):
+        """Keys are lowercased, with whitespace collapsed and numbers abstracted"""
+        self.assertEqual(abstract_numbers("What is  5 plus\t3.5"), ('what is # plus #', ['5', '3.5']))
+        self.assertEqual(abstract_numbers("log2 of x"), ('log2 of x', []))
+
+    def test_make_template(self):
+        """Only templates whose numbers map back unambiguously are made"""
+        self.assertEqual(make_template("10 - 2", ['2', '10']), '{1} - {0}')
+        self.assertIsNone(make_template("10 / 2", ['10']))
+        self.assertIsNone(make_template("5 - 5", ['5', '5']))
+        self.assertIsNone(make_template("2 / 2", ['2']))
+        self.assertIsNone(make_template("10.0 / 2", ['10']))
+
+    def test_derived_constants_are_not_stored(self):
+        """Numbers the model worked out from the sentence's own are not kept as constants"""
+        self.assertIsNone(make_template("5 * 4 * 3 * 2 * 1", ['5']))
+        self.templates.store("what is 5 factorial", "5 * 4 * 3 * 2 * 1")
+        self.assertIsNone(self.templates.lookup("what is 7 factorial"))
+        self.templates.store("sum of the first 4 numbers", "1 + 2 + 3 + 4")
+        self.assertIsNone(self.templates.lookup("sum of the first 6 numbers"))
+
+    def test_hit_with_other_numbers(self):
+        """A stored conversion answers the same sentence with other numbers"""
+        self.templates.store("subtract 2 from 10", "10 - 2")
+        self.assertEqual(self.templates.lookup("Subtract 7  from 30.5"), "30.5 - 7")
+        self.assertIsNone(self.templates.lookup("add 7 to 30"))
+
+    def test_controller_uses_templates(self):
+        """The controller only asks the model for the first sentence of a shape"""
+        with patch.object(gemini_controller.genai, 'configure'), \
+             patch.object(gemini_controller.genai, 'GenerativeModel') as model_cls:
+            model = model_cls.return_value
+            model.generate_content.return_value = MagicMock(text='"5 + 3"')
+            controller = gemini_controller.GeminiController(api_key='test', cache=False, templates=self.templates)
+        controller.cache = None
+
+        self.assertEqual(controller.convert_natural_to_symbolic("what is 5 plus 3"), ('5 + 3', None))
+        self.assertEqual(controller.convert_natural_to_symbolic("what is 12 plus 9"), ('12 + 9', None))
+        self.assertEqual(model.generate_content.call_count, 1)
+
+        model.generate_content.return_value = MagicMock(text='ERROR')
+        self.assertIsNone(controller.convert_natural_to_symbolic("what is love")[0])
+        self.assertIsNone(controller.convert_natural_to_symbolic("what is love")[0])
+        self.assertEqual(model.generate_content.call_count, 3)
+
+
+# =============================================================================
+# RESOLVER BACKENDS
+# =============================================================================
+class TestResolverBackends(unittest.TestCase):
+    """Offline backends behind the GeminiController"""
+
+    def test_table_backend(self):
+        """The table answers lexicon words, extra words and simple sentences"""
+        backend = TableBackend({'zorp': '*'})
+        self.assertEqual(backend.resolve_word('multipy'), '*')
+        self.assertEqual(backend.resolve_word('Zorp'), '*')
+        self.assertEqual(backend.resolve_word('hello'), 'ERROR')
+        self.assertEqual(gemini_controller.parse_json_object(backend.resolve_words(['sum', 'hello'])),
+                         {'sum': '+', 'hello': 'ERROR'})
+        self.assertEqual(backend.convert("what is (5 plus 3) divided by 2"), '( 5 + 3 ) / 2')
+        self.assertEqual(backend.convert("what is the time"), 'ERROR')
+        self.assertEqual(backend.convert("add 5"), 'ERROR')
+
+    def test_incomplete_backend(self):
+        """A backend missing a request method fails when it is created"""
+        class WordsOnly(ResolverBackend):
+            def resolve_word(self, word):
+                return 'ERROR'
+
+        with self.assertRaises(TypeError):
+            WordsOnly()
+
+    def test_backend_from_spec(self):
+        """LINGUAFLOW_RESOLVER selects the backend"""
+        self.assertIsNone(backend_from_spec('gemini'))
+        self.assertIsInstance(backend_from_spec('table'), TableBackend)
+        self.assertEqual(backend_from_spec('http://127.0.0.1:9/').url, 'http://127.0.0.1:9')
+        with self.assertRaises(ValueError):
+            backend_from_spec('carrier-pigeon')
+
+        environ = {k: v for k, v in os.environ.items() if k != 'GEMINI_API_KEY'}
+        environ['LINGUAFLOW_RESOLVER'] = 'table'
+        with patch.dict(os.environ, environ, clear=True):
+            controller = gemini_controller.GeminiController()
+        self.assertIsInstance(controller.backend, TableBackend)
+        self.assertIsNone(controller.cache)
+        self.assertEqual(controller.resolve_operation_word('sum'), ('+', None))
+
+    def start(self, **profile):
+        server = start_server(backend=TableBackend({'zorp': '-'}), latency=0, jitter=0, **profile)
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        controller = gemini_controller.GeminiController(backend=HttpBackend(server.url, timeout=10))
+        controller.async_controller.retries = 0
+        return controller, server
+
+    def test_stand_in_server(self):
+        """Programs run end to end against the local HTTP stand-in"""
+        controller, server = self.start()
+        old_stdout = sys.stdout
+        sys.stdout = io.StringIO()
+        try:
+            with patch.object(gemini_controller, '_gemini_instance', controller):
+                result, error = basic.run('<test>', "10 zorp 3 zorp 2", SymbolTable())
+        finally:
+            sys.stdout = old_stdout
+        self.assertIsNone(error)
+        self.assertEqual(result.value, 5)
+        self.assertEqual(server.requests, 1)
+        self.assertEqual(controller.convert_natural_to_symbolic("what is 5 zorp 3"), ('5 - 3', None))
+
+    def test_stand_in_failures(self):
+        """Simulated quota and server errors reach callers as LLM errors"""
+        controller, server = self.start(quota_rate=1.0)
+        self.assertEqual(controller.resolve_operation_word('zorp'), (None, "LLM quota exceeded. Please try again later."))
+        controller, server = self.start(error_rate=1.0)
+        symbol, error = controller.resolve_operation_word('zorp')
+        self.assertIsNone(symbol)
+        self.assertIn("HTTP 500", error)
+
+    def test_rejected_requests_not_retried(self):
+        """HTTP 4xx statuses and malformed replies fail at once"""
+        controller, server = self.start()
+        controller.backend.url += '/missing'
+        controller.async_controller.retries = 2
+        with patch.object(gemini_controller, 'backoff_delay', return_value=0):
+            symbol, error = controller.resolve_operation_word('zorp')
+        self.assertIsNone(symbol)
+        self.assertIn("HTTP 404", error)
+        self.assertEqual(controller.metrics()['retries'], 0)
+
+        backend = HttpBackend('http://127.0.0.1:9')
+        response = MagicMock()
+        response.__enter__.return_value.read.return_value = b'<html>Bad gateway</html>'
+        with patch('urllib.request.urlopen', return_value=response):
+            with self.assertRaises(BackendRejected):
+                backend.resolve_word('zorp')
+
+
+# =============================================================================
+# RESILIENCE
+# =============================================================================
+class FailingBackend(ResolverBackend):
+    """A backend whose every request fails with a quota error"""
+    def __init__(self):
+        self.calls = 0
+
+    def resolve_word(self, word):
+        self.calls += 1
+        raise QuotaExceeded("quota")
+
+    resolve_words = convert = resolve_word
+
+
+class RejectingBackend(ResolverBackend):
+    """A backend that refuses every request, like an HTTP 400"""
+    def resolve_word(self, word):
+        raise BackendRejected("400")
+
+    resolve_words = convert = resolve_word
+
+
+class TestResilience(unittest.TestCase):
+    """Rate limiting, retries and the circuit breaker around backend calls"""
+
+    def setUp(self):
+        self.now = 0.0
+
+    def test_token_bucket(self):
+        """Bursts pass at once; later requests wait for their token"""
+        bucket = TokenBucket(rate=2, burst=2, clock=lambda: self.now)
+        self.assertEqual([bucket.reserve() for _ in range(4)], [0.0, 0.0, 0.5, 1.0])
+        self.now = 2.5
+        self.assertEqual(bucket.reserve(), 0.0)
+        self.assertEqual(bucket.waited, 1.5)
+
+    def test_circuit_breaker(self):
+        """The circuit opens after repeated failures and lets one trial through later"""
+        breaker = CircuitBreaker(threshold=2, cooldown=10, clock=lambda: self.now)
+        breaker.record_failure()
+        breaker.check()
+        breaker.record_failure()
+        self.assertTrue(breaker.is_open)
+        with self.assertRaises(CircuitOpen):
+            breaker.check()
+
+        self.now = 10
+        breaker.check()  # the trial
+        with self.assertRaises(CircuitOpen):
+            breaker.check()
+        breaker.record_failure()
+        self.assertTrue(breaker.is_open)
+
+        self.now = 20
+        breaker.check()
+        breaker.record_success()
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+        breaker.check()
+        self.assertEqual((breaker.times_opened, breaker.rejected), (2, 2))
+
+    def test_controller_fails_fast(self):
+        """Once the circuit is open, requests are not sent; the fallback answers what it can"""
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        cache = PersistentCache(os.path.join(tmpdir.name, 'cache.sqlite3'))
+        self.addCleanup(cache.close)
+        backend = FailingBackend()
+        controller = gemini_controller.GeminiController(
+            backend=backend, cache=cache, breaker=CircuitBreaker(threshold=3, cooldown=60))
+
+        with patch.object(gemini_controller, 'backoff_delay', return_value=0):
+            self.assertEqual(controller.resolve_operation_word('zorp'), (None, "LLM quota exceeded. Please try again later."))
+            self.assertEqual(backend.calls, 3)  # tried, then retried twice
+
+            symbol, error = controller.resolve_operation_word('blorp')
+            self.assertIsNone(symbol)
+            self.assertIn("LLM unavailable", error)
+            self.assertEqual(controller.resolve_operation_word('sum'), ('+', None))
+            self.assertEqual(controller.convert_natural_to_symbolic('what is 5 plus 3'), ('5 + 3', None))
+        self.assertEqual(backend.calls, 3)
+        self.assertIsNone(cache.get('sum'))
+
+        metrics = controller.metrics()
+        self.assertEqual(metrics['circuit'], 'open')
+        self.assertEqual(metrics['requests'], 3)
+        self.assertEqual(metrics['retries'], 2)
+        self.assertEqual(metrics['rejected'], 3)
+        self.assertEqual(metrics['fallbacks'], 2)
+
+    def test_fallback_failures_keep_circuit_open_error(self):
+        """A fallback that fails or is too slow gives the CircuitOpen error, within the timeout"""
+        class SlowFallback(TableBackend):
+            def resolve_word(self, word):
+                time.sleep(1)
+                return super().resolve_word(word)
+
+        for fallback in (FailingBackend(), SlowFallback()):
+            with self.subTest(fallback=type(fallback).__name__):
+                breaker = CircuitBreaker(threshold=1, cooldown=60)
+                breaker.record_failure()
+                controller = gemini_controller.GeminiController(backend=FailingBackend(), fallback=fallback, breaker=breaker)
+                controller.async_controller.timeout = 0.1
+                start = time.perf_counter()
+                symbol, error = controller.resolve_operation_word('sum')
+                self.assertLess(time.perf_counter() - start, 0.9)
+                self.assertIsNone(symbol)
+                self.assertIn("LLM unavailable", error)
+                self.assertEqual(controller.metrics()['fallbacks'], 0)
+
+
+    def test_client_errors_keep_circuit_closed(self):
+        """Refused requests are not retried and never open the circuit"""
+        breaker = CircuitBreaker(threshold=3, cooldown=60, clock=lambda: self.now)
+        controller = gemini_controller.GeminiController(backend=RejectingBackend(), breaker=breaker)
+        for word in ['zorp', 'blorp', 'qux', 'flib', 'snark']:
+            self.assertEqual(controller.resolve_operation_word(word), (None, "LLM error: 400"))
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+        self.assertEqual(controller.metrics()['retries'], 0)
+
+        # A refusal also ends a half-open trial: the backend is reachable
+        for _ in range(3):
+            breaker.record_failure()
+        self.now = 60
+        self.assertEqual(controller.resolve_operation_word('zorp'), (None, "LLM error: 400"))
+        self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+
+
+# =============================================================================
+# DEADLINES AND HEDGED REQUESTS
+# =============================================================================
+class SlowBackend(TableBackend):
+    """A table whose n-th request takes delays[n] seconds (the last delay after that)"""
+    def __init__(self, *delays):
+        super().__init__({'zorp': '-'})
+        self.delays = list(delays)
+        self.calls = 0
+
+    def resolve_word(self, word):
+        delay = self.delays[min(self.calls, len(self.delays) - 1)]
+        self.calls += 1
+        time.sleep(delay)
+        return super().resolve_word(word)
+
+    def resolve_words(self, words):
+        return json.dumps({word: self.resolve_word(word) for word in words})
+
+
+class TestDeadlines(unittest.TestCase):
+    """Request timeouts, hedged requests and the parser's resolution budget"""
+
+    def make_controller(self, backend):
+        controller = gemini_controller.GeminiController(backend=backend)
+        controller.async_controller.retries = 0
+        return controller
+
+    def test_request_timeout(self):
+        """A request without a reply in time fails instead of waiting"""
+        controller = self.make_controller(SlowBackend(0.5))
+        controller.async_controller.timeout = 0.05
+        symbol, error = controller.resolve_operation_word('zorp')
+        self.assertIsNone(symbol)
+        self.assertIn("no reply within 0.05s", error)
+        self.assertEqual(controller.metrics()['timeouts'], 1)
+
+    def test_hedged_request(self):
+        """A request slower than usual is sent again and the first reply wins"""
+        controller = self.make_controller(SlowBackend(0.8, 0.0))
+        for _ in range(20):
+            controller.async_controller.latency.record(0.01)
+
+        start = time.perf_counter()
+        self.assertEqual(controller.resolve_operation_word('zorp'), ('-', None))
+        self.assertLess(time.perf_counter() - start, 0.5)
+        metrics = controller.metrics()
+        self.assertEqual((metrics['hedges'], metrics['requests']), (1, 2))
+
+    def test_queued_request_not_hedged(self):
+        """Time spent waiting for a concurrency slot does not trigger a hedge"""
+        backend = SlowBackend(0.2)
+        controller = gemini_controller.GeminiController(backend=backend, max_concurrency=1)
+        controller.async_controller.retries = 0
+        for _ in range(20):
+            controller.async_controller.latency.record(0.01)
+
+        async def resolve_both():
+            return await asyncio.gather(
+                controller.async_controller.resolve_operation_word('zorp'),
+                controller.async_controller.resolve_operation_word('blorp'),
+            )
+        results = asyncio.run(resolve_both())
+        self.assertEqual(results[0], ('-', None))
+        metrics = controller.metrics()
+        self.assertEqual((metrics['hedges'], metrics['requests']), (0, 2))
+        self.assertEqual(backend.calls, 2)
+
+    def test_resolution_budget(self):
+        """A parse waiting on the LLM past its budget fails with a syntax error"""
+        controller = self.make_controller(SlowBackend(0.8))
+        old_stdout = sys.stdout
+        sys.stdout = io.StringIO()
+        start = time.perf_counter()
+        try:
+            with patch.object(gemini_controller, '_gemini_instance', controller), \
+                 patch.object(basic.Parser, 'resolution_budget', 0.1):
+                result, error = basic.run('<test>', "5 zorp 3", SymbolTable())
+        finally:
+            sys.stdout = old_stdout
+        self.assertLess(time.perf_counter() - start, 0.6)
+        self.assertIsNone(result)
+        self.assertEqual(error.error_name, 'Invalid Syntax')
+        self.assertIn("'zorp' within the 0.1s resolution budget", error.details)
+
+
+# =============================================================================
+# WORD PREFETCH
+# =============================================================================
+class TestWordPrefetch(unittest.TestCase):
+    """Operation words sent to the LLM before the program is lexed"""
+
+    def test_candidate_words(self):
+        """Names, keywords and lexicon words are not sent"""
+        text = ("create x as 5\ncreate f taking a b do\na zorp b\nend\nfind f 1 2\n"
+                "x blorp 3\nsum of 1 and 2\ncreate g taking p do p qux p end\nY")
+        self.assertEqual(candidate_words(text), ['Y', 'blorp', 'qux', 'zorp'])
+        table = SymbolTable()
+        table.set('Y', Number(1))
+        self.assertEqual(candidate_words("Y zorp 2", table), ['zorp'])
+
+    def test_words_sent_before_lexing(self):
+        """The batch is on its way before lexing starts, and is the only request"""
+        controller = gemini_controller.GeminiController(backend=TableBackend({'zorp': '-'}))
+        submitted = []
+        submit = controller.submit_operation_words
+        def recording_submit(words):
+            submitted.append(sorted(words))
+            return submit(words)
+        controller.submit_operation_words = recording_submit
+
+        make_tokens = FastLexer.make_tokens
+        at_lexing = []
+        def recording_make_tokens(lexer):
+            at_lexing.append(list(submitted))
+            return make_tokens(lexer)
+
+        old_stdout = sys.stdout
+        sys.stdout = io.StringIO()
+        try:
+            with patch.object(gemini_controller, '_gemini_instance', controller), \
+                 patch.object(FastLexer, 'make_tokens', recording_make_tokens):
+                result, error = basic.run('<test>', "create f taking a b do\na zorp b\nend\nfind f 6 2", SymbolTable())
+        finally:
+            sys.stdout = old_stdout
+        self.assertIsNone(error)
+        self.assertEqual(result.value, 4)
+        self.assertEqual(at_lexing, [[['zorp']]])
+        self.assertEqual(controller.metrics()['requests'], 1)
+
+
 # =============================================================================
 # TEST RUNNER
 # =============================================================================
@@ -859,6 +2735,27 @@ def run_tests():
         TestEdgeCases,
         TestLLMSynonyms,
         TestIntegration,
+        TestBoundNames,
+        TestBatchedResolution,
+        TestOperatorLexicon,
+        TestFastLexer,
+        TestSourcePositions,
+        TestEngines,
+        TestFlatAST,
+        TestListFold,
+        TestBatch,
+        TestFunctionMemo,
+        TestScopeResolver,
+        TestOutputModes,
+        TestOptimizer,
+        TestProgramCache,
+        TestResolverCache,
+        TestAsyncController,
+        TestCalcTemplates,
+        TestResolverBackends,
+        TestResilience,
+        TestDeadlines,
+        TestWordPrefetch,
     ]
 
     for test_class in test_classes:
@@ -59,10 +59,10 @@ def format_ast(node):
 		else:
 			return []
 
-	def build_tree_lines(node):
+	def build_tree_lines(node, label_of, children_of):
 		"""Build the tree structure as a list of strings"""
-		label = get_node_label(node)
-		children = get_children(node)
+		label = label_of(node)
+		children = children_of(node)
 
 		if not children:
 			# Leaf node - just return the label
@@ -75,7 +75,7 @@ def format_ast(node):
 		child_widths = []
 
 		for child in children:
-			lines, left, right, width = build_tree_lines(child)
+			lines, left, right, width = build_tree_lines(child, label_of, children_of)
 			child_blocks.append(lines)
 			child_lefts.append(left)
 			child_rights.append(right)
@@ -163,12 +163,44 @@ def format_ast(node):
 		actual_width = max(len(line) for line in result)
 		return result, parent_center, parent_center, actual_width
 
-	lines, _, _, _ = build_tree_lines(node)
+	from flat_ast import FlatAST
+	if isinstance(node, FlatAST):
+		# Draw a flat AST through its view API: nodes are row indices
+		ast = node
+		op_symbols = {TT_PLUS: "+", TT_MINUS: "-", TT_MUL: "*", TT_DIV: "/"}
+
+		def get_flat_label(i):
+			kind = ast.kind_name(i)
+			if kind == 'NumberNode':
+				return str(ast.value(i))
+			elif kind == 'BinOpNode':
+				return f"BinOp({op_symbols[ast.op_type(i)]})"
+			elif kind == 'UnaryOpNode':
+				return f"Unary({op_symbols[ast.op_type(i)]})"
+			elif kind == 'ListNode':
+				return "Statements"
+			elif kind == 'VarAccessNode':
+				return f"Var({ast.name_of(i)})"
+			elif kind == 'VarAssignNode':
+				return f"Assign({ast.name_of(i)})"
+			elif kind == 'ListOpNode':
+				return f"ListOp({op_symbols[ast.op_type(i)]})"
+			return kind
+
+		def get_flat_children(i):
+			if ast.kind_name(i) in ('BinOpNode', 'UnaryOpNode', 'ListNode', 'VarAssignNode', 'ListOpNode'):
+				return ast.children(i)
+			return []
+
+		lines, _, _, _ = build_tree_lines(ast.root, get_flat_label, get_flat_children)
+	else:
+		lines, _, _, _ = build_tree_lines(node, get_node_label, get_children)
 	return '\n'.join('   ' + line for line in lines)
 
 
-def print_verbose_execution(fn, text, tokens, ast_node, result, error):
-	"""Print stages 1 and 2 of interpretation (Lexer and Parser)"""
+def print_verbose_execution(fn, text, tokens, ast_node, result, error, trace=True):
+	"""Print stages 1 and 2 of interpretation (Lexer and Parser), and the
+	stage 3 header if the execution steps follow (trace)"""
 	print("\n" + "="*60)
 	print("INTERPRETATION STEPS")
 	print("="*60)
@@ -182,11 +214,15 @@ def print_verbose_execution(fn, text, tokens, ast_node, result, error):
 	# Stage 2: Parser
 	print("\n2. PARSER (Abstract Syntax Tree):")
 	print("-" * 40)
-	print(format_ast(ast_node))
+	try:
+		print(format_ast(ast_node))
+	except RecursionError:
+		print("   (tree too deep to display)")
 
 	# Stage 3: Interpreter (will be printed during execution)
-	print("\n3. INTERPRETER (Execution):")
-	print("-" * 40)
+	if trace:
+		print("\n3. INTERPRETER (Execution):")
+		print("-" * 40)
 
 
 class VerboseInterpreterMixin:
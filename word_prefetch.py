@@ -0,0 +1,94 @@
+#######################################
+# WORD PREFETCH
+# Starts LLM resolution of operation words
+# before the program is lexed and parsed
+#######################################
+
+import re
+
+from basic import KEYWORDS
+from gemini_controller import get_gemini_controller
+from operator_lexicon import lookup_operator
+
+# The words of a program, as FastLexer matches them
+WORD_RE = re.compile(r'[A-Za-z][A-Za-z0-9_]*')
+# A name bound by 'create' or called by 'find', and the parameters after 'taking'
+NAME_RE = re.compile(r'(?<![A-Za-z0-9_])(?i:create|find)[ \t]+([A-Za-z][A-Za-z0-9_]*)')
+PARAMS_RE = re.compile(r'(?<![A-Za-z0-9_])(?i:taking)((?:[ \t]+[A-Za-z][A-Za-z0-9_]*)*)')
+
+
+class WordPrefetcher:
+    """
+    Speculative resolution of operation words.
+
+    start() scans the source text with regular expressions (much faster
+    than lexing it), keeps the words that look like operation words and
+    sends them to the controller as a background batch request. The LLM
+    then works while the program is lexed and parsed; the Parser sends
+    the candidates the scan missed with finish() and only waits for the
+    batch when it reaches one of its words (see Parser.collect_prefetched).
+
+    The scan leaves out keywords, names bound by 'create' or 'taking',
+    functions called with 'find', names of the symbol table and words the
+    operator lexicon answers. It is only a guess: a word sent needlessly
+    costs part of a request, never a wrong parse.
+
+    Requests go through GeminiController.submit_operation_words; with a
+    controller without it (or none at all, e.g. no API key) nothing is
+    sent and the Parser resolves the words itself.
+    """
+    def __init__(self, symbol_table=None):
+        self.symbol_table = symbol_table
+        self.futures = {}       # lowercase word -> future of the batch asking for it
+        self.submit = None
+        self.disabled = False
+
+    def start(self, text):
+        """Send the likely operation words of text"""
+        self.send(candidate_words(text, self.symbol_table))
+
+    def finish(self, words):
+        """
+        Make sure words (the Parser's candidates) are asked for. Returns the
+        words no request could be started for.
+        """
+        self.send([word for word in words if word.lower() not in self.futures])
+        return [word for word in words if word.lower() not in self.futures]
+
+    def send(self, words):
+        """Ask for words in one background batch request"""
+        if not words or not self.connect(): return
+        try:
+            future = self.submit(words)
+        except Exception:
+            return
+        for word in words:
+            self.futures[word.lower()] = future
+
+    def connect(self):
+        """Whether batches can be sent, getting the controller on first use"""
+        if self.submit is None and not self.disabled:
+            try:
+                self.submit = getattr(get_gemini_controller(), 'submit_operation_words', None)
+            except Exception:
+                self.submit = None
+            self.disabled = self.submit is None
+        return not self.disabled
+
+
+def candidate_words(text, symbol_table=None):
+    """The distinct words of text that may be operation words (see WordPrefetcher)"""
+    names = set(NAME_RE.findall(text))
+    for params in PARAMS_RE.findall(text):
+        for param in params.split():
+            if param.lower() in KEYWORDS: break  # 'do' ends the list
+            names.add(param)
+
+    words = {}
+    for word in set(WORD_RE.findall(text)) - names:
+        lower = word.lower()
+        if lower in KEYWORDS or lower in words: continue
+        if symbol_table is not None and symbol_table.get(word) is not None: continue
+        if lookup_operator(word) is not None: continue
+        words[lower] = word
+    return sorted(words.values())